@@ -2,86 +2,123 @@ import asyncio
 import time
 import pygame
 import os
-import uuid
+import glob
 import threading
 #import tempfile
-import shutil
 import atexit
 import random
 import json
 
-import edge_tts
 from edge_tts.exceptions import NoAudioReceived
 
 
 try:
-    from ai_core.brain import OpenAIBrain, LocalBrain, AIBrain
+    from ai_core.brain import LocalBrain, AIBrain, ScriptedBrain
+    from ai_core.transport import BrainUnavailable
 except ImportError:
     class AIBrain:
         def ask(self, prompt, context): 
             return "Sorry, i wasn't loaded correctly (ImportError)."
-    OpenAIBrain = AIBrain
-    LocalBrain = AIBrain
+        def ask_stream(self, prompt, context, cancelled=None):
+            yield self.ask(prompt, context)
+    LocalBrain = ScriptedBrain = AIBrain
+    class BrainUnavailable(Exception):
+        pass
     print("Error: ai_core/brain.py AI wasnt found.\nCurrently using placeholders")    
 
+try:
+    from ai_core.brain import OpenAIBrain
+except ImportError:
+    # no OpenAI backend yet
+    OpenAIBrain = AIBrain
+
+from ai_core.intent_handler import IntentHandler
+from ai_core.memory import ConversationMemory
+from ai_core.response_cache import ResponseCache
+import headless
 from config_manager import save_last_pet, load_last_pet
+from mood_machine import MoodMachine
+from mood_rules import DEFAULT_MOOD_TABLE, available_sounds, compile_mood_table
+from profiler import PROFILER
+from rust_core import shared, Snapshot
+from tts_cache import AudioCache
+from tts_stream import SpeechPlayer, SPEECH_CHANNEL, get_tts_source, iterate, sentence_boundary, split_sentences
+from speech_worker import SpeechWorker, SpeechJob, PRIORITY_PROMPT, PRIORITY_MOOD, PRIORITY_IDLE
 # ===========================================
-# 🗂️ TEMP FOLDER SETUP
+# 🗂️ VOICE CACHE FOLDER SETUP
 # ===========================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMP_DIR = os.path.join(BASE_DIR, "Voices")
+os.makedirs(TEMP_DIR, exist_ok=True)
 
-if os.path.exists(TEMP_DIR):
+# The folder now holds the persistent voice cache, only drop the one-off
+# files older versions left behind
+for old_file in glob.glob(os.path.join(TEMP_DIR, "temp_SAM_voice_*.mp3")):
     try:
-        shutil.rmtree(TEMP_DIR)
-        os.makedirs(TEMP_DIR, exist_ok=True)
-        print("🧼 Cleaned up old temp voice files at startup.")
-    except Exception as e:
+        os.remove(old_file)
+    except OSError as e:
         print("⚠️ Startup cleanup failed:", e)
 
-os.makedirs(TEMP_DIR, exist_ok=True)
-print(f"Temp voice folder Ready: {TEMP_DIR}")
+_audio_caches = {}
+
+def get_audio_cache(max_bytes):
+    """One AudioCache per process, shared by every Personality"""
+    if TEMP_DIR not in _audio_caches:
+        _audio_caches[TEMP_DIR] = AudioCache(TEMP_DIR, max_bytes)
+    return _audio_caches[TEMP_DIR]
+
+RESPONSE_CACHE_PATH = os.path.join(BASE_DIR, "ai_responses.json")
+_response_caches = {}
+
+def get_response_cache(cache_config):
+    """One ResponseCache per process too, so pets don't overwrite each other's file.
+    Headless runs keep it in memory."""
+    path = None if headless.enabled() else RESPONSE_CACHE_PATH
+    if path not in _response_caches:
+        _response_caches[path] = ResponseCache(
+            path,
+            ttl=cache_config.get("ttl_minutes", 60) * 60,
+            max_keys=cache_config.get("max_keys", 128),
+            variants=cache_config.get("variants", 3),
+        )
+    return _response_caches[path]
+
+MEMORY_DIR = os.path.join(BASE_DIR, "memories")
 # ===========================================
 # 🧹 CLEANUP ON EXIT
 # ===========================================
 @atexit.register
 def cleanup_temp_audio():
-    """Deleted Clippy’s temporary audio folder when program closes."""
+    """Lets the current line finish and shuts the mixer down when program closes."""
     import pygame, time
     try:
         if pygame.mixer.get_init():
-            while pygame.mixer.music.get_busy():
+            while pygame.mixer.Channel(SPEECH_CHANNEL).get_busy():
                 time.sleep(0.1)
                 
             pygame.mixer.quit()
-        
-        
-        if os.path.exists(TEMP_DIR):
-            shutil.rmtree(TEMP_DIR)
-            print("🧹 Deleted local cvoice files")
     except Exception as e:
         print("⚠️ Cleanup Error", e)
 
 
-def _run_speak_async_in_thread(speak_async_func, text): 
-    """Safely runs the async speak function in a new event loop."""
-    try:
-        asyncio.run(speak_async_func(text))
-    except Exception as e:
-        print(f"Speech thread error: {e}")
-        
-        
 # ===============================
 #    AI Brain Initialization
 # ===============================        
-def get_ai_brain(config_path):
-    """Initiates the AI brain based on Config"""
+def load_config(config_path):
     try: 
         with open(config_path, "r") as f:
-            full_config = json.load(f)
-            ai_config = full_config.get("ai_config", {"enabled": False})
+            return headless.apply(json.load(f))
     except Exception: 
-        ai_config = {"enabled": False}
+        return headless.apply({})
+
+def local_brain_options(ai_config):
+    """url/model overrides (e.g. to point at a test server) and transport limits from ai_config"""
+    keys = ("url", "model", "connect_timeout", "read_timeout", "max_in_flight", "failure_threshold", "cooldown")
+    return {key: ai_config[key] for key in keys if key in ai_config}
+
+def get_ai_brain(config_path):
+    """Initiates the AI brain based on Config"""
+    ai_config = load_config(config_path).get("ai_config", {"enabled": False})
     
     if not ai_config.get("enabled", False):
         print(" AI disabeled in Config.json")
@@ -92,11 +129,13 @@ def get_ai_brain(config_path):
     try: 
         if backend == "openai":
             return OpenAIBrain()
+        elif backend == "scripted":
+            return ScriptedBrain()
         elif backend == "local":
-            return LocalBrain()
+            return LocalBrain(**local_brain_options(ai_config))
         else:
             print(f"Unknown AI backend '{backend}'. Using LocalBrain placeholder")
-            return LocalBrain()
+            return LocalBrain(**local_brain_options(ai_config))
     except Exception as e:
         print(f"Failed to int AI Brain({backend}): {e}")
         
@@ -116,14 +155,31 @@ class Personality:
         self.name = self.data.get("name", "Pet")
         
         self.brain: AIBrain | None = get_ai_brain(config_path)
-        self._last_voice_file = None
+        
+        # synthesized lines are kept on disk, keyed by text + voice settings
+        config = load_config(config_path)
+        cache_config = config.get("tts_cache", {})
+        self.audio_cache = get_audio_cache(int(cache_config.get("max_mb", 50) * 1024 * 1024))
+        # mood/idle answers get reused for the same mood + roughly the same stats
+        self.response_cache = get_response_cache(config.get("ai_cache", {}))
+        
+        #chats with the user, one memory file per pet, prompt share stays fixed
+        #(headless runs don't touch the real one)
+        memory_config = config.get("memory", {})
+        self.memory = ConversationMemory(
+            None if headless.enabled() else os.path.join(MEMORY_DIR, f"{self.name}.json.gz"),
+            token_budget=memory_config.get("token_budget", 600),
+            recent_turns=memory_config.get("recent_turns", 6),
+            max_turns=memory_config.get("max_turns", 500),
+        )
         
         #Initialize pygame mixer once
         if not pygame.mixer.get_init():
             pygame.mixer.init()
             
-        #Store it 
-        self._last_voice_file = None
+        #"edge" for the real voice, "tone" for offline beeps, "silent" for headless
+        self.tts = get_tts_source(config.get("tts_engine", "edge"), self.voice, self.rate, self.volume)
+        self.speech_player = SpeechPlayer()
         
         #holds the text to show in the bubble and for how long to show that bubble for 0 for forever
         self.current_text = None
@@ -131,6 +187,36 @@ class Personality:
         
         #gotta prevent him from screeming every 1 seccond
         self.last_mood_shout = 0
+        
+        #same sampler main.py reads, used to name whatever is hogging the machine
+        self.telemetry = shared()
+        self.last_stats = {}
+        
+        #the pet's "moods" rules from personality.json, compiled once here
+        self.mood_table = compile_mood_table(
+            self.data.get("moods", DEFAULT_MOOD_TABLE),
+            Snapshot.FIELDS,
+            reactions=self.data.get("mood_reactions", {}),
+            sounds=available_sounds(os.path.dirname(personality_path)),
+            pet_name=self.name,
+        )
+        #moods change at most once per min_dwell_seconds
+        min_dwell = self.mood_table.min_dwell
+        if min_dwell is None:
+            min_dwell = config.get("mood", {}).get("min_dwell_seconds", 10)
+        self.mood_machine = MoodMachine(self.mood_table.rules, self.mood_table.default, min_dwell)
+        
+        #stat questions and pet commands get answered here without the brain,
+        #controls maps intent actions to callables (pet.py adds the music ones)
+        self.intents = IntentHandler()
+        self.muted = False
+        self.controls = {"mute": self.mute, "unmute": self.unmute}
+        
+        #one loop thread does all the AI + TTS work, queued by priority
+        self.speech_worker = SpeechWorker(self._run_job)
+        
+        if cache_config.get("prewarm", True):
+            self.prewarm_voice_lines()
 
 
     # ============================================================
@@ -154,75 +240,123 @@ class Personality:
             
             
     def update_mood_from_stats(self, stats):
-        cpu = stats.get("cpu_usage", 0)
-        gpu = stats.get("gpu_usage", 0)
-        temp = stats.get("gpu_temp", 0)
-        mem = stats.get("mem_usage", 0) 
-        
-        if temp > 85:
-            return "MELTING"
-        elif mem > 90:             
-            return "STUFFED"
-        elif gpu > 90:
-            return "GAMING_HARD"
-        elif cpu < 5:
-            return "BORED"
-        else:
-            return "CHILLING"
+        """Pass smoothed stats (snapshot(smoothed=True)), the mood machine adds hysteresis on top"""
+        self.last_stats = stats
+        return self.mood_machine.update(stats)
     
     
     # ===============
     #   TTS system
     # ===============
-    async def speak_async(self, text):
-        """Generate speech to a unique file, then play it safely."""
-        # use unique file each time to avoid perission issues
-        out_path = os.path.join(TEMP_DIR, f"temp_SAM_voice_{uuid.uuid4().hex}.mp3")
+    def _voice_key(self, text):
+        return self.audio_cache.key(text, self.voice, self.rate, self.volume)
 
-        communicator = edge_tts.Communicate(
-            text, voice=self.voice, rate=self.rate, volume=self.volume
-        )
-        await communicator.save(out_path)
-        
-        #stop any voice playing currently
-        if pygame.mixer.music.get_busy():
-            pygame.mixer.music.stop()
+    async def _clip(self, sentence):
+        """Audio for one sentence, from the voice cache or synthesized on a miss"""
+        key = self._voice_key(sentence)
+        if self.tts.cacheable:
+            data = self.audio_cache.read(key)
+            if data is not None:
+                return data
         
-        #paly the new clip
-        pygame.mixer.music.load(out_path)
-        pygame.mixer.music.play()
-        
-        #wait untill done
-        while pygame.mixer.music.get_busy():
-            pygame.time.Clock().tick(10)
-            
-        self._last_voice_file = out_path
-
-
-    # ========================
-    #   async speach wrapper
-    # ========================
-    def _run_speech_sync(self, msg):
-        """Blocking call to sep to gene tts"""
         MAX_RETRIES = 3
         RETRY_DELAY = 2
-        
         for attempt in range(MAX_RETRIES):
-            try: 
-                asyncio.run(self.speak_async(msg))
-                return
+            try:
+                data = await self.tts.synthesize(sentence)
+                break
             except NoAudioReceived as e:
                 print(f"[TTS ERROR] no audio detected. Try {attempt + 1}/{MAX_RETRIES}. ERROR: {e}")
                 if attempt < MAX_RETRIES - 1:
-                    time.sleep(RETRY_DELAY)
-                else:
-                    print("[TTS FATAL]: Tough Luck. Skipping the message.")
-                    break
+                    await asyncio.sleep(RETRY_DELAY)
+        else:
+            print("[TTS FATAL]: Tough Luck. Skipping the sentence.")
+            return None
+        
+        if self.tts.cacheable:
+            self.audio_cache.put(key, data)
+        return data
+
+    async def _clips(self, sentences):
+        """Yields each sentence's audio in order. Sentences come from an async
+        iterator (a streaming AI answer), synthesis runs ahead while earlier ones play."""
+        ready = asyncio.Queue(maxsize=2)  # how far synthesis may run ahead of playback
+        first_sentence_at = None
+
+        async def feed():
+            nonlocal first_sentence_at
+            try:
+                async for sentence in sentences:
+                    if first_sentence_at is None:
+                        first_sentence_at = time.perf_counter()
+                    await ready.put(asyncio.ensure_future(self._clip(sentence)))
+                await ready.put(None)
             except Exception as e:
-                print(f"[TTS UNKNOWN ERROR]: Connection ERROR, TTS wont work (WOMP WOMP): {e}")
-                break
-            
-            
+                await ready.put(e)
+
+        feeder = asyncio.ensure_future(feed())
+        try:
+            while (item := await ready.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                data = await item
+                if data:
+                    if first_sentence_at is not None:
+                        # first sentence in -> its audio out, what TTS adds before speech starts
+                        PROFILER.observe("tts_first_audio_ms", (time.perf_counter() - first_sentence_at) * 1000)
+                        first_sentence_at = None
+                    yield data
+        finally:
+            feeder.cancel()
+            while not ready.empty():
+                item = ready.get_nowait()
+                if isinstance(item, asyncio.Future):
+                    item.cancel()
+
+    async def speak_async(self, text, on_done=None):
+        """Speak a line from memory, the first sentence starts while the rest synthesize.
+        on_done(finished) fires when the last sentence ends (or the line gets cut off)."""
+        await self.speak_sentences(iterate(split_sentences(text)), on_done)
+
+    async def speak_sentences(self, sentences, on_done=None):
+        """Like speak_async, for sentences that are still arriving"""
+        if self.muted:
+            # the bubble still shows the text, drain the sentences so the answer completes
+            async for _ in sentences:
+                pass
+            if on_done:
+                on_done(True)
+            return
+        try:
+            await self.speech_player.play(self._clips(sentences), on_done=on_done)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[TTS UNKNOWN ERROR]: Connection ERROR, TTS wont work (WOMP WOMP): {e}")
+
+
+    def prewarm_voice_lines(self):
+        """Synthesizes the static personality.json lines in the background
+        so they play instantly (and offline) the first time they're needed"""
+        if not self.tts.cacheable:
+            return
+        lines = list(self.data.get("idle_messages", [])) + list(self.data.get("mood_reactions", {}).values())
+        sentences = [sentence for line in lines for sentence in split_sentences(line)]
+        missing = [s for s in dict.fromkeys(sentences) if self.audio_cache.get(self._voice_key(s)) is None]
+        if not missing:
+            return
+        
+        async def warm():
+            for done, line in enumerate(missing):
+                try:
+                    self.audio_cache.put(self._voice_key(line), await self.tts.synthesize(line))
+                except Exception as e:
+                    print(f"[TTS PREWARM] stopped, {len(missing) - done} lines left uncached: {e}")
+                    return
+        
+        thread = threading.Thread(target=lambda: asyncio.run(warm()), daemon=True)
+        thread.start()
+
     # ===========================
     #   AI Prompt Entry Point
     # ===========================      
@@ -234,36 +368,159 @@ class Personality:
             context["pet_name"] = self.name
             context["mood"] = context.get("mood", "aware")
             
+        intent = self.intents.handle(user_prompt, self.telemetry.snapshot(), self.telemetry.top_processes)
+        if intent:
+            self.answer_intent(intent)
+            return
+        
+        context["memory"] = self.memory.context(user_prompt)
+        # only prompts get the busiest process: the first lookup turns the
+        # 5 s process scan on for good, and mood/idle lines never needed it
+        busiest = self.busiest_process() if self.brain else None
+        if busiest:
+            context.setdefault("top_process", f"{busiest[0]} ({busiest[1]:.0f}% CPU)")
         fallback = "My circuts are a bit fried come back later"
-        self._start_ai_and_speach_thread(user_prompt, context, fallback)
+        self._queue_ai_and_speech(PRIORITY_PROMPT, user_prompt, context, fallback)
+
+    def answer_intent(self, intent):
+        """Runs a locally answered prompt: the control action (if any), then the reply.
+        The reply still goes through the worker so it replaces whatever was being said."""
+        if intent.action:
+            control = self.controls.get(intent.action)
+            if control:
+                control()
+        self.current_text = intent.reply
+        self.display_timer = time.time() + 6
+        # no prompt means speak the text as is
+        self.speech_worker.submit(SpeechJob(PRIORITY_PROMPT, None, {}, intent.reply))
+    
+    def mute(self):
+        self.muted = True
+        self.speech_player.stop()
+    
+    def unmute(self):
+        self.muted = False
+    
+    def cancel_prompt(self):
+        """Stops the answer to the prompt (generation and speech), e.g. when the prompt menu closes"""
+        self.speech_worker.cancel(PRIORITY_PROMPT)
         
-    def _start_ai_and_speach_thread(self, prompt: str, context: dict, fallback_text: str):
-        """Runs AI and call the TTS in sep thread to avoid freezing the main loop"""
-        def worker():
-            msg_to_speak = ""
-            if self.brain:
-                try:
-                    ai_msg = self.brain.ask(prompt, context)
-                    print(f"AI Response: {self.name}: {ai_msg}")
-                    
-                    self.current_text = ai_msg
-                    #just show it for 7 secconds
-                    self.display_timer = time.time() + 7
-                    
-                    msg_to_speak = ai_msg
-                except Exception as e:
-                    print(f"AI Worker failed: {e}. Falling back to static text.")
-                    msg_to_speak = fallback_text
-                    self.current_text = fallback_text
-                    self.display_timer = time.time() + 5
-            else:
-                msg_to_speak = fallback_text
-                self.current_text = fallback_text
-                self.display_timer = time.time() + 5
-            
-            self._run_speech_sync(msg_to_speak)
-        thread = threading.Thread(target=worker, daemon=True)
-        thread.start()
+    def close(self):
+        """Stops the speech worker and writes out the memory and answers still waiting to be saved"""
+        self.speech_worker.close()
+        self.memory.flush()
+        self.response_cache.flush()
+
+    def busiest_process(self, by="cpu"):
+        """(name, percent) of the process using the most cpu/mem, or None before the first scan"""
+        top = self.telemetry.top_processes(1, by=by)
+        if not top:
+            return None
+        name, _pid, cpu, mem = top[0]
+        return name, (cpu if by == "cpu" else mem)
+    
+    def _queue_ai_and_speech(self, priority, prompt: str, context: dict, fallback_text: str, template=None):
+        """Hands the AI call + TTS to the speech worker so the main loop never waits on it.
+        Lines with a template name can be answered from the response cache."""
+        context.setdefault("stats", self.last_stats)
+        
+        cache_key = None
+        if template:
+            cache_key = self.response_cache.key(template, context.get("mood"), context["stats"], self.name)
+        self.speech_worker.submit(SpeechJob(priority, prompt, context, fallback_text, cache_key))
+    
+    async def _run_job(self, job):
+        """Runs on the speech worker loop, one job at a time"""
+        if job.prompt is None:
+            await self.speak_async(job.fallback_text)
+            return
+        if not self.brain:
+            self.current_text = job.fallback_text
+            self.display_timer = time.time() + 5
+            await self.speak_async(job.fallback_text)
+            return
+        
+        cached = self.response_cache.get(job.cache_key) if job.cache_key else None
+        if cached:
+            self.current_text = cached
+            self.display_timer = time.time() + 7
+            await self.speak_async(cached)
+            return
+        await self.speak_sentences(self._answer_sentences(job))
+
+    async def _brain_pieces(self, job):
+        """Runs brain.ask_stream on an executor thread and yields its pieces on the loop.
+        The brain checks job.cancelled between tokens, so a newer job stops generation."""
+        loop = asyncio.get_running_loop()
+        pieces = asyncio.Queue()
+        stopped = threading.Event()
+
+        def post(item):
+            try:
+                loop.call_soon_threadsafe(pieces.put_nowait, item)
+            except RuntimeError:
+                # the worker loop is already gone
+                stopped.set()
+
+        def pump():
+            try:
+                with PROFILER.span("llm"):
+                    for piece in self.brain.ask_stream(job.prompt, job.context,
+                                                       cancelled=lambda: job.cancelled or stopped.is_set()):
+                        post(piece)
+            except Exception as e:
+                post(e)
+            finally:
+                post(None)
+
+        loop.run_in_executor(None, pump)
+        try:
+            while (piece := await pieces.get()) is not None:
+                if isinstance(piece, Exception):
+                    raise piece
+                yield piece
+        finally:
+            stopped.set()
+
+    async def _answer_sentences(self, job):
+        """Shows the AI answer in the bubble as it streams in and yields
+        every sentence as soon as it is complete, so TTS can start early"""
+        text = ""
+        spoken = 0
+        answered = False
+        asked_at = time.perf_counter()
+        try:
+            async for piece in self._brain_pieces(job):
+                if not text:
+                    PROFILER.observe("llm_first_token_ms", (time.perf_counter() - asked_at) * 1000)
+                text += piece
+                self.current_text = text.strip()
+                #just show it for 7 secconds after the last word
+                self.display_timer = time.time() + 7
+                boundary = sentence_boundary(text, spoken)
+                if boundary > spoken:
+                    for sentence in split_sentences(text[spoken:boundary]):
+                        yield sentence
+                    spoken = boundary
+            answered = True
+            PROFILER.observe("llm_total_ms", (time.perf_counter() - asked_at) * 1000)
+        except BrainUnavailable as e:
+            print(f"AI unavailable ({e}). Falling back to static text.")
+        except Exception as e:
+            print(f"AI Worker failed: {e}. Falling back to static text.")
+
+        if not text.strip():
+            text = job.fallback_text
+            self.current_text = text
+            self.display_timer = time.time() + 5
+        else:
+            print(f"AI Response: {self.name}: {text.strip()}")
+            if answered and job.cache_key:
+                self.response_cache.add(job.cache_key, text.strip())
+            if answered and job.priority == PRIORITY_PROMPT:
+                self.memory.add(job.prompt, text.strip())
+        for sentence in split_sentences(text[spoken:]):
+            yield sentence
     
     # ===========================================
     #   MOOD & IDLE SPEECH
@@ -277,7 +534,7 @@ class Personality:
         prompt = "Say somthing funny, positive, or relevant to system monitoring."
         context = {"mood" : "idle", "pet_name": self.name}
         
-        self._start_ai_and_speach_thread(prompt, context, fallback_text)
+        self._queue_ai_and_speech(PRIORITY_IDLE, prompt, context, fallback_text, template="idle")
 
     def say_for_mood(self, mood):
         text_from_json = self.data["mood_reactions"].get(mood)
@@ -289,5 +546,5 @@ class Personality:
         prompt = f"React to the system baing in a '{mood}' state. Keep it brief and in character"
         context = {"mood" : mood, "pet_name" : self.name}
         
-        self._start_ai_and_speach_thread(prompt, context, fallback_text)
+        self._queue_ai_and_speech(PRIORITY_MOOD, prompt, context, fallback_text, template="mood")
         
\ No newline at end of file
@@ -1,45 +1,124 @@
-import requests
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Iterator, Optional
+
+from .transport import BrainTransport, BrainUnavailable
+
+
+class AIBrain:
+    """What the personality expects from a brain"""
+
+    def ask(self, user_query: str, context: Dict[str, Any] = {}) -> str:
+        raise NotImplementedError
+
+    def ask_stream(self, user_query: str, context: Dict[str, Any] = {},
+                   cancelled: Optional[Callable[[], bool]] = None) -> Iterator[str]:
+        """Yields the answer piece by piece. Brains that can't stream give it all at once."""
+        yield self.ask(user_query, context)
+
+
+class LocalBrain(AIBrain):
+    def __init__(self, url: str = "http://localhost:11434/api/generate", model: str = "gemma3:4b",
+                 **transport_options):
+        self.model = model
+        self.url = url
+        # pooled keep-alive connections, in-flight cap, timeouts and the circuit breaker
+        self.transport = BrainTransport(url, **transport_options)
 
-class LocalBrain:
-    def __init__(self):
-        self.model = "gemma3:4b" 
-        self.url = "http://localhost:11434/api/generate"
-        
         self.system_rules = (
             "You are Clippy, a sarcastic but helpful desktop pet. "
             "You monitor the user's computer hardware. Keep your answers short (1-2 sentences). "
             "If the CPU is hot, be worried. If the RAM is full, complain about it."
         )
 
-    def ask(self, user_query: str, context: Dict[str, Any] = {}) -> str:
-        """Sends a prompt to Ollama with hardware stats as context."""
-        
+    def _build_prompt(self, user_query: str, context: Dict[str, Any]) -> str:
         stats = context.get("stats", {})
         stats_str = (
             f"Current Stats: CPU: {stats.get('cpu_usage')}% at {stats.get('cpu_temp')}°C, "
             f"GPU: {stats.get('gpu_usage')}% at {stats.get('gpu_temp')}°C, "
             f"RAM: {stats.get('mem_usage')}%."
         )
+        if context.get("top_process"):
+            stats_str += f" Busiest process: {context['top_process']}."
 
-        full_prompt = f"{self.system_rules}\n\n{stats_str}\n\nUser says: {user_query}\nClippy:"
+        # what ConversationMemory.context() kept of earlier chats, already size-capped
+        memory = context.get("memory")
+        memory_str = f"{memory}\n\n" if memory else ""
 
+        return f"{self.system_rules}\n\n{stats_str}\n\n{memory_str}User says: {user_query}\nClippy:"
+
+    def ask(self, user_query: str, context: Dict[str, Any] = {}) -> str:
+        """Sends a prompt to Ollama with hardware stats as context.
+        Raises BrainUnavailable when Ollama can't be reached."""
         payload = {
             "model": self.model,
-            "prompt": full_prompt,
-            "stream": False  
+            "prompt": self._build_prompt(user_query, context),
+            "stream": False
         }
 
         try:
-            response = requests.post(self.url, json=payload, timeout=15)
-            
-            if response.status_code == 200:
-                return response.json().get("response", "I have no words... literally.")
-            else:
-                return f"Ollama Error {response.status_code}: Is the model pulled?"
-                
-        except requests.exceptions.ConnectionError:
-            return "I can't reach my brain! (Ollama is offline)"
+            with self.transport.post(payload) as response:
+                if response.status_code == 200:
+                    return response.json().get("response", "I have no words... literally.")
+                else:
+                    return f"Ollama Error {response.status_code}: Is the model pulled?"
+
+        except BrainUnavailable:
+            raise
         except Exception as e:
-            return f"Brain Glitch: {str(e)}"
\ No newline at end of file
+            return f"Brain Glitch: {str(e)}"
+
+    def ask_stream(self, user_query: str, context: Dict[str, Any] = {},
+                   cancelled: Optional[Callable[[], bool]] = None) -> Iterator[str]:
+        """Same as ask, but yields tokens as Ollama generates them (one NDJSON line each).
+        Closing the connection when cancelled() turns true makes Ollama stop generating.
+        Only real answer text is yielded, errors are raised (BrainUnavailable when
+        Ollama can't answer at all) so callers can fall back or cache safely."""
+        payload = {
+            "model": self.model,
+            "prompt": self._build_prompt(user_query, context),
+            "stream": True
+        }
+
+        with self.transport.post(payload, stream=True) as response:
+            if response.status_code != 200:
+                raise BrainUnavailable(f"Ollama Error {response.status_code}: Is the model pulled?")
+
+            # chunk_size=None hands lines over as they arrive instead of buffering 512 bytes
+            for line in response.iter_lines(chunk_size=None):
+                if cancelled and cancelled():
+                    return
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Brain Glitch: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    return
+
+
+class ScriptedBrain(AIBrain):
+    """Canned answers with no model or network behind them, for headless runs
+    and benchmarks. Cycles through `replies`, streamed a word at a time."""
+
+    def __init__(self, replies=None):
+        self.replies = replies or [
+            "Beep boop, everything looks fine from here.",
+            "Your computer is working hard. I'm supervising.",
+            "I would answer that, but I'm only a test brain.",
+        ]
+        self.asked = 0
+
+    def ask(self, user_query: str, context: Dict[str, Any] = {}) -> str:
+        reply = self.replies[self.asked % len(self.replies)]
+        self.asked += 1
+        return reply
+
+    def ask_stream(self, user_query: str, context: Dict[str, Any] = {},
+                   cancelled: Optional[Callable[[], bool]] = None) -> Iterator[str]:
+        words = self.ask(user_query, context).split(" ")
+        for i, word in enumerate(words):
+            if cancelled and cancelled():
+                return
+            yield word if i == 0 else " " + word
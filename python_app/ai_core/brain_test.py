@@ -0,0 +1,132 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ai_core.brain import LocalBrain
+from ai_core.transport import BrainUnavailable
+
+
+class FakeOllama(ThreadingHTTPServer):
+    """Answers /api/generate with the given NDJSON chunks, one line every `delay` s.
+    Remembers the payload it got and whether the client hung up mid-stream."""
+
+    daemon_threads = True
+
+    def __init__(self, chunks, status=200, delay=0.0):
+        super().__init__(("127.0.0.1", 0), NDJSONHandler)
+        self.chunks = chunks
+        self.status = status
+        self.delay = delay
+        self.payloads = []
+        self.lines_sent = 0
+        self.hung_up = threading.Event()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api/generate"
+
+
+class NDJSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        server.payloads.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self.send_response(server.status)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in server.chunks:
+                line = (json.dumps(chunk) + "\n").encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+                server.lines_sent += 1
+                time.sleep(server.delay)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            server.hung_up.set()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(chunks, **options):
+        server = FakeOllama(chunks, **options)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def tokens(*words, done=True):
+    chunks = [{"response": word, "done": False} for word in words]
+    if done:
+        chunks.append({"response": "", "done": True})
+    return chunks
+
+
+def test_ask_stream_yields_tokens_in_order(serve):
+    server = serve(tokens("Hot", " CPU", "!"))
+    brain = LocalBrain(url=server.url, model="test")
+    assert list(brain.ask_stream("how hot?", {"stats": {"cpu_temp": 90}})) == ["Hot", " CPU", "!"]
+    assert server.payloads[0]["stream"] is True
+    assert server.payloads[0]["model"] == "test"
+    assert "90" in server.payloads[0]["prompt"]
+
+
+def test_ask_stream_stops_at_done(serve):
+    server = serve(tokens("a", "b") + [{"response": "after done", "done": False}])
+    assert list(LocalBrain(url=server.url).ask_stream("hi")) == ["a", "b"]
+
+
+def test_ask_stream_skips_empty_responses(serve):
+    server = serve([{"response": "", "done": False}, {"response": "x", "done": False}, {"done": True}])
+    assert list(LocalBrain(url=server.url).ask_stream("hi")) == ["x"]
+
+
+def test_ask_stream_raises_stream_errors(serve):
+    server = serve([{"response": "par", "done": False}, {"error": "model crashed"}])
+    stream = LocalBrain(url=server.url).ask_stream("hi")
+    assert next(stream) == "par"
+    with pytest.raises(RuntimeError, match="model crashed"):
+        next(stream)
+
+
+def test_ask_stream_http_error_is_unavailable(serve):
+    server = serve([], status=404)
+    with pytest.raises(BrainUnavailable, match="404"):
+        list(LocalBrain(url=server.url).ask_stream("hi"))
+
+
+def test_ask_stream_cancel_hangs_up(serve):
+    server = serve(tokens(*[f"w{i} " for i in range(200)]), delay=0.01)
+    brain = LocalBrain(url=server.url)
+    seen = []
+    for token in brain.ask_stream("hi", cancelled=lambda: len(seen) >= 3):
+        seen.append(token)
+    assert seen == ["w0 ", "w1 ", "w2 "]
+    # closing the response drops the connection, so the server stops writing
+    assert server.hung_up.wait(5)
+    assert server.lines_sent < 200
+
+
+def test_ask_stream_unreachable_is_unavailable():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    brain = LocalBrain(url=f"http://127.0.0.1:{port}/api/generate", connect_timeout=0.5)
+    with pytest.raises(BrainUnavailable):
+        list(brain.ask_stream("hi"))
@@ -0,0 +1,162 @@
+import re
+from typing import Any, Callable, FrozenSet, List, Optional, Set, Tuple
+
+
+WORD = re.compile(r"[a-z0-9']+")
+
+CPU = {"cpu", "processor"}
+GPU = {"gpu", "graphics", "video card"}
+RAM = {"ram", "memory"}
+DISK = {"disk", "storage", "drive", "ssd", "hdd"}
+MACHINE = {"pc", "computer", "system", "machine", "rig"}
+HEAT = {"hot", "heat", "warm", "temp", "temps", "temperature", "cooking", "burning"}
+POWER = {"power", "watt", "watts", "draw", "drawing", "pulling"}
+LOAD = {"usage", "load", "busy", "utilization", "utilisation", "percent"}
+FULL = {"full", "free", "left", "space", "filling"}
+# a stat rule needs its subject plus one of these (or a measure word), so
+# "are you using my memory" or "which gpu" alone isn't a stat question
+STAT_QUESTION = {"how much", "how busy", "how full", "how's", "hows", "how is", "what's", "whats",
+                 "what is", "check", "show me", "tell me"}
+ASKING = {"what", "what's", "whats", "which", "who"}
+HOGGING = {"eating", "hogging", "using", "slowing", "lagging", "taking", "filling"}
+MUSIC = {"music", "song", "tunes"}
+# what a prompt may start with before the imperative verb of a control
+POLITE = {"please", "pls", "ok", "okay", "hey"}
+
+# (intent, leading verbs, keyword groups). Controls only count when the prompt
+# starts with one of their verbs (one or two words), stat questions have None
+# there. Every group needs one word (or two-word phrase) from the prompt.
+# First match wins so the specific ones go first.
+INTENT_RULES: List[Tuple[str, Optional[Set[str]], Tuple[Set[str], ...]]] = [
+    # music first, "mute the music" is about the music, not the pet's voice
+    ("music_off", {"stop", "pause", "kill", "mute", "silence"}, (MUSIC,)),
+    ("music_off", {"turn"}, (MUSIC, {"off"})),
+    ("music_on", {"play", "start", "resume", "put on", "unmute"}, (MUSIC,)),
+    ("music_on", {"turn"}, (MUSIC, {"on"})),
+    # only imperatives, a bare "quiet" also starts "quiet day today, huh"
+    ("mute", {"mute", "be quiet", "keep quiet", "stay quiet", "quiet down", "shut up",
+              "stop talking", "silence", "hush"}, ()),
+    ("unmute", {"unmute", "talk again", "speak again", "start talking"}, ()),
+    ("top_process_mem", None, (ASKING, HOGGING, RAM)),
+    ("top_process", None, (ASKING, HOGGING)),
+    ("top_process", None, ({"top", "busiest", "heaviest"}, {"process", "program", "app"})),
+    ("gpu_temp", None, (GPU, HEAT)),
+    ("cpu_temp", None, (CPU, HEAT)),
+    ("gpu_power", None, (GPU, POWER)),
+    ("gpu_usage", None, (GPU, LOAD | STAT_QUESTION)),
+    ("cpu_usage", None, (CPU, LOAD | STAT_QUESTION)),
+    ("mem_usage", None, (RAM, LOAD | FULL | STAT_QUESTION)),
+    ("disk_usage", None, (DISK, LOAD | FULL | STAT_QUESTION)),
+    ("status", None, (MACHINE, {"status", "stats", "doing", "holding up", "health"})),
+    ("status", None, ({"status", "stats"}, STAT_QUESTION)),
+]
+
+# these want the brain even when they mention the CPU: creative prompts,
+# explanations, advice ("which gpu should I buy", "help me fix my pc") and
+# anything about earlier chats, only the brain has the conversation memory
+OPEN_ENDED = {"write", "poem", "story", "joke", "explain", "why", "imagine", "pretend",
+              "song about", "tell me about", "what is a", "what's a",
+              "should", "buy", "upgrade", "recommend", "best", "better", "worth",
+              "help", "fix", "speed up", "how do", "how can", "how to", "improve",
+              "remember", "remind", "talked", "last time", "earlier", "you said", "told me"}
+# anything longer is a conversation, not a stat lookup
+MAX_WORDS = 12
+
+
+def _tokens(text: str) -> Tuple[Set[str], Set[str], int]:
+    """(words and two-word phrases, the first word and two words after any
+    polite opener, word count)"""
+    words = WORD.findall(text.lower())
+    tokens = set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+    start = 0
+    while start < len(words) and words[start] in POLITE:
+        start += 1
+    lead = {" ".join(words[start:start + n]) for n in (1, 2) if start + n <= len(words)}
+    return tokens, lead, len(words)
+
+
+CONTROL_REPLIES = {
+    "mute": "Fine. I'll keep my thoughts in the bubble.",
+    "unmute": "I'm back on the mic!",
+    "music_off": "Music off. Enjoy the silence.",
+    "music_on": "Cue the music!",
+}
+
+
+class Intent:
+    """What a prompt was classified as. Stat questions come with a reply,
+    pet controls with the action to run (and a reply to show)."""
+
+    def __init__(self, name: str, reply: str, action: Optional[str] = None):
+        self.name = name
+        self.reply = reply
+        self.action = action
+
+
+class IntentHandler:
+    """Answers prompts that don't need the LLM, straight from a snapshot.
+    Rules are keyword sets frozen once at startup; a prompt is tokenised once
+    and each rule is a few set intersections, so it's cheap enough to run
+    before every brain call. Anything that doesn't match goes to the brain."""
+
+    def __init__(self, rules=INTENT_RULES):
+        self.rules: List[Tuple[str, Optional[FrozenSet[str]], Tuple[FrozenSet[str], ...]]] = [
+            (name, frozenset(lead) if lead is not None else None, tuple(frozenset(group) for group in groups))
+            for name, lead, groups in rules
+        ]
+
+    def classify(self, text: str) -> Optional[str]:
+        tokens, lead, count = _tokens(text)
+        if count == 0 or count > MAX_WORDS or not tokens.isdisjoint(OPEN_ENDED):
+            return None
+        for name, verbs, groups in self.rules:
+            if verbs is not None and verbs.isdisjoint(lead):
+                continue
+            if all(not tokens.isdisjoint(group) for group in groups):
+                return name
+        return None
+
+    def handle(self, text: str, stats: Any,
+               top_processes: Optional[Callable[..., list]] = None) -> Optional[Intent]:
+        """An Intent for prompts we can answer locally, None for the brain.
+        stats is a Snapshot (or dict), top_processes(n, by=) the CPU method."""
+        name = self.classify(text)
+        if name is None:
+            return None
+        if name in CONTROL_REPLIES:
+            return Intent(name, CONTROL_REPLIES[name], action=name)
+        if name.startswith("top_process"):
+            return Intent(name, self._top_process(top_processes, "mem" if name.endswith("mem") else "cpu"))
+        return Intent(name, self._stat_reply(name, stats))
+
+    def _stat_reply(self, name: str, stats: Any) -> str:
+        value = stats.get(name, 0) or 0
+        if name == "cpu_temp":
+            return f"Your CPU is at {value:.0f}°C." + (" That's toasty!" if value > 80 else "")
+        if name == "gpu_temp":
+            return f"Your GPU is at {value:.0f}°C." + (" That's toasty!" if value > 80 else "")
+        if name == "gpu_power":
+            return f"Your GPU is pulling {value:.0f} W."
+        if name == "cpu_usage":
+            cores = getattr(stats, "cores", None)
+            spread = f" across {len(cores)} cores" if cores else ""
+            return f"CPU load is {value:.0f}%{spread}."
+        if name == "gpu_usage":
+            return f"Your GPU is {value:.0f}% busy."
+        if name == "mem_usage":
+            return f"RAM is {value:.0f}% full." + (" I'm stuffed!" if value > 90 else "")
+        if name == "disk_usage":
+            return f"Your main disk is {value:.0f}% full."
+        return (
+            f"CPU {stats.get('cpu_usage', 0):.0f}% at {stats.get('cpu_temp', 0):.0f}°C, "
+            f"GPU {stats.get('gpu_usage', 0):.0f}% at {stats.get('gpu_temp', 0):.0f}°C, "
+            f"RAM {stats.get('mem_usage', 0):.0f}%, disk {stats.get('disk_usage', 0):.0f}%."
+        )
+
+    def _top_process(self, top_processes, by: str) -> str:
+        top = top_processes(3, by=by) if top_processes else []
+        if not top:
+            return "Give me a second, I'm still sizing up your processes."
+        unit = "CPU" if by == "cpu" else "RAM"
+        parts = [f"{name} ({cpu if by == 'cpu' else mem:.0f}%)" for name, _pid, cpu, mem in top]
+        return f"Top {unit} users: " + ", ".join(parts) + "."
@@ -0,0 +1,101 @@
+import pytest
+
+from ai_core.intent_handler import IntentHandler
+
+
+@pytest.fixture(scope="module")
+def intents():
+    return IntentHandler()
+
+
+@pytest.mark.parametrize("prompt, intent", [
+    ("how hot is my cpu?", "cpu_temp"),
+    ("GPU temperature", "gpu_temp"),
+    ("is my processor cooking", "cpu_temp"),
+    ("how much power is my gpu drawing", "gpu_power"),
+    ("cpu usage", "cpu_usage"),
+    ("what's my cpu load", "cpu_usage"),
+    ("how busy is the gpu", "gpu_usage"),
+    ("how much ram am I using", "mem_usage"),
+    ("is my memory full", "mem_usage"),
+    ("how much space is left on my disk", "disk_usage"),
+    ("what's eating my ram", "top_process_mem"),
+    ("what is using my cpu", "top_process"),
+    ("which app is slowing everything down", "top_process"),
+    ("show me the top process", "top_process"),
+    ("how's my pc doing", "status"),
+    ("system status", "status"),
+])
+def test_stat_questions_are_answered_locally(intents, prompt, intent):
+    assert intents.classify(prompt) == intent
+
+
+@pytest.mark.parametrize("prompt, intent", [
+    ("mute", "mute"),
+    ("please be quiet", "mute"),
+    ("shut up", "mute"),
+    ("ok, quiet down", "mute"),
+    ("unmute", "unmute"),
+    ("talk again", "unmute"),
+    ("stop the music", "music_off"),
+    ("mute the music", "music_off"),
+    ("turn the music off", "music_off"),
+    ("play some music", "music_on"),
+    ("hey, turn the tunes on", "music_on"),
+    ("resume the song", "music_on"),
+])
+def test_controls_need_a_leading_verb(intents, prompt, intent):
+    assert intents.classify(prompt) == intent
+
+
+@pytest.mark.parametrize("prompt", [
+    # advice and open-ended questions that only mention a part
+    "Which GPU should I buy?",
+    "Should I upgrade my cpu?",
+    "Can you help me fix my computer?",
+    "how do I speed up my computer",
+    "are you using my memory against me",
+    "what cpu do I have",
+    "do you like my computer",
+    "write a poem about my gpu",
+    "explain what a cpu is",
+    # controls only count as commands at the start of the prompt
+    "what song is on?",
+    "I love this song",
+    "is the music on",
+    "why did you stop the music",
+    "can you mute yourself",
+    "quiet day today, huh",
+    # small talk and long conversations
+    "hi there",
+    "remember when we talked about my cpu temp",
+    "what did you say my gpu temperature was last time",
+    "",
+    "my cpu is hot and I was wondering whether you could tell me a little story",
+])
+def test_everything_else_goes_to_the_brain(intents, prompt):
+    assert intents.classify(prompt) is None
+
+
+def test_stat_reply_uses_the_snapshot(intents):
+    stats = {"cpu_temp": 91.4, "mem_usage": 50}
+    assert intents.handle("how hot is my cpu", stats).reply == "Your CPU is at 91°C. That's toasty!"
+    assert intents.handle("is my ram full", stats).reply == "RAM is 50% full."
+
+
+def test_controls_come_with_their_action(intents):
+    intent = intents.handle("stop the music", {})
+    assert intent.action == "music_off"
+    assert intent.reply
+
+
+def test_top_process_reply(intents):
+    def top(n, by="cpu"):
+        assert by == "mem"
+        return [("chrome", 1, 10.0, 41.6), ("code", 2, 5.0, 12.0)]
+    reply = intents.handle("what's hogging my memory", {}, top).reply
+    assert reply == "Top RAM users: chrome (42%), code (12%)."
+
+
+def test_brain_prompts_return_none(intents):
+    assert intents.handle("Which GPU should I buy?", {"gpu_usage": 10}) is None
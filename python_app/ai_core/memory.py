@@ -0,0 +1,258 @@
+import gzip
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional, Set
+
+# section titles and separators context() adds around the remembered lines
+HEADER_TOKENS = 30
+# how much of a question/answer a summary line keeps
+TOPIC_WORDS = 6
+SAID_WORDS = 14
+WORD = re.compile(r"[a-z0-9']+")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in is it its "
+    "me my no not of on or so that the this to too up was we what when where which who "
+    "why will with you your im it's i'm whats".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly what a llama-style tokenizer makes of English text (~4 chars a token)"""
+    return max(1, len(text) // 4)
+
+
+def keywords(text: str) -> Set[str]:
+    return {word for word in WORD.findall(text.lower()) if word not in STOPWORDS and len(word) > 2}
+
+
+def _clip(text: str, words: int) -> str:
+    parts = text.split()
+    return " ".join(parts[:words]) + (" ..." if len(parts) > words else "")
+
+
+def _topic(text: str) -> List[str]:
+    """The question's keywords in the order they were asked, no repeats"""
+    seen = []
+    for word in WORD.findall(text.lower()):
+        if word not in STOPWORDS and len(word) > 2 and word not in seen:
+            seen.append(word)
+    return seen
+
+
+def _gist(turn: dict) -> dict:
+    """A summary entry for one exchange: what was asked about and the gist of
+    the answer (its first sentence). Lines are made from it by _summary_line."""
+    topic = _topic(turn["user"])[:TOPIC_WORDS]
+    answer = SENTENCE_END.split(turn["pet"].strip(), 1)[0]
+    return {
+        "topic": topic or [_clip(turn["user"], TOPIC_WORDS)],
+        "said": _clip(answer, SAID_WORDS),
+        "turns": 1,
+    }
+
+
+def _same_topic(a: List[str], b: List[str]) -> bool:
+    """At least half the smaller topic's words are shared"""
+    shared = len(set(a) & set(b))
+    return shared > 0 and shared * 2 >= min(len(a), len(b))
+
+
+def _summary_line(gist: dict) -> str:
+    times = f" ({gist['turns']} times)" if gist["turns"] > 1 else ""
+    return f"- asked about {' '.join(gist['topic'])}{times}; you said: {gist['said']}"
+
+
+class ConversationMemory:
+    """What the pet remembers of its chats, in a fixed prompt budget.
+
+    The last `recent_turns` exchanges are kept word for word. Older ones move
+    to an archive: a condensed line of each (question topic plus the first
+    sentence of the answer, back-to-back turns on one topic folded into one
+    line) goes into a rolling summary, and a
+    keyword index over the archive finds the past exchanges that share the
+    most (rare) words with the new question. `context()` packs summary,
+    recalled exchanges and recent turns into `token_budget` tokens, so the
+    prompt stays the same size however long the pet has been running.
+    Saved as gzipped json, the index is rebuilt on load. Like ResponseCache
+    the file is written by a timer save_delay seconds after a change (or on
+    flush()), not once per add()."""
+
+    def __init__(self, path: Optional[str] = None, token_budget: int = 600, recent_turns: int = 6,
+                 max_turns: int = 500, summary_lines: int = 8, recall: int = 2, save_delay: float = 10.0):
+        self.path = path
+        self.save_delay = save_delay
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.summary_lines = summary_lines
+        self.recall = recall
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=recent_turns)
+        self.summary = deque(maxlen=summary_lines)
+        # archived turns by id, oldest first, and word -> ids using it
+        self.archive: Dict[int, dict] = {}
+        self.index: Dict[str, Set[int]] = {}
+        self._next_id = 0
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def add(self, user: str, reply: str):
+        """Records one exchange, the file follows a little later"""
+        with self._lock:
+            if len(self.recent) == self.recent.maxlen:
+                self._archive(self.recent[0])
+            self.recent.append({"user": user, "pet": reply, "time": time.time()})
+            self._schedule_save()
+
+    def flush(self):
+        """Writes pending changes now, e.g. on exit"""
+        with self._lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+        self._save()
+
+    def context(self, query: str) -> str:
+        """The memory block for a prompt about `query`, at most token_budget tokens"""
+        with self._lock:
+            sections = []
+            budget = self.token_budget - HEADER_TOKENS
+
+            # newest turns first when deciding what fits, printed in order
+            recent_lines = []
+            for turn in reversed(self.recent):
+                line = f"User: {turn['user']}\nYou: {turn['pet']}"
+                cost = estimate_tokens(line)
+                if cost > budget:
+                    break
+                budget -= cost
+                recent_lines.append(line)
+
+            recalled = []
+            for turn in self._search(query):
+                line = f"- User: {_clip(turn['user'], 30)} / You: {_clip(turn['pet'], 30)}"
+                cost = estimate_tokens(line)
+                if cost > budget:
+                    break
+                budget -= cost
+                recalled.append(line)
+
+            summary = []
+            for gist in reversed(self.summary):
+                line = _summary_line(gist)
+                cost = estimate_tokens(line)
+                if cost > budget:
+                    break
+                budget -= cost
+                summary.append(line)
+
+            if summary:
+                sections.append("Earlier you talked about:\n" + "\n".join(reversed(summary)))
+            if recalled:
+                sections.append("Related things from before:\n" + "\n".join(recalled))
+            if recent_lines:
+                sections.append("Recent conversation:\n" + "\n\n".join(reversed(recent_lines)))
+            return "\n\n".join(sections)
+
+    # --- called with self._lock held ---
+    def _schedule_save(self):
+        self._dirty = True
+        if self.path and self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self._save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _archive(self, turn: dict):
+        turn_id = self._next_id
+        self._next_id += 1
+        self.archive[turn_id] = turn
+        for word in keywords(turn["user"] + " " + turn["pet"]):
+            self.index.setdefault(word, set()).add(turn_id)
+        gist = _gist(turn)
+        last = self.summary[-1] if self.summary else None
+        if last and _same_topic(last["topic"], gist["topic"]):
+            # still the same subject, one line for the whole stretch
+            last["topic"] = (last["topic"] + [w for w in gist["topic"] if w not in last["topic"]])[:TOPIC_WORDS]
+            last["said"] = gist["said"]
+            last["turns"] += 1
+        else:
+            self.summary.append(gist)
+
+        while len(self.archive) > self.max_turns:
+            oldest_id = next(iter(self.archive))
+            oldest = self.archive.pop(oldest_id)
+            for word in keywords(oldest["user"] + " " + oldest["pet"]):
+                ids = self.index.get(word)
+                if ids:
+                    ids.discard(oldest_id)
+                    if not ids:
+                        del self.index[word]
+
+    def _search(self, query: str) -> List[dict]:
+        """Archived turns sharing the most informative words with query, best first"""
+        scores: Counter = Counter()
+        total = len(self.archive) or 1
+        for word in keywords(query):
+            ids = self.index.get(word)
+            if not ids:
+                continue
+            # rare words say more about a match than common ones
+            weight = math.log(1 + total / len(ids))
+            for turn_id in ids:
+                scores[turn_id] += weight
+        # ties go to the newer exchange
+        best = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return [self.archive[turn_id] for turn_id, _ in best[:self.recall]]
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for turn in saved.get("archive", [])[-self.max_turns:]:
+            self._archive(turn)
+        # the gists rebuilt above may be older than what was saved, prefer the saved ones
+        # (files from before summary entries were dicts keep the rebuilt ones)
+        saved_summary = [gist for gist in saved.get("summary", []) if isinstance(gist, dict)]
+        if saved_summary:
+            self.summary.clear()
+            self.summary.extend(saved_summary)
+        self.recent.extend(saved.get("recent", []))
+
+    def _save(self):
+        """Writes everything if anything changed since the last save. Only the
+        copy is taken under the lock, gzipping happens outside it."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                data = {
+                    # summary entries change in place when a topic continues
+                    "summary": [dict(gist) for gist in self.summary],
+                    "recent": list(self.recent),
+                    "archive": list(self.archive.values()),
+                }
+            tmp_path = self.path + ".tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ Could not save memory {self.path}: {e}")
+                with self._lock:
+                    self._dirty = True
@@ -0,0 +1,116 @@
+import os
+import time
+
+from ai_core.memory import ConversationMemory, estimate_tokens
+
+
+def chat(memory, turns):
+    for user, reply in turns:
+        memory.add(user, reply)
+
+
+def filler(n):
+    return [(f"topic{i} and thing{i}?", f"Answer number {i}. More detail {i} here.")
+            for i in range(n)]
+
+
+def test_context_stays_within_the_token_budget():
+    memory = ConversationMemory(token_budget=200, recent_turns=6)
+    long_reply = "blah " * 80
+    chat(memory, [(f"tell me about topic{i}", long_reply) for i in range(40)])
+    context = memory.context("topic3")
+    assert context
+    assert estimate_tokens(context) <= memory.token_budget
+
+
+def test_context_size_does_not_grow_with_history():
+    memory = ConversationMemory(token_budget=300)
+    chat(memory, filler(20))
+    early = estimate_tokens(memory.context("topic5"))
+    chat(memory, filler(300))
+    assert estimate_tokens(memory.context("topic5")) <= memory.token_budget
+    assert early <= memory.token_budget
+
+
+def test_newest_turns_are_kept_verbatim_when_space_runs_out():
+    memory = ConversationMemory(token_budget=60, recent_turns=4)
+    chat(memory, [("first question", "first answer " * 20), ("second", "short"), ("third", "shorter")])
+    context = memory.context("")
+    assert "User: third\nYou: shorter" in context
+    assert "User: second\nYou: short" in context
+    # the oldest recent turn doesn't fit next to the newer ones
+    assert "first question" not in context
+
+
+def test_summary_lines_cover_both_sides_of_a_turn():
+    memory = ConversationMemory(recent_turns=1)
+    chat(memory, [("how hot is my processor?", "It's at 85 degrees. Toasty! Cool it down."),
+                  ("hello", "Hi!")])
+    context = memory.context("")
+    assert "- asked about hot processor; you said: It's at 85 degrees." in context
+    assert "Toasty" not in context.split("Recent conversation:")[0]
+
+
+def test_summary_folds_back_to_back_turns_on_one_topic():
+    memory = ConversationMemory(recent_turns=1)
+    chat(memory, [("gpu temperature please", "It's 70."),
+                  ("is that gpu temperature bad", "No, it's fine."),
+                  ("write a poem", "Roses are red."),
+                  ("anything else", "Nope.")])
+    assert len(memory.summary) == 2
+    assert memory.summary[0]["turns"] == 2
+    assert memory.summary[0]["said"] == "No, it's fine."
+
+
+def test_summary_is_bounded():
+    memory = ConversationMemory(recent_turns=1, summary_lines=3)
+    chat(memory, filler(10))
+    assert len(memory.summary) == 3
+
+
+def test_recall_finds_old_exchanges_by_keyword():
+    memory = ConversationMemory(recent_turns=1, recall=1)
+    chat(memory, [("my cat is called whiskers", "Cute name!")] + filler(10))
+    context = memory.context("what is my cat called")
+    assert "Related things from before:\n- User: my cat is called whiskers / You: Cute name!" in context
+
+
+def test_archive_and_index_are_pruned():
+    memory = ConversationMemory(recent_turns=1, max_turns=5)
+    chat(memory, filler(30))
+    assert len(memory.archive) == 5
+    assert all(ids <= set(memory.archive) for ids in memory.index.values())
+    assert "topic0" not in memory.index
+
+
+def test_round_trips_through_disk(tmp_path):
+    path = str(tmp_path / "memory.json.gz")
+    memory = ConversationMemory(path, recent_turns=2)
+    chat(memory, filler(6))
+    memory.flush()
+    loaded = ConversationMemory(path, recent_turns=2)
+    assert loaded.context("topic1") == memory.context("topic1")
+    assert list(loaded.summary) == list(memory.summary)
+
+
+def test_add_saves_later_in_one_write(tmp_path):
+    path = str(tmp_path / "memory.json.gz")
+    memory = ConversationMemory(path, save_delay=60)
+    chat(memory, filler(3))
+    assert not os.path.exists(path)
+    memory.flush()
+    assert len(ConversationMemory(path).recent) == 3
+    # nothing new, nothing to write
+    os.remove(path)
+    memory.flush()
+    assert not os.path.exists(path)
+
+
+def test_timer_writes_without_a_flush(tmp_path):
+    path = str(tmp_path / "memory.json.gz")
+    memory = ConversationMemory(path, save_delay=0.01)
+    memory.add("hello", "hi")
+    deadline = time.monotonic() + 5
+    while not os.path.exists(path):
+        assert time.monotonic() < deadline, "never saved"
+        time.sleep(0.01)
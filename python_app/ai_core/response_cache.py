@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+# how coarse the stats are in a key, e.g. 25% usage steps and 10°C steps
+STAT_BUCKETS = {
+    "cpu_usage": 25,
+    "gpu_usage": 25,
+    "mem_usage": 25,
+    "cpu_temp": 10,
+    "gpu_temp": 10,
+}
+
+
+def bucket_stats(stats: Any) -> str:
+    """Quantizes a stats dict/Snapshot so nearby readings share a cache key"""
+    buckets = []
+    for name, step in STAT_BUCKETS.items():
+        value = stats.get(name) if stats else None
+        buckets.append(str(int((value or 0) // step)))
+    return ",".join(buckets)
+
+
+class ResponseCache:
+    """Remembers AI lines for mood/idle prompts so the same question about
+    the same (bucketed) system state isn't sent to the model again and again.
+    Each key keeps up to `variants` answers: until it has that many every
+    request is a miss (so a fresh answer gets generated), after that hits
+    rotate through them. Answers expire after ttl seconds, the least
+    recently used keys go beyond max_keys, and everything is saved as json.
+    Saving is batched: add() only marks the cache dirty and a timer thread
+    writes the file save_delay seconds later, flush() writes it right away."""
+
+    def __init__(self, path: Optional[str], ttl: float = 3600.0, max_keys: int = 128, variants: int = 3,
+                 save_delay: float = 10.0):
+        self.path = path
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.variants = variants
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        # key -> [[text, created (unix time)], ...], least recently used key first
+        self._entries: "OrderedDict[str, List[list]]" = OrderedDict()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        # one writer at a time, the timer and flush() can race
+        self._save_lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def key(template: str, mood: str, stats: Any, pet_name: str) -> str:
+        return "|".join((template, str(mood), bucket_stats(stats), pet_name))
+
+    def get(self, key: str) -> Optional[str]:
+        """A cached answer once the key has all its variants, otherwise None"""
+        with self._lock:
+            answers = self._fresh(key)
+            if len(answers) < self.variants:
+                return None
+            self._entries.move_to_end(key)
+            # rotate so the next hit says something else
+            answers.append(answers.pop(0))
+            return answers[-1][0]
+
+    def add(self, key: str, text: str):
+        with self._lock:
+            answers = self._fresh(key)
+            # repeats are kept too, a model that always says the same thing should still get cached
+            answers.append([text, time.time()])
+            del answers[:-self.variants]
+            self._entries[key] = answers
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+            self._schedule_save()
+
+    def flush(self):
+        """Writes pending changes now instead of waiting for the timer, e.g. on exit"""
+        with self._lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+        self._save()
+
+    # --- called with self._lock held ---
+    def _schedule_save(self):
+        self._dirty = True
+        if self.path and self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self._save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _fresh(self, key: str) -> List[list]:
+        oldest = time.time() - self.ttl
+        answers = [answer for answer in self._entries.get(key, []) if answer[1] >= oldest]
+        if key in self._entries:
+            if answers:
+                self._entries[key] = answers
+            else:
+                del self._entries[key]
+        return answers
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        oldest = time.time() - self.ttl
+        for key, answers in saved.get("entries", {}).items():
+            fresh = [answer for answer in answers if answer[1] >= oldest]
+            if fresh:
+                self._entries[key] = fresh[-self.variants:]
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def _save(self):
+        """Writes the entries if anything changed since the last save. Only the
+        copy is taken under the lock, get()/add() don't wait on the disk."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                entries = {key: list(answers) for key, answers in self._entries.items()}
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"entries": entries}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ Could not save AI response cache {self.path}: {e}")
+                # try again with the next save
+                with self._lock:
+                    self._dirty = True
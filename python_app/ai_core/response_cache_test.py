@@ -0,0 +1,124 @@
+import json
+import os
+import time
+
+import pytest
+
+from ai_core import response_cache
+from ai_core.response_cache import ResponseCache, bucket_stats
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+def filled(cache, key, *texts):
+    for text in texts:
+        cache.add(key, text)
+
+
+def test_nearby_readings_share_a_bucket():
+    calm = {"cpu_usage": 10, "gpu_usage": 5, "mem_usage": 40, "cpu_temp": 51, "gpu_temp": 45}
+    assert bucket_stats(calm) == bucket_stats({**calm, "cpu_usage": 24.9, "cpu_temp": 59})
+    assert bucket_stats(calm) != bucket_stats({**calm, "cpu_usage": 25})
+    assert bucket_stats(calm) != bucket_stats({**calm, "cpu_temp": 60})
+    # missing stats count as 0
+    assert bucket_stats(None) == bucket_stats({}) == "0,0,0,0,0"
+
+
+def test_key_covers_template_mood_stats_and_pet():
+    stats = {"cpu_usage": 50}
+    key = ResponseCache.key("mood", "warm", stats, "Clippy")
+    assert key == ResponseCache.key("mood", "warm", {"cpu_usage": 60}, "Clippy")
+    assert key != ResponseCache.key("idle", "warm", stats, "Clippy")
+    assert key != ResponseCache.key("mood", "happy", stats, "Clippy")
+    assert key != ResponseCache.key("mood", "warm", stats, "Furry")
+
+
+def test_misses_until_every_variant_exists(clock):
+    cache = ResponseCache(None, variants=3)
+    filled(cache, "k", "one", "two")
+    assert cache.get("k") is None
+    cache.add("k", "three")
+    assert cache.get("k") is not None
+
+
+def test_hits_rotate_through_the_variants(clock):
+    cache = ResponseCache(None, variants=3)
+    filled(cache, "k", "one", "two", "three")
+    assert [cache.get("k") for _ in range(4)] == ["one", "two", "three", "one"]
+
+
+def test_only_the_newest_variants_are_kept(clock):
+    cache = ResponseCache(None, variants=2)
+    filled(cache, "k", "one", "two", "three")
+    assert {cache.get("k"), cache.get("k")} == {"two", "three"}
+
+
+def test_answers_expire_after_ttl(clock):
+    cache = ResponseCache(None, ttl=60, variants=2)
+    cache.add("k", "old")
+    clock.now += 30
+    cache.add("k", "new")
+    assert cache.get("k")
+    clock.now += 31
+    # "old" is gone, so the key is back to missing a variant
+    assert cache.get("k") is None
+    clock.now += 30
+    cache.get("k")
+    # with nothing fresh left the key itself is dropped
+    assert "k" not in cache._entries
+
+
+def test_least_recently_used_keys_go(clock):
+    cache = ResponseCache(None, max_keys=2, variants=1)
+    cache.add("a", "A")
+    cache.add("b", "B")
+    cache.get("a")
+    cache.add("c", "C")
+    assert list(cache._entries) == ["a", "c"]
+
+
+def test_add_saves_later_in_one_write(tmp_path, clock):
+    path = str(tmp_path / "answers.json")
+    cache = ResponseCache(path, variants=1, save_delay=60)
+    filled(cache, "a", "A")
+    filled(cache, "b", "B")
+    assert not os.path.exists(path)
+    cache.flush()
+    with open(path, encoding="utf-8") as f:
+        assert set(json.load(f)["entries"]) == {"a", "b"}
+
+
+def test_timer_writes_without_a_flush(tmp_path):
+    path = str(tmp_path / "answers.json")
+    cache = ResponseCache(path, variants=1, save_delay=0.01)
+    cache.add("a", "A")
+    deadline = time.monotonic() + 5
+    while not os.path.exists(path):
+        assert time.monotonic() < deadline, "never saved"
+        time.sleep(0.01)
+    assert not cache._dirty
+
+
+def test_round_trips_through_disk(tmp_path, clock):
+    path = str(tmp_path / "answers.json")
+    cache = ResponseCache(path, variants=2)
+    filled(cache, "k", "one", "two")
+    cache.flush()
+    loaded = ResponseCache(path, variants=2)
+    assert loaded._entries == cache._entries
+    # too old by the time it's loaded again
+    clock.now += 3601
+    assert ResponseCache(path, variants=2)._entries == {}
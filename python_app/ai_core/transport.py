@@ -0,0 +1,120 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class BrainUnavailable(Exception):
+    """The backend can't be reached right now, use the static fallback text"""
+
+
+class CircuitBreaker:
+    """Closed until failure_threshold failures in a row, then open for
+    cooldown seconds and every request is refused. After the cooldown it's
+    half-open: exactly one trial request goes through while the rest are
+    still refused. The trial succeeding closes it, failing opens it again
+    for another cooldown. A trial that ends without either (cancelled,
+    a bug) hands the slot back with release(). Only the caller that
+    allow() picked as the trial may report as one, a request that started
+    while closed never touches the trial slot."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return self.CLOSED
+        if self.trial_running or time.monotonic() >= self.open_until:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> Tuple[bool, bool]:
+        """(allowed, trial), decided together under the lock. In half-open only
+        the first caller gets (True, True), it has to report back with
+        success(), failure(trial=True) or release()."""
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True, False
+            if state == self.OPEN or self.trial_running:
+                return False, False
+            self.trial_running = True
+            return True, True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.open_until = 0.0
+            self.trial_running = False
+
+    def failure(self, trial: bool = False):
+        with self._lock:
+            self.failures += 1
+            # a late failure from the closed days doesn't end someone else's trial
+            if trial:
+                self.trial_running = False
+            if self.failures >= self.failure_threshold:
+                self.open_until = time.monotonic() + self.cooldown
+
+    def release(self):
+        with self._lock:
+            self.trial_running = False
+
+
+class BrainTransport:
+    """HTTP client for the AI backend.
+    Keeps connections alive in a pooled Session, caps how many requests are
+    in flight at once, uses separate connect/read timeouts, and stops
+    calling a backend that keeps failing for a while (CircuitBreaker)."""
+
+    def __init__(self, url: str, connect_timeout: float = 2.0, read_timeout: float = 15.0,
+                 max_in_flight: int = 2, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+
+    @contextmanager
+    def post(self, payload: Dict[str, Any], stream: bool = False) -> Iterator[requests.Response]:
+        """POSTs payload as json and yields the response. Connection errors and
+        timeouts (also while reading a stream) come out as BrainUnavailable."""
+        allowed, trial = self.breaker.allow()
+        if not allowed:
+            raise BrainUnavailable(f"{self.url} failed {self.breaker.failures} times, cooling down")
+        # waiting longer than a read would take means the backend is swamped anyway
+        if not self.slots.acquire(timeout=self.timeout[1]):
+            if trial:
+                self.breaker.release()
+            raise BrainUnavailable("too many requests in flight")
+        try:
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout, stream=stream)
+                with response:
+                    yield response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.breaker.failure(trial)
+                raise BrainUnavailable(f"I can't reach my brain! ({e.__class__.__name__})") from e
+            self.breaker.success()
+        finally:
+            # a half-open trial that was cancelled or raised something else
+            # proved nothing, let the next request try instead
+            if trial:
+                self.breaker.release()
+            self.slots.release()
@@ -0,0 +1,247 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ai_core import transport
+from ai_core.transport import BrainTransport, BrainUnavailable, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(transport.time, "monotonic", clock)
+    return clock
+
+
+def tripped(clock, threshold=2, cooldown=10.0):
+    breaker = CircuitBreaker(failure_threshold=threshold, cooldown=cooldown)
+    for _ in range(threshold):
+        assert breaker.allow() == (True, False)
+        breaker.failure()
+    return breaker
+
+
+def allowed(breaker):
+    return breaker.allow()[0]
+
+
+def test_breaker_stays_closed_below_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.failure()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() == breaker.allow() == (True, False)
+
+
+def test_breaker_success_resets_the_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_at_threshold_and_refuses(clock):
+    breaker = tripped(clock)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 9.9
+    assert not allowed(breaker)
+
+
+def test_breaker_half_open_lets_exactly_one_trial_through(clock):
+    breaker = tripped(clock)
+    clock.now += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() == (True, True)
+    assert breaker.allow() == (False, False)
+    assert breaker.allow() == (False, False)
+
+
+def test_breaker_trial_success_closes(clock):
+    breaker = tripped(clock)
+    clock.now += 10
+    assert allowed(breaker)
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() == breaker.allow() == (True, False)
+
+
+def test_breaker_trial_failure_reopens_for_a_full_cooldown(clock):
+    breaker = tripped(clock)
+    clock.now += 10
+    assert allowed(breaker)
+    breaker.failure(trial=True)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 9.9
+    assert not allowed(breaker)
+    clock.now += 0.1
+    assert breaker.allow() == (True, True)
+
+
+def test_breaker_released_trial_lets_the_next_one_try(clock):
+    breaker = tripped(clock)
+    clock.now += 10
+    assert allowed(breaker)
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert allowed(breaker)
+    assert not allowed(breaker)
+
+
+def test_breaker_late_closed_failure_keeps_the_trial(clock):
+    breaker = tripped(clock)
+    clock.now += 10
+    assert breaker.allow() == (True, True)
+    # a request from before the trip fails while the trial is out
+    breaker.failure()
+    clock.now += 10
+    assert not allowed(breaker)
+    breaker.failure(trial=True)
+    clock.now += 10
+    assert breaker.allow() == (True, True)
+
+
+def test_breaker_one_trial_across_threads(clock):
+    breaker = tripped(clock)
+    clock.now += 10
+    results = []
+    start = threading.Barrier(8)
+
+    def ask():
+        start.wait()
+        results.append(breaker.allow())
+
+    threads = [threading.Thread(target=ask) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count((True, True)) == 1
+    assert results.count((False, False)) == 7
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def test_transport_trips_then_recovers_through_one_trial(clock, free_port):
+    url = f"http://127.0.0.1:{free_port}/"
+    client = BrainTransport(url, connect_timeout=0.5, failure_threshold=2, cooldown=10)
+    for _ in range(2):
+        with pytest.raises(BrainUnavailable, match="reach"):
+            with client.post({}):
+                pass
+    # open: refused without touching the network
+    with pytest.raises(BrainUnavailable, match="cooling down"):
+        with client.post({}):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", free_port), OkHandler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    try:
+        clock.now += 10
+        with client.post({}) as response:
+            assert response.status_code == 200
+            # the trial is in flight, everyone else still waits
+            with pytest.raises(BrainUnavailable, match="cooling down"):
+                with client.post({}):
+                    pass
+        assert client.breaker.state == CircuitBreaker.CLOSED
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_transport_cancelled_trial_is_released(clock, free_port):
+    client = BrainTransport(f"http://127.0.0.1:{free_port}/", connect_timeout=0.5,
+                            failure_threshold=1, cooldown=10)
+    with pytest.raises(BrainUnavailable):
+        with client.post({}):
+            pass
+    clock.now += 10
+
+    server = ThreadingHTTPServer(("127.0.0.1", free_port), OkHandler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    try:
+        with pytest.raises(KeyError):
+            with client.post({}):
+                raise KeyError("caller gave up")
+        assert client.breaker.state == CircuitBreaker.HALF_OPEN
+        assert not client.breaker.trial_running
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_transport_closed_request_leaves_a_later_trial_alone(clock, free_port):
+    server = ThreadingHTTPServer(("127.0.0.1", free_port), OkHandler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    client = BrainTransport(f"http://127.0.0.1:{free_port}/", failure_threshold=1, cooldown=10)
+    breaker = client.breaker
+
+    def racing_allow():
+        del breaker.allow
+        result = breaker.allow()
+        # right after this request got in, another one trips the breaker
+        # and a cooldown later a third one takes the half-open trial
+        breaker.failure()
+        clock.now += 10
+        assert breaker.allow() == (True, True)
+        return result
+
+    breaker.allow = racing_allow
+    try:
+        with pytest.raises(KeyError):
+            with client.post({}):
+                raise KeyError("caller gave up")
+        # the closed-path request ended without handing the trial back
+        assert breaker.trial_running
+        with pytest.raises(BrainUnavailable, match="cooling down"):
+            with client.post({}):
+                pass
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_transport_caps_requests_in_flight(free_port):
+    server = ThreadingHTTPServer(("127.0.0.1", free_port), OkHandler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    client = BrainTransport(f"http://127.0.0.1:{free_port}/", read_timeout=0.1, max_in_flight=1)
+    try:
+        with client.post({}):
+            with pytest.raises(BrainUnavailable, match="in flight"):
+                with client.post({}):
+                    pass
+        # the slot is free again and the breaker didn't count the refusal
+        with client.post({}) as response:
+            assert response.status_code == 200
+        assert client.breaker.failures == 0
+    finally:
+        server.shutdown()
+        server.server_close()
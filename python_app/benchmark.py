@@ -0,0 +1,229 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import timeit
+import tracemalloc
+
+import headless
+# the benchmark always runs headless, it has to happen before pygame starts
+headless.enable()
+
+import pygame
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+START_DIR = os.getcwd()
+# main.py loads config.json and the pet assets relative to here
+os.chdir(BASE_DIR)
+sys.path.insert(0, BASE_DIR)
+
+from main import OverlayApp, load_config
+from profiler import PROFILER
+from rust_core import shared
+
+# One cycle of scripted input, repeated for as many frames as asked:
+# (frame in the cycle, what happens). Positions are looked up when the
+# event fires because the pet (and the menus opened next to it) move.
+PROMPTS = ["how hot is my cpu", "hi there"]
+CYCLE = 240
+
+
+def _click(pos, button=1):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=button)
+
+
+def _key(key, char=""):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, unicode=char, mod=0)
+
+
+def _menu_button(label):
+    def press(app):
+        if not app.menu:
+            return []
+        return [_click(app.menu.buttons[label].center)]
+    return press
+
+
+def _type(text):
+    def typed(app):
+        # the prompt box keeps the last prompt, clear it first like a user would
+        old = len(app.prompt_menu.prompt_text) if app.prompt_menu else 0
+        clear = [_key(pygame.K_BACKSPACE, "\b")] * old
+        return clear + [_key(pygame.K_a, char) for char in text] + [_key(pygame.K_RETURN, "\r")]
+    return typed
+
+
+SCRIPT = {
+    0: lambda app: [_click(app.pet.rect.center, button=3)],
+    20: _menu_button("CPU Stats"),
+    60: _menu_button("GPU Stats"),
+    100: _menu_button("Memory"),
+    140: _menu_button("Ask Me"),
+    # a stat question the intent handler answers, then one for the (scripted) brain
+    150: _type(PROMPTS[0]),
+    180: _type(PROMPTS[1]),
+    230: lambda app: [_key(pygame.K_ESCAPE, "\x1b")],
+}
+
+
+def scripted_events(app, frame):
+    action = SCRIPT.get(frame % CYCLE)
+    return action(app) if action else []
+
+
+def percentiles(values, points=(50, 95, 99)):
+    """Nearest-rank percentiles of a list of numbers"""
+    ordered = sorted(values)
+    if not ordered:
+        return {p: 0.0 for p in points}
+    return {p: ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))] for p in points}
+
+
+def bench_frames(app, frames, dt):
+    """Per-frame wall time (ms) of app.step with the scripted input"""
+    times = []
+    for frame in range(frames):
+        events = scripted_events(app, frame)
+        start = time.perf_counter()
+        app.step(dt, events)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def bench_allocations(app, frames, dt):
+    """Bytes allocated per frame (peak above the frame's start) and the net growth.
+    tracemalloc slows everything down, so this is a separate pass from the timing."""
+    peaks = []
+    tracemalloc.start()
+    first = tracemalloc.get_traced_memory()[0]
+    for frame in range(frames):
+        events = scripted_events(app, frame)
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        app.step(dt, events)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    growth = tracemalloc.get_traced_memory()[0] - first
+    tracemalloc.stop()
+    return peaks, growth
+
+
+def bench_cpu_getters():
+    """Microseconds per call for every rust_core.CPU reader"""
+    cpu = shared()
+    cpu.top_processes(1)  # starts process scanning so the call below isn't a no-op
+    calls = {
+        "get_cpu_usage": cpu.get_cpu_usage,
+        "get_memory_usage": cpu.get_memory_usage,
+        "get_temperature": cpu.get_temperature,
+        "get_disk_usage": cpu.get_disk_usage,
+        "get_gpu_usage": cpu.get_gpu_usage,
+        "get_gpu_temp": cpu.get_gpu_temp,
+        "get_gpu_power": cpu.get_gpu_power,
+        "snapshot": cpu.snapshot,
+        "snapshot(smoothed)": lambda: cpu.snapshot(smoothed=True),
+        "history(60s)": lambda: cpu.history("cpu_usage", 60),
+        "history_stats(60s)": lambda: cpu.history_stats("cpu_usage", 60),
+        "top_processes(5)": lambda: cpu.top_processes(5),
+    }
+    results = {}
+    for name, call in calls.items():
+        timer = timeit.Timer(call)
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat=5, number=number)) / number
+        results[name] = best * 1e6
+    return results
+
+
+def bench_gif_loading(pet, repeats=5):
+    """Pet.load_gif_frames for every bundled pet, (first call ms, median of the rest ms).
+    The first call may have to build the sprite cache, the rest read it."""
+    results = {}
+    for gif in sorted(glob.glob(os.path.join("assets", "pets", "*", "*.gif"))):
+        times = []
+        for _ in range(repeats + 1):
+            start = time.perf_counter()
+            pet.load_gif_frames(gif)
+            times.append((time.perf_counter() - start) * 1000)
+        warm = sorted(times[1:])
+        results[os.path.basename(os.path.dirname(gif))] = (times[0], warm[len(warm) // 2])
+    return results
+
+
+def bench_phases(app, frames, dt):
+    """One more pass with the profiler on: where each frame's time goes"""
+    PROFILER.history = frames
+    PROFILER.reset()
+    PROFILER.enabled = True
+    try:
+        bench_frames(app, frames, dt)
+    finally:
+        PROFILER.enabled = False
+    return PROFILER.summary()
+
+
+def report(title, values, unit):
+    p = percentiles(values)
+    print(f"{title:<22} p50 {p[50]:9.3f}  p95 {p[95]:9.3f}  p99 {p[99]:9.3f}  max {max(values):9.3f} {unit}")
+    return {"p50": p[50], "p95": p[95], "p99": p[99], "max": max(values)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless frame-time benchmark for the overlay")
+    parser.add_argument("--frames", type=int, default=CYCLE * 3, help="frames per pass")
+    parser.add_argument("--warmup", type=int, default=60, help="frames run before measuring")
+    parser.add_argument("--fps", type=float, default=60, help="simulated frame rate (dt fed to step)")
+    parser.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--no-micro", action="store_true", help="skip the getter and GIF benchmarks")
+    parser.add_argument("--phases", action="store_true", help="profile the frame phases in an extra pass")
+    parser.add_argument("--trace", help="with --phases, write that pass as a Chrome trace to this file")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    dt = 1.0 / args.fps
+    app = OverlayApp(load_config())
+    results = {"frames": args.frames}
+    try:
+        bench_frames(app, args.warmup, dt)
+        print(f"== {args.frames} frames, scripted input every {CYCLE} frames ==")
+        results["frame_ms"] = report("frame time", bench_frames(app, args.frames, dt), "ms")
+
+        if not args.no_alloc:
+            peaks, growth = bench_allocations(app, args.frames, dt)
+            results["frame_alloc_kb"] = report("allocated per frame", [b / 1024 for b in peaks], "KiB")
+            results["alloc_growth_kb"] = growth / 1024
+            print(f"{'net growth':<22} {growth / 1024:9.1f} KiB over the pass")
+
+        if args.phases:
+            print("== profiler, avg / max ms (wait = wall - thread CPU) ==")
+            phases = bench_phases(app, args.frames, dt)
+            results["phases"] = {name: list(stats) for name, stats in phases.items()}
+            for name, stats in sorted(phases.items()):
+                wait = f"  wait {max(0.0, stats[0] - stats[2]):.3f}" if len(stats) == 3 else ""
+                print(f"{name:<22} {stats[0]:9.3f} / {stats[1]:9.3f}{wait}")
+            if args.trace:
+                PROFILER.dump_trace(os.path.join(START_DIR, args.trace))
+
+        if not args.no_micro:
+            print("== rust_core.CPU, us per call ==")
+            results["cpu_getters_us"] = bench_cpu_getters()
+            for name, us in results["cpu_getters_us"].items():
+                print(f"{name:<22} {us:9.3f}")
+
+            print("== Pet.load_gif_frames, ms (first / warm median) ==")
+            gifs = bench_gif_loading(app.pet)
+            results["load_gif_frames_ms"] = {name: {"first": first, "warm": warm} for name, (first, warm) in gifs.items()}
+            for name, (first, warm) in gifs.items():
+                print(f"{name:<22} {first:9.2f} / {warm:9.2f}")
+    finally:
+        app.close()
+        pygame.quit()
+
+    if args.json:
+        with open(os.path.join(START_DIR, args.json), "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
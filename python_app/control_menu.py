@@ -1,7 +1,7 @@
 import pygame
 import json
 import os
-from rust_core import CPU
+from rust_core import shared
 import math
 
 try:
@@ -9,6 +9,12 @@ try:
 except ImportError:
     def save_config(cfg): pass
 
+# Sparkline window under each dashboard, and which metric it tracks
+HISTORY_SECONDS = 60
+HISTORY_METRIC = {"cpu stats": "cpu_usage", "gpu stats": "gpu_usage", "memory": "mem_usage"}
+# How far (in %) the current value must be from the window average to count as a trend
+TREND_DEADBAND = 5
+
 class ControlMenu:
     def __init__(self, x, y, pet, config):
         self.width, self.height = 400, 350
@@ -18,11 +24,14 @@ class ControlMenu:
         self.font = pygame.font.SysFont("Consolas", 18)
         self.header_font = pygame.font.SysFont("Consolas", 22, bold=True)
         self.buttons = self.create_buttons()
-        self.cpu_core = CPU()
+        # Attaches to the sampler main.py already started, so opening is free
+        self.cpu_core = shared()
         
         self.active_overlay = False
         self.overlay_rect = None
         self.overlay_type = None
+        # the sparkline as last built: metric, area, when, points, summary, trend
+        self.history_view = None
     
     
     def close(self):
@@ -71,10 +80,12 @@ class ControlMenu:
                     else:
                         width = 250
                     
-                    self.overlay_rect = pygame.Rect(self.rect.x + 400, self.rect.y, width, 250)
+                    self.overlay_rect = pygame.Rect(self.rect.x + 400, self.rect.y, width, 320)
                 return None
 
-    def draw(self, screen):
+    def draw(self, screen, snap=None):
+        """snap is the snapshot the frame already took (main.py), so the
+        dashboards show the same smoothed numbers the mood was picked from"""
         # Draw the main command menu
         pygame.draw.rect(screen, (40, 40, 50, 240), self.rect, border_radius=15)
         pygame.draw.rect(screen, (0, 255, 255), self.rect, 2, border_radius=15)
@@ -86,18 +97,20 @@ class ControlMenu:
             screen.blit(text_surf, (rect.x + 15, rect.y + 10))
             
         if self.active_overlay and self.overlay_rect:
-            self.draw_overlay(screen)
+            self.draw_overlay(screen, snap)
         
-    def draw_overlay(self, screen):
+    def draw_overlay(self, screen, snap=None):
         # Semi-transparent dashboard background
         pygame.draw.rect(screen, (30, 30, 40, 240), self.overlay_rect, border_radius=15)
         pygame.draw.rect(screen, (0, 255, 255, 120), self.overlay_rect, 2, border_radius=15)
         
         w = self.overlay_rect.width
+        if snap is None:
+            snap = self.cpu_core.snapshot(smoothed=True)
         
         if self.overlay_type == "cpu stats":
-            usage = self.cpu_core.get_cpu_usage()
-            temp = self.cpu_core.get_temperature()
+            usage = snap.cpu_usage
+            temp = snap.cpu_temp
             
             # Two-column layout
             c1 = (self.overlay_rect.x + w // 4, self.overlay_rect.centery + 20)
@@ -105,11 +118,12 @@ class ControlMenu:
             
             self.draw_gauge(screen, usage, usage, c1, "CPU LOAD", 60, "%")
             self.draw_gauge(screen, temp, temp, c2, "CPU TEMP", 60, "°C")
+            self.draw_history(screen, HISTORY_METRIC["cpu stats"], snap.timestamp)
 
         elif self.overlay_type == "gpu stats":
-            usage = self.cpu_core.get_gpu_usage()
-            temp = self.cpu_core.get_gpu_temp()
-            pwr = self.cpu_core.get_gpu_power()
+            usage = snap.gpu_usage
+            temp = snap.gpu_temp
+            pwr = snap.gpu_power
             
             # Three-column layout
             c1 = (self.overlay_rect.x + w // 6, self.overlay_rect.centery + 20)
@@ -119,10 +133,67 @@ class ControlMenu:
             self.draw_gauge(screen, usage, usage, c1, "LOAD", 50, "%")
             self.draw_gauge(screen, temp, temp, c2, "TEMP", 50, "°C")
             self.draw_gauge(screen, (pwr/300.0)*100, pwr, c3, "POWER", 50, "W")
+            self.draw_history(screen, HISTORY_METRIC["gpu stats"], snap.timestamp)
             
         elif self.overlay_type == "memory":
-            val = self.cpu_core.get_memory_usage()
+            val = snap.mem_usage
             self.draw_gauge(screen, val, val, self.overlay_rect.center, "RAM USED", 80, "%")
+            self.draw_history(screen, HISTORY_METRIC["memory"], snap.timestamp)
+
+    def draw_history(self, screen, metric, timestamp):
+        """Sparkline of the last minute of a metric plus a trend arrow.
+        The samples and the min/max/avg/p95 all come from rust_core's ring buffer,
+        which only changes once per sampling interval, so the points and the text
+        are rebuilt once per interval instead of every frame."""
+        area = pygame.Rect(self.overlay_rect.x + 20, self.overlay_rect.bottom - 45,
+                           self.overlay_rect.width - 70, 30)
+        view = self.history_view
+        if (view is None or view["metric"] != metric or view["area"] != area
+                or timestamp - view["at"] >= view["interval"] or timestamp < view["at"]):
+            view = self.history_view = self.build_history(metric, area, timestamp)
+
+        pygame.draw.rect(screen, (45, 45, 55), area, border_radius=6)
+        if view["points"]:
+            pygame.draw.lines(screen, (0, 255, 255), False, view["points"], 2)
+        if view["summary"] is None:
+            return
+        screen.blit(view["summary"], (area.x, area.y - view["summary"].get_height() - 2))
+        
+        # Trend arrow: newest raw value against the raw window average
+        ax, ay = area.right + 25, area.centery
+        if view["trend"] > 0:
+            pygame.draw.polygon(screen, (255, 50, 50), [(ax, ay - 12), (ax - 10, ay + 8), (ax + 10, ay + 8)])
+        elif view["trend"] < 0:
+            pygame.draw.polygon(screen, (0, 255, 150), [(ax, ay + 12), (ax - 10, ay - 8), (ax + 10, ay - 8)])
+        else:
+            pygame.draw.line(screen, (200, 200, 200), (ax - 10, ay), (ax + 10, ay), 3)
+
+    def build_history(self, metric, area, timestamp):
+        series = self.cpu_core.history(metric, HISTORY_SECONDS)
+        values = memoryview(series).tolist()
+        points = []
+        if len(values) >= 2:
+            step = area.width / (len(values) - 1)
+            points = [
+                (area.x + i * step, area.bottom - (max(0, min(100, v)) / 100.0) * area.height)
+                for i, v in enumerate(values)
+            ]
+
+        view = {"metric": metric, "area": area.copy(), "at": timestamp,
+                # a disabled metric has no interval, look again next frame
+                "interval": series.interval or 0.0,
+                "points": points, "summary": None, "trend": 0}
+        stats = self.cpu_core.history_stats(metric, HISTORY_SECONDS)
+        if not stats or not values:
+            return view
+        low, high, avg, p95 = stats
+        view["summary"] = self.font.render(f"avg {int(avg)}  p95 {int(p95)}  max {int(high)}", True, (150, 150, 160))
+        latest = values[-1]
+        if latest > avg + TREND_DEADBAND:
+            view["trend"] = 1
+        elif latest < avg - TREND_DEADBAND:
+            view["trend"] = -1
+        return view
 
     def draw_gauge(self, screen, percent, display_val, center, label, radius, unit):
         percent = max(0, min(100, percent))
@@ -0,0 +1,68 @@
+import pygame
+
+
+class DirtyRectRenderer:
+    """Only clears and pushes the parts of the overlay that changed.
+    Everything drawn in a frame gets mark()-ed, present() then updates the
+    union of this frame's and last frame's rects (so moved things get erased).
+    Falls back to a full flip when too much of the screen is dirty."""
+
+    def __init__(self, screen, clear_color=(0, 0, 0), max_rects=16, max_dirty_ratio=0.35):
+        self.screen = screen
+        self.clear_color = clear_color
+        self.max_rects = max_rects
+        # past this share of the screen a single flip is cheaper than many updates
+        self.max_dirty_area = int(screen.get_width() * screen.get_height() * max_dirty_ratio)
+
+        self.previous = []
+        self.current = []
+        self.full_redraw = True
+
+    def begin_frame(self):
+        """Erase whatever was drawn last frame"""
+        if self.full_redraw:
+            self.screen.fill(self.clear_color)
+        else:
+            for rect in self.previous:
+                self.screen.fill(self.clear_color, rect)
+        self.current = []
+
+    def mark(self, rect):
+        """Register a region drawn this frame"""
+        if rect:
+            self.current.append(pygame.Rect(rect).clip(self.screen.get_rect()))
+
+    def invalidate(self):
+        """Force the next frame to clear and flip the whole screen"""
+        self.full_redraw = True
+
+    def present(self):
+        rects = self._merge(self.previous + self.current)
+
+        if self.full_redraw or len(rects) > self.max_rects or self._area(rects) > self.max_dirty_area:
+            pygame.display.flip()
+            # from here on erasing last frame's rects is enough
+            self.full_redraw = False
+        elif rects:
+            pygame.display.update(rects)
+
+        self.previous = self.current
+
+    @staticmethod
+    def _merge(rects):
+        """Fold overlapping rects together so no pixel is pushed twice"""
+        merged = []
+        for rect in rects:
+            if not rect.width or not rect.height:
+                continue
+            rect = rect.copy()
+            i = rect.collidelist(merged)
+            while i != -1:
+                rect.union_ip(merged.pop(i))
+                i = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+    @staticmethod
+    def _area(rects):
+        return sum(r.width * r.height for r in rects)
@@ -0,0 +1,102 @@
+import pygame
+import pytest
+
+from dirty_rects import DirtyRectRenderer
+
+
+@pytest.fixture
+def pushed(monkeypatch):
+    """Records what gets sent to the display: "flip" or the list of rects"""
+    calls = []
+    monkeypatch.setattr(pygame.display, "flip", lambda: calls.append("flip"))
+    monkeypatch.setattr(pygame.display, "update", lambda rects: calls.append(list(rects)))
+    return calls
+
+
+def renderer():
+    # 100x100, so 35% is 3500 pixels
+    return DirtyRectRenderer(pygame.Surface((100, 100)))
+
+
+def frame(dirty, rects):
+    dirty.begin_frame()
+    for rect in rects:
+        dirty.mark(rect)
+    dirty.present()
+
+
+def test_first_frame_is_a_full_flip(pushed):
+    frame(renderer(), [(0, 0, 10, 10)])
+    assert pushed == ["flip"]
+
+
+def test_small_changes_update_old_and_new_rects(pushed):
+    dirty = renderer()
+    frame(dirty, [(0, 0, 10, 10)])
+    frame(dirty, [(50, 50, 10, 10)])
+    assert pushed[1] == [pygame.Rect(0, 0, 10, 10), pygame.Rect(50, 50, 10, 10)]
+
+
+def test_overlapping_rects_are_merged(pushed):
+    dirty = renderer()
+    frame(dirty, [])
+    frame(dirty, [(0, 0, 10, 10), (5, 5, 10, 10), (40, 40, 5, 5)])
+    assert pushed[1] == [pygame.Rect(0, 0, 15, 15), pygame.Rect(40, 40, 5, 5)]
+
+
+def test_marks_are_clipped_and_empty_ones_dropped(pushed):
+    dirty = renderer()
+    frame(dirty, [])
+    frame(dirty, [(90, 90, 30, 30), (20, 20, 0, 5), None])
+    assert pushed[1] == [pygame.Rect(90, 90, 10, 10)]
+
+
+def test_more_than_max_rects_flips(pushed):
+    dirty = renderer()
+    frame(dirty, [])
+    frame(dirty, [(i * 6, 0, 2, 2) for i in range(16)])
+    assert len(pushed[1]) == 16
+    frame(dirty, [(i * 6, 50, 2, 2) for i in range(17)])
+    assert pushed[2] == "flip"
+
+
+def test_large_dirty_area_flips(pushed):
+    dirty = renderer()
+    frame(dirty, [])
+    # 50x70 is exactly 35%, still worth updating
+    frame(dirty, [(0, 0, 50, 70)])
+    assert pushed[1] == [pygame.Rect(0, 0, 50, 70)]
+    frame(dirty, [])
+    frame(dirty, [(0, 0, 50, 71)])
+    assert pushed[3] == "flip"
+
+
+def test_last_frames_rects_count_towards_the_area(pushed):
+    dirty = renderer()
+    frame(dirty, [])
+    frame(dirty, [(0, 0, 50, 40)])
+    # 2000 + 2000 pixels together are past 35%
+    frame(dirty, [(50, 50, 50, 40)])
+    assert pushed[2] == "flip"
+
+
+def test_invalidate_clears_and_flips_once(pushed):
+    dirty = renderer()
+    frame(dirty, [])
+    dirty.screen.fill((255, 255, 255))
+    dirty.invalidate()
+    frame(dirty, [(0, 0, 5, 5)])
+    assert pushed[1] == "flip"
+    assert dirty.screen.get_at((99, 99))[:3] == (0, 0, 0)
+    frame(dirty, [(0, 0, 5, 5)])
+    assert pushed[2] == [pygame.Rect(0, 0, 5, 5)]
+
+
+def test_begin_frame_erases_only_last_frames_rects(pushed):
+    dirty = renderer()
+    frame(dirty, [])
+    dirty.screen.fill((255, 255, 255))
+    frame(dirty, [(0, 0, 10, 10)])
+    dirty.begin_frame()
+    assert dirty.screen.get_at((5, 5))[:3] == (0, 0, 0)
+    assert dirty.screen.get_at((50, 50))[:3] == (255, 255, 255)
@@ -0,0 +1,42 @@
+import time
+import pygame
+
+
+class FrameScheduler:
+    """Paces the main loop instead of a fixed clock.tick(30).
+    Runs at idle_fps while nothing interactive is open and at active_fps
+    while a menu or the prompt is, and sleeps inside pygame.event.wait so
+    input wakes it straight away rather than being polled.
+    next_frame() hands back the real elapsed time for delta-time movement."""
+
+    def __init__(self, idle_fps=20, active_fps=60, max_dt=0.25):
+        self.idle_fps = idle_fps
+        self.active_fps = active_fps
+        # a long stall (dragging the window, breakpoint) shouldn't teleport the pet
+        self.max_dt = max_dt
+        self.fps = idle_fps
+        self.last_frame = time.perf_counter()
+
+    def set_active(self, active):
+        self.fps = self.active_fps if active else self.idle_fps
+
+    def next_frame(self):
+        """Waits for the next frame, returns (dt in seconds, pending events)"""
+        events = []
+        deadline = self.last_frame + 1.0 / self.fps
+        timeout_ms = int((deadline - time.perf_counter()) * 1000)
+
+        if timeout_ms > 0:
+            event = pygame.event.wait(timeout_ms)
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+                # react right away, but never faster than the active rate
+                gap = self.last_frame + 1.0 / self.active_fps - time.perf_counter()
+                if gap > 0:
+                    time.sleep(gap)
+        events.extend(pygame.event.get())
+
+        now = time.perf_counter()
+        dt = min(now - self.last_frame, self.max_dt)
+        self.last_frame = now
+        return dt, events
@@ -0,0 +1,29 @@
+import os
+
+# set by enable(), read by every module that would touch a device or the network
+FLAG = "SAM_HEADLESS"
+
+
+def enabled():
+    return os.environ.get(FLAG) == "1"
+
+
+def enable():
+    """Runs without a screen, sound card, Win32 or Ollama (CI boxes, benchmarks).
+    Has to happen before pygame.init(), SDL reads the drivers from the environment."""
+    os.environ[FLAG] = "1"
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+
+def apply(config):
+    """config.json as loaded, with the device/network parts swapped for stubs
+    when headless: silent TTS, the scripted brain and no microphone"""
+    if not enabled():
+        return config
+    config = dict(config)
+    config["tts_engine"] = "silent"
+    config["tts_cache"] = {**config.get("tts_cache", {}), "prewarm": False}
+    config["ai_config"] = {**config.get("ai_config", {}), "enabled": True, "backend": "scripted"}
+    config["voice"] = {**config.get("voice", {}), "enabled": False}
+    return config
@@ -1,220 +1,321 @@
-import os 
+import os
 import pygame
 import json
 import time
 import sys
-import shutil 
 import threading
 
-#ai imports 
-from ai_core.brain import LocalBrain
-
-
+import headless
+# before anything touches SDL: dummy video/audio, stub TTS and brain
+if "--headless" in sys.argv:
+    headless.enable()
 
 # File imports
 from control_menu import ControlMenu
+from dirty_rects import DirtyRectRenderer
+from frame_scheduler import FrameScheduler
 from overlay_utils import make_window_overlay
 from pet import Pet
-from rust_core import CPU  
+from rust_core import shared, VoiceInput
+from profiler import PROFILER, ProfilerHUD
 from prompt_menu import PromptMenu
-
-def draw_speech_bubble(screen, text, pos):
-    font = pygame.font.SysFont("Arial", 16)
-    max_width = 250
-    words = text.split(' ')
-    lines = []
-    current_line = ""
-    for word in words:
-        test_line = current_line + word + " "
-        if font.size(test_line)[0] < max_width:
-            current_line = test_line
-        else:
-            lines.append(current_line)
-            current_line = word + " "
-    lines.append(current_line)
-    
-    line_height = font.get_linesize()
-    bubble_height = len(lines) * line_height + 20
-    bubble_width = max([font.size(l)[0] for l in lines]) + 20
-    
-    bubble_rect = pygame.Rect(pos[0] - (bubble_width // 2), pos[1] - bubble_height - 20, bubble_width, bubble_height)
-    pygame.draw.rect(screen, (255, 255, 220), bubble_rect, border_radius=10)
-    pygame.draw.rect(screen, (0, 0, 0), bubble_rect, 2, border_radius=10)
-    
-    for i, line in enumerate(lines):
-        txt_surf = font.render(line.strip(), True, (0, 0, 0))
-        screen.blit(txt_surf, (bubble_rect.x + 10, bubble_rect.y + 10 + (i * line_height)))
+from speech_bubble import SpeechBubble
+from wake_word import strip_wake_word, wake_word_pattern
 
 # --- Cleanup Logic ---
 def cleanup_temp_files():
-    """Deletes the voices folder upon exit"""
-    folder = 'voices'
-    if os.path.exists(folder):
-        try:
-            pygame.mixer.stop()
-            pygame.mixer.quit()
-            time.sleep(0.5)
-            shutil.rmtree(folder)
-            print(f"Cleaned up {folder} folder.")
-        except Exception as e:
-            print(f"⚠️ Could not delete voices folder: {e}")
-
-pygame.init()
-pygame.mixer.init()
+    """Stops audio upon exit. The Voices folder is the persistent TTS cache, so it stays"""
+    try:
+        pygame.mixer.stop()
+        pygame.mixer.quit()
+    except Exception as e:
+        print(f"⚠️ Could not stop the mixer: {e}")
 
 CONFIG_PATH = "config.json"
 def load_config():
     if not os.path.exists(CONFIG_PATH):
-        return {"current_theme": "dark", "ai_config": {"enabled": True, "backend": "local"}}
+        return headless.apply({"current_theme": "dark", "ai_config": {"enabled": True, "backend": "local"}})
     with open(CONFIG_PATH, "r") as f:
-        return json.load(f)
-
-config = load_config()
-
-screen = pygame.display.set_mode((1920, 1080), pygame.NOFRAME)
-pygame.display.set_caption("Clippy Overlay")
-make_window_overlay("Clippy Overlay")
-
-clock = pygame.time.Clock()
-
-pet_path = config.get("last_pet", "assets/pets/Clippy/clippy2025_1.0.gif")
-pet = Pet(pet_path, (1920, 1080))
-
-sim_cpu = CPU()
-
-menu = None
-menu_open = False
-prompt_menu = None 
-prompt_menu_open = False 
-
-
-ai_brain = LocalBrain()
-
-
-def open_control_menu():
-    global menu, menu_open
-    if not menu_open:
-        x = pet.rect.x + pet.rect.width + 20
-        y = pet.rect.y
-        menu = ControlMenu(x, y, pet, config)
-        menu_open = True
-        
-def close_control_menu():
-    global menu, menu_open
-    if menu_open:
-        if menu: menu.close() 
-        menu = None
-        menu_open = False
-        
-def open_prompt_menu():
-    global prompt_menu, prompt_menu_open
-    if not prompt_menu_open:
-        x = pet.rect.x + (pet.rect.width // 2) - 200 
-        y = pet.rect.y - 180 
-        prompt_menu = PromptMenu(x, y)
-        prompt_menu_open = True
-        
-def close_prompt_menu():
-    global prompt_menu, prompt_menu_open
-    if prompt_menu_open: 
-        if prompt_menu: prompt_menu.close()
-        prompt_menu = None 
-        prompt_menu_open = False
-
-running = True
-while running:
-    # Refreshing stats (uncommented for real-time updates)
-    sim_cpu.refresh()
-    stats = {
-        "cpu_usage": sim_cpu.get_cpu_usage(),
-        "gpu_usage": sim_cpu.get_gpu_usage(),
-        "gpu_temp": sim_cpu.get_gpu_temp(),
-        "cpu_temp": sim_cpu.get_temperature(), 
-        "mem_usage": sim_cpu.get_memory_usage()
-    }
-    current_mood = pet.personality.update_mood_from_stats(stats)
-    pet.update_from_mood(current_mood)
-    pet.update()
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-            
-        if prompt_menu_open and prompt_menu:
-            result = prompt_menu.handle_event(event)
-            if result:
-                if result.get("action") == "send":
-                    user_text = result['prompt']
-                    
-                    # -- ai threding start --
-                    pet.personality.current_text = "Thinking... "
-                    pet.personality.display_timer = time.time() + 30
-                    
-                    def ai_background_task(prompt, context):
-                        try: 
-                            response = ai_brain.ask(prompt, context)
-                            
-                            if response and len(response.strip()) > 0:
-                                print(f"AI Response Recieved: {response}")
-                                pet.personality.current_text = response
-                                pet.personality.display_timer = time.time() + 10
-                                
-                                #trigger TTS only if response is valid
-                                #pet.speak(response)
-                            else:
-                                pet.personality.current_text = "Im drawing a blank..."
-                                pet.personality.display_timer = time.time() + 5
-                        except Exception as e:
-                            print(f"Thread Error: {e}")
-                            pet.personality.current_text = "My Brain just glitched!"
-                        
-                elif result.get("action") == "close":
-                    close_prompt_menu() 
-            continue
-        
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            mx, my = pygame.mouse.get_pos()
-            
-            if event.button == 3: # Right Click
-                if menu_open: close_control_menu()
-                else: open_control_menu()
-                
-            elif event.button == 1: # Left Click
-                if menu_open and menu:
-                    is_on_menu = menu.rect.collidepoint(mx, my)
-                    is_on_overlay = False
-                    if menu.active_overlay and menu.overlay_rect:
-                        is_on_overlay = menu.overlay_rect.collidepoint(mx, my)
-
-                    if is_on_menu or is_on_overlay:
-                        action = menu.handle_click((mx, my), pet_path)
-                        if action == "Ask Me": 
-                            close_control_menu()
-                            open_prompt_menu()
-                    else:
-                        close_control_menu()
-
-    # Drawing
-    screen.fill((0, 0, 0, 0)) 
-    pet.draw(screen)
-    
-    if pet.personality.current_text and time.time() < pet.personality.display_timer:
-        bubble_x = pet.rect.x + (pet.rect.width // 2)
-        bubble_y = pet.rect.y
-        draw_speech_bubble(screen, pet.personality.current_text, (bubble_x, bubble_y))
-    elif pet.personality.current_text and time.time() >= pet.personality.display_timer:
-        pet.personality.current_text = None
-    
-    if menu_open and menu:
-        menu.draw(screen)
-        
-    if prompt_menu_open and prompt_menu:
-        prompt_menu.draw(screen)
-    
-    pygame.display.flip()
-    clock.tick(30)
-
-#this is the fiinaal exit sequence
-pygame.quit()
-cleanup_temp_files() 
-sys.exit()
\ No newline at end of file
+        return headless.apply(json.load(f))
+
+SCREEN_SIZE = (1920, 1080)
+# the OS may have painted over the window, so the next frame redraws all of it
+REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED,
+                 pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED)
+
+
+class OverlayApp:
+    """The window, the pet, its menus and the per-frame work.
+    step() runs one frame and run() paces it with the FrameScheduler,
+    so benchmark.py can drive the exact same frame code at full speed."""
+
+    def __init__(self, config):
+        self.config = config
+        pygame.init()
+        pygame.mixer.init()
+
+        self.screen = pygame.display.set_mode(SCREEN_SIZE, pygame.NOFRAME)
+        pygame.display.set_caption("Clippy Overlay")
+        if not headless.enabled():
+            make_window_overlay("Clippy Overlay")
+
+        frame_rate = config.get("frame_rate", {})
+        self.scheduler = FrameScheduler(frame_rate.get("idle", 20), frame_rate.get("active", 60))
+        self.speech_bubble = SpeechBubble()
+
+        # Only redraw what changed unless "dirty_rects": false in config.json
+        self.renderer = DirtyRectRenderer(self.screen) if config.get("dirty_rects", True) else None
+
+        # saved on Windows with backslashes, forward slashes work everywhere
+        self.pet_path = config.get("last_pet", "assets/pets/Clippy/clippy2025_1.0.gif").replace("\\", "/")
+        self.pet = Pet(self.pet_path, SCREEN_SIZE)
+
+        self.sim_cpu = shared()
+
+        # Offline speech input (Vosk), decoded on a rust_core thread. Off unless
+        # "voice": {"enabled": true} and the model folder from config.json exists.
+        self.voice = None
+        voice_config = config.get("voice", {})
+        if voice_config.get("enabled", False):
+            try:
+                self.voice = VoiceInput(voice_config.get("model_path", "models/vosk-model-small-en-us-0.15"))
+                self.voice.start(voice_config.get("device"))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Voice input disabled: {e}")
+                self.voice = None
+        self.wake_word = wake_word_pattern(voice_config.get("wake_word", ""))
+
+        # Prometheus/OpenMetrics endpoint for the same stats, served by a rust_core
+        # thread without the GIL. "metrics": {"enabled": true} in config.json
+        self.metrics = None
+        metrics_config = config.get("metrics", {})
+        if metrics_config.get("enabled", False):
+            try:
+                self.metrics = self.sim_cpu.serve_metrics(metrics_config.get("port", 9464),
+                                                          metrics_config.get("host", "127.0.0.1"))
+                print(f"📈 Metrics at {self.metrics.url}")
+            except OSError as e:
+                print(f"⚠️ Metrics endpoint disabled: {e}")
+
+        # frame phase timings, worker latencies and queue sizes (profiler.py).
+        # "profiler": {"enabled": true} profiles from the start, F3 shows the HUD
+        profiler_config = config.get("profiler", {})
+        self.profiling = profiler_config.get("enabled", False)
+        self.show_hud = self.profiling and profiler_config.get("hud", True)
+        self.trace_path = profiler_config.get("trace_path", "trace.json")
+        self.hud = ProfilerHUD()
+        PROFILER.enabled = self.profiling or self.show_hud
+
+        self.menu = None
+        self.menu_open = False
+        self.prompt_menu = None
+        self.prompt_menu_open = False
+        self.running = True
+
+    def ask_pet(self, user_text, mood, stats):
+        # the answer streams into the bubble from the speech worker
+        self.pet.personality.current_text = "Thinking... "
+        self.pet.personality.display_timer = time.time() + 30
+        self.pet.personality.ask_ai(user_text, {"mood": mood, "stats": stats.to_dict()})
+
+    def handle_voice(self, mood, stats):
+        """Shows what's being heard and sends finished sentences to the pet.
+        With a wake word only sentences starting with it count (and it's cut off)."""
+        for kind, text in self.voice.poll():
+            text = strip_wake_word(text, self.wake_word)
+            if text is None:
+                continue
+            if kind == "partial":
+                self.pet.personality.current_text = text + "..."
+                self.pet.personality.display_timer = time.time() + 3
+            elif text:
+                self.ask_pet(text, mood, stats)
+
+    def open_control_menu(self):
+        if not self.menu_open:
+            x = self.pet.rect.x + self.pet.rect.width + 20
+            y = self.pet.rect.y
+            self.menu = ControlMenu(x, y, self.pet, self.config)
+            self.menu_open = True
+
+    def close_control_menu(self):
+        if self.menu_open:
+            if self.menu: self.menu.close()
+            self.menu = None
+            self.menu_open = False
+
+    def open_prompt_menu(self):
+        if not self.prompt_menu_open:
+            x = self.pet.rect.x + (self.pet.rect.width // 2) - 200
+            y = self.pet.rect.y - 180
+            self.prompt_menu = PromptMenu(x, y)
+            self.prompt_menu_open = True
+
+    def close_prompt_menu(self):
+        if self.prompt_menu_open:
+            if self.prompt_menu: self.prompt_menu.close()
+            # nobody is waiting for the answer anymore
+            self.pet.personality.cancel_prompt()
+            self.prompt_menu = None
+            self.prompt_menu_open = False
+
+    def run(self):
+        while self.running:
+            # Idle rate unless something is waiting on the user
+            self.scheduler.set_active(self.menu_open or self.prompt_menu_open)
+            dt, events = self.scheduler.next_frame()
+            self.step(dt, events)
+
+    def step(self, dt, events):
+        """One frame: stats, mood, input, drawing. Each phase is a profiler span."""
+        pet = self.pet
+        with PROFILER.span("frame"):
+            # Stats come from the rust_core sampler thread, one call per frame.
+            # The snapshot supports stats.get("cpu_usage") like the old dict did.
+            # Smoothed values so a CPU hovering around a threshold doesn't flip the mood
+            with PROFILER.span("telemetry"):
+                stats = self.sim_cpu.snapshot(smoothed=True)
+            with PROFILER.span("mood"):
+                current_mood = pet.personality.update_mood_from_stats(stats)
+                pet.update_from_mood(current_mood)
+            with PROFILER.span("update"):
+                pet.update(dt)
+                if self.voice:
+                    self.handle_voice(current_mood, stats)
+            with PROFILER.span("events"):
+                self.handle_events(events, current_mood, stats)
+            with PROFILER.span("draw"):
+                dirty = self.draw(stats)
+            with PROFILER.span("flip"):
+                self.present(dirty)
+
+        if PROFILER.enabled:
+            PROFILER.gauge("threads", threading.active_count())
+            PROFILER.gauge("speech_queue", pet.personality.speech_worker.pending)
+
+    def handle_events(self, events, current_mood, stats):
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
+
+            if event.type in REDRAW_EVENTS:
+                self.redraw_all()
+                continue
+
+            # profiler keys work everywhere, even while typing a prompt
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_F3, pygame.K_F4):
+                self.profiler_key(event.key)
+                continue
+
+            if self.prompt_menu_open and self.prompt_menu:
+                result = self.prompt_menu.handle_event(event)
+                if result:
+                    if result.get("action") == "send":
+                        self.ask_pet(result['prompt'], current_mood, stats)
+
+                    elif result.get("action") == "close":
+                        self.close_prompt_menu()
+                continue
+
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                mx, my = event.pos
+
+                if event.button == 3: # Right Click
+                    if self.menu_open: self.close_control_menu()
+                    else: self.open_control_menu()
+
+                elif event.button == 1: # Left Click
+                    menu = self.menu
+                    if self.menu_open and menu:
+                        is_on_menu = menu.rect.collidepoint(mx, my)
+                        is_on_overlay = False
+                        if menu.active_overlay and menu.overlay_rect:
+                            is_on_overlay = menu.overlay_rect.collidepoint(mx, my)
+
+                        if is_on_menu or is_on_overlay:
+                            theme = self.config.get("current_theme")
+                            action = menu.handle_click((mx, my), self.pet_path)
+                            if self.config.get("current_theme") != theme:
+                                self.redraw_all()
+                            if action == "Ask Me":
+                                self.close_control_menu()
+                                self.open_prompt_menu()
+                        else:
+                            self.close_control_menu()
+
+    def profiler_key(self, key):
+        """F3 shows/hides the profiler HUD (profiling runs while it's shown), F4 dumps a trace"""
+        if key == pygame.K_F3:
+            self.show_hud = not self.show_hud
+            PROFILER.enabled = self.show_hud or self.profiling
+            if self.show_hud:
+                PROFILER.reset()
+        elif PROFILER.enabled:
+            print(f"📈 Trace written to {PROFILER.dump_trace(self.trace_path)}")
+
+    def draw(self, stats=None):
+        """Draws everything, returns the rects that changed.
+        stats is this frame's snapshot, the dashboards reuse it"""
+        pet = self.pet
+        screen = self.screen
+        dirty = []
+        if self.renderer:
+            self.renderer.begin_frame()
+        else:
+            screen.fill((0, 0, 0, 0))
+        pet.draw(screen)
+        dirty.append(pet.rect)
+
+        if pet.personality.current_text and time.time() < pet.personality.display_timer:
+            bubble_x = pet.rect.x + (pet.rect.width // 2)
+            bubble_y = pet.rect.y
+            # the theme is part of the bubble cache key, toggling it re-renders once
+            theme = self.config.get("current_theme", "dark")
+            dirty.append(self.speech_bubble.draw(screen, pet.personality.current_text, (bubble_x, bubble_y), theme))
+        elif pet.personality.current_text and time.time() >= pet.personality.display_timer:
+            pet.personality.current_text = None
+
+        if self.menu_open and self.menu:
+            self.menu.draw(screen, stats)
+            dirty.append(self.menu.rect)
+            if self.menu.active_overlay and self.menu.overlay_rect:
+                dirty.append(self.menu.overlay_rect)
+
+        if self.prompt_menu_open and self.prompt_menu:
+            self.prompt_menu.draw(screen)
+            dirty.append(self.prompt_menu.rect)
+
+        if self.show_hud:
+            dirty.append(self.hud.draw(screen))
+        return dirty
+
+    def redraw_all(self):
+        """Clear and push the whole screen next frame instead of just the dirty rects"""
+        if self.renderer:
+            self.renderer.invalidate()
+
+    def present(self, dirty):
+        if self.renderer:
+            for rect in dirty:
+                self.renderer.mark(rect)
+            self.renderer.present()
+        else:
+            pygame.display.flip()
+
+    def close(self):
+        if self.voice:
+            self.voice.close()
+        if self.metrics:
+            self.metrics.close()
+        self.pet.personality.close()
+
+
+if __name__ == "__main__":
+    app = OverlayApp(load_config())
+    app.run()
+
+    #this is the fiinaal exit sequence
+    app.close()
+    pygame.quit()
+    cleanup_temp_files()
+    sys.exit()
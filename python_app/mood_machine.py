@@ -0,0 +1,71 @@
+import time
+
+
+class MoodRule:
+    """One mood and its hysteresis band.
+    enter(stats) says when the mood should start, exit(stats) when it may end,
+    e.g. enter above 85°C but only exit below 80°C. With hold > 0, enter has
+    to stay true that many seconds before the mood starts."""
+
+    def __init__(self, mood, enter, exit, hold=0.0):
+        self.mood = mood
+        self.enter = enter
+        self.exit = exit
+        self.hold = hold
+
+
+class MoodMachine:
+    """Turns stats into a mood without flickering.
+    Rules are checked in priority order (first one wins). Once in a mood the
+    pet stays until that mood's exit condition holds or a higher priority
+    mood's enter condition does, and never switches again before min_dwell
+    seconds have passed, so the costly side effects of a mood change (sound,
+    AI line, TTS) happen at most that often."""
+
+    def __init__(self, rules, default="happy", min_dwell=10.0):
+        self.rules = list(rules)
+        self.default = default
+        self.min_dwell = min_dwell
+        self.mood = None
+        self.entered_at = float("-inf")
+        self._held_rules = [rule for rule in self.rules if rule.hold > 0]
+        self._holding_since = {}
+
+    def update(self, stats, now=None):
+        """Feeds one stats reading, returns the (possibly unchanged) mood"""
+        now = time.monotonic() if now is None else now
+        # hold timers keep running during the dwell time
+        for rule in self._held_rules:
+            if rule.enter(stats):
+                self._holding_since.setdefault(rule.mood, now)
+            else:
+                self._holding_since.pop(rule.mood, None)
+        if now - self.entered_at < self.min_dwell:
+            return self.mood
+
+        mood = self._next_mood(stats, now)
+        if mood != self.mood:
+            self.mood = mood
+            self.entered_at = now
+        return self.mood
+
+    def _entered(self, rule, stats, now):
+        if rule.hold <= 0:
+            return rule.enter(stats)
+        since = self._holding_since.get(rule.mood)
+        return since is not None and now - since >= rule.hold
+
+    def _next_mood(self, stats, now):
+        for rule in self.rules:
+            if rule.mood == self.mood:
+                # nothing more important started, stay unless this mood is over
+                return self.mood if not rule.exit(stats) else self._first_entered(stats, now)
+            if self._entered(rule, stats, now):
+                return rule.mood
+        return self.default
+
+    def _first_entered(self, stats, now):
+        for rule in self.rules:
+            if rule.mood != self.mood and self._entered(rule, stats, now):
+                return rule.mood
+        return self.default
@@ -0,0 +1,71 @@
+from mood_machine import MoodMachine, MoodRule
+
+
+def hot_rule(**options):
+    return MoodRule("overheated", lambda s: s["cpu_temp"] > 85, lambda s: s["cpu_temp"] < 80, **options)
+
+
+def warm_rule():
+    return MoodRule("warm", lambda s: s["cpu_temp"] > 70, lambda s: s["cpu_temp"] < 65)
+
+
+def temps(machine, readings):
+    """Feeds (time, cpu_temp) readings, returns the mood after each"""
+    return [machine.update({"cpu_temp": temp}, now=at) for at, temp in readings]
+
+
+def test_starts_in_the_default_mood():
+    machine = MoodMachine([hot_rule()], min_dwell=0)
+    assert machine.update({"cpu_temp": 50}, now=0) == "happy"
+
+
+def test_hysteresis_band_keeps_the_mood():
+    machine = MoodMachine([hot_rule()], min_dwell=0)
+    # enters above 85, stays anywhere above 80, leaves below 80
+    assert temps(machine, [(0, 86), (1, 84), (2, 81), (3, 80), (4, 79)]) == [
+        "overheated", "overheated", "overheated", "overheated", "happy"]
+    # and 84 isn't enough to come back
+    assert temps(machine, [(5, 84)]) == ["happy"]
+
+
+def test_min_dwell_delays_every_switch():
+    machine = MoodMachine([hot_rule()], min_dwell=10)
+    assert temps(machine, [(0, 50), (5, 90), (9.9, 90), (10, 90)]) == [
+        "happy", "happy", "happy", "overheated"]
+    assert temps(machine, [(15, 50), (19.9, 50), (20, 50)]) == ["overheated", "overheated", "happy"]
+
+
+def test_higher_priority_mood_takes_over_inside_the_band():
+    machine = MoodMachine([hot_rule(), warm_rule()], min_dwell=0)
+    assert temps(machine, [(0, 75), (1, 90), (2, 82), (3, 78), (4, 60)]) == [
+        "warm", "overheated", "overheated", "warm", "happy"]
+
+
+def test_lower_priority_mood_does_not_interrupt():
+    machine = MoodMachine([hot_rule(), warm_rule()], min_dwell=0)
+    temps(machine, [(0, 90)])
+    # 75 would enter warm, but overheated only ends below 80
+    assert temps(machine, [(1, 82)]) == ["overheated"]
+
+
+def test_hold_needs_the_condition_for_that_long():
+    idle = MoodRule("idle", lambda s: s["cpu_usage"] < 5, lambda s: s["cpu_usage"] > 10, hold=30)
+    machine = MoodMachine([idle], min_dwell=0)
+    feed = lambda at, usage: machine.update({"cpu_usage": usage}, now=at)
+    assert feed(0, 2) == "happy"
+    assert feed(29, 2) == "happy"
+    # a break in the condition restarts the timer
+    assert feed(29.5, 7) == "happy"
+    assert feed(30, 2) == "happy"
+    assert feed(59, 2) == "happy"
+    assert feed(60, 2) == "idle"
+
+
+def test_hold_timer_runs_during_the_dwell():
+    idle = MoodRule("idle", lambda s: s["cpu_usage"] < 5, lambda s: s["cpu_usage"] > 10, hold=5)
+    hot = MoodRule("overheated", lambda s: s["cpu_usage"] > 95, lambda s: s["cpu_usage"] < 90)
+    machine = MoodMachine([hot, idle], min_dwell=10)
+    assert machine.update({"cpu_usage": 99}, now=0) == "overheated"
+    machine.update({"cpu_usage": 1}, now=3)
+    # overheated is over and idle has held since t=3, the first allowed switch goes straight to idle
+    assert machine.update({"cpu_usage": 1}, now=10) == "idle"
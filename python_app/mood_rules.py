@@ -0,0 +1,141 @@
+import operator
+import os
+import re
+
+from mood_machine import MoodRule
+
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+CONDITION = re.compile(r"^\s*(>=|<=|==|!=|>|<)\s*(-?\d+(?:\.\d+)?)\s*$")
+
+# Used for pets whose personality.json has no "moods" table. Same format:
+#   "enter"/"exit": {"metric": "> 85", ...} (all must hold) or a list of
+#   those (any one must hold). No "exit" means leave as soon as "enter" fails.
+#   "priority": higher wins, ties keep file order.
+#   "for_seconds": "enter" has to hold that long before the mood starts.
+DEFAULT_MOOD_TABLE = {
+    "default": "happy",
+    "rules": [
+        {"mood": "overheated", "priority": 30,
+         "enter": [{"cpu_temp": "> 85"}, {"gpu_temp": "> 85"}],
+         "exit": {"cpu_temp": "< 80", "gpu_temp": "< 80"}},
+        {"mood": "cooling", "priority": 20,
+         "enter": {"cpu_temp": "> 60", "cpu_usage": "< 15"},
+         "exit": [{"cpu_temp": "< 55"}, {"cpu_usage": "> 25"}]},
+        {"mood": "warm", "priority": 10,
+         "enter": [{"cpu_temp": "> 70"}, {"gpu_temp": "> 70"}],
+         "exit": {"cpu_temp": "< 65", "gpu_temp": "< 65"}},
+        {"mood": "idle", "priority": 0, "for_seconds": 30,
+         "enter": {"cpu_usage": "< 5"},
+         "exit": {"cpu_usage": "> 10"}},
+    ],
+}
+
+
+class MoodTable:
+    """A personality's mood rules, compiled and ready for MoodMachine"""
+
+    def __init__(self, rules, default, min_dwell=None):
+        self.rules = rules
+        self.default = default
+        # None means use the config.json value
+        self.min_dwell = min_dwell
+
+    @property
+    def moods(self):
+        return [rule.mood for rule in self.rules] + [self.default]
+
+
+def available_sounds(pet_folder):
+    """Mood names that have a <mood>.mp3 in the pet's sounds folder"""
+    sound_dir = os.path.join(pet_folder, "sounds")
+    if not os.path.isdir(sound_dir):
+        return set()
+    return {name[:-4] for name in os.listdir(sound_dir) if name.endswith(".mp3")}
+
+
+def _compile_clause(clause, metrics):
+    """{"metric": "> 85", ...} -> tuple of (metric, op, threshold)"""
+    if not isinstance(clause, dict) or not clause:
+        raise ValueError(f"expected {{metric: condition}}, got {clause!r}")
+    checks = []
+    for metric, condition in clause.items():
+        if metric not in metrics:
+            raise ValueError(f"unknown metric {metric!r} (known: {', '.join(metrics)})")
+        match = CONDITION.match(str(condition))
+        if not match:
+            raise ValueError(f"bad condition {condition!r} for {metric}, expected e.g. '> 85'")
+        checks.append((metric, OPERATORS[match.group(1)], float(match.group(2))))
+    return tuple(checks)
+
+
+def compile_condition(spec, metrics):
+    """Turns a JSON condition into a stats -> bool function, parsing it only once"""
+    clauses = tuple(_compile_clause(clause, metrics) for clause in (spec if isinstance(spec, list) else [spec]))
+    if not clauses:
+        raise ValueError("empty condition list")
+
+    if len(clauses) == 1:
+        (checks,) = clauses
+
+        def all_hold(stats):
+            for metric, op, threshold in checks:
+                if not op(stats.get(metric, 0), threshold):
+                    return False
+            return True
+        return all_hold
+
+    def any_holds(stats):
+        for checks in clauses:
+            for metric, op, threshold in checks:
+                if not op(stats.get(metric, 0), threshold):
+                    break
+            else:
+                return True
+        return False
+    return any_holds
+
+
+def compile_mood_table(table, metrics, reactions=(), sounds=(), pet_name="pet"):
+    """Validates and compiles a "moods" table. Broken rules are skipped with
+    a warning instead of crashing the pet, and moods that would fire with
+    nothing to say or play (or reactions no rule can reach) are reported."""
+    default = table.get("default", "happy")
+    min_dwell = table.get("min_dwell_seconds")
+    specs = [spec for spec in table.get("rules", []) if isinstance(spec, dict)]
+    ordered = sorted(enumerate(specs), key=lambda item: (-item[1].get("priority", 0), item[0]))
+
+    rules = []
+    for _, spec in ordered:
+        mood = spec.get("mood")
+        try:
+            if not mood:
+                raise ValueError("rule has no 'mood'")
+            if any(rule.mood == mood for rule in rules):
+                raise ValueError("mood already has a rule, use a list of conditions in 'enter' instead")
+            enter_check = compile_condition(spec["enter"], metrics)
+            if "exit" in spec:
+                exit_check = compile_condition(spec["exit"], metrics)
+            else:
+                def exit_check(stats, enter_check=enter_check):
+                    return not enter_check(stats)
+            hold = float(spec.get("for_seconds", 0))
+        except (KeyError, ValueError, TypeError) as e:
+            print(f"⚠️ {pet_name}: skipping mood rule {mood or spec!r}: {e}")
+            continue
+        rules.append(MoodRule(mood, enter_check, exit_check, hold=hold))
+
+    compiled = MoodTable(rules, default, min_dwell)
+    for mood in compiled.moods:
+        if mood not in reactions and mood not in sounds:
+            print(f"⚠️ {pet_name}: mood '{mood}' has no mood_reactions line and no sounds/{mood}.mp3")
+    for mood in reactions:
+        if mood not in compiled.moods:
+            print(f"ℹ️ {pet_name}: no mood rule leads to '{mood}', its reaction won't play")
+    return compiled
@@ -0,0 +1,105 @@
+import pytest
+
+from mood_machine import MoodMachine
+from mood_rules import DEFAULT_MOOD_TABLE, compile_condition, compile_mood_table
+
+METRICS = ["cpu_usage", "cpu_temp", "gpu_temp", "mem_usage"]
+
+
+def compiled(rules, **table):
+    return compile_mood_table({"rules": rules, **table}, METRICS, reactions={"hot": "!", "happy": ":)"})
+
+
+def test_all_conditions_in_a_dict_must_hold():
+    check = compile_condition({"cpu_temp": "> 80", "cpu_usage": ">= 50"}, METRICS)
+    assert check({"cpu_temp": 81, "cpu_usage": 50})
+    assert not check({"cpu_temp": 81, "cpu_usage": 49})
+    # missing metrics read as 0
+    assert not check({"cpu_temp": 81})
+
+
+def test_any_dict_in_a_list_may_hold():
+    check = compile_condition([{"cpu_temp": "> 85"}, {"gpu_temp": "> 85"}], METRICS)
+    assert check({"cpu_temp": 20, "gpu_temp": 90})
+    assert not check({"cpu_temp": 20, "gpu_temp": 20})
+
+
+@pytest.mark.parametrize("spec, error", [
+    ({"fan_speed": "> 5"}, "unknown metric"),
+    ({"cpu_temp": "hot"}, "bad condition"),
+    ({"cpu_temp": "=> 5"}, "bad condition"),
+    ({}, "expected"),
+    ("cpu_temp > 5", "expected"),
+    ([], "empty"),
+])
+def test_bad_conditions_are_refused(spec, error):
+    with pytest.raises(ValueError, match=error):
+        compile_condition(spec, METRICS)
+
+
+def test_rules_are_ordered_by_priority_then_file_order():
+    table = compiled([
+        {"mood": "a", "enter": {"cpu_usage": "> 1"}},
+        {"mood": "b", "priority": 5, "enter": {"cpu_usage": "> 1"}},
+        {"mood": "c", "enter": {"cpu_usage": "> 1"}},
+    ])
+    assert [rule.mood for rule in table.rules] == ["b", "a", "c"]
+    assert table.moods == ["b", "a", "c", "happy"]
+
+
+def test_broken_rules_are_skipped_with_a_warning(capsys):
+    table = compiled([
+        {"mood": "hot", "enter": {"cpu_temp": "> 80"}},
+        {"enter": {"cpu_temp": "> 80"}},
+        {"mood": "typo", "enter": {"cpu_tmp": "> 80"}},
+        {"mood": "no_enter", "exit": {"cpu_temp": "< 80"}},
+        {"mood": "hot", "enter": {"gpu_temp": "> 80"}},
+        {"mood": "slow", "enter": {"cpu_usage": "> 80"}, "for_seconds": "soon"},
+        "not a rule",
+    ])
+    assert [rule.mood for rule in table.rules] == ["hot"]
+    out = capsys.readouterr().out
+    assert "rule has no 'mood'" in out
+    assert "unknown metric 'cpu_tmp'" in out
+    assert "skipping mood rule 'no_enter': 'enter'" in out
+    assert "mood already has a rule" in out
+    assert "skipping mood rule 'slow'" in out
+
+
+def test_missing_exit_leaves_when_enter_fails():
+    table = compiled([{"mood": "hot", "enter": {"cpu_temp": "> 80"}}])
+    rule = table.rules[0]
+    assert rule.exit({"cpu_temp": 80}) and not rule.exit({"cpu_temp": 81})
+
+
+def test_moods_without_anything_to_say_are_reported(capsys):
+    compiled([{"mood": "hot", "enter": {"cpu_temp": "> 80"}},
+              {"mood": "mute", "enter": {"cpu_usage": "< 1"}}], default="sleepy")
+    out = capsys.readouterr().out
+    assert "mood 'mute' has no mood_reactions line" in out
+    assert "mood 'sleepy' has no mood_reactions line" in out
+    # happy has a reaction, but with sleepy as the default nothing leads there
+    assert "no mood rule leads to 'happy'" in out
+    assert "'hot' has no" not in out
+
+
+def test_a_sound_is_enough_to_have_something_to_say(capsys):
+    compile_mood_table({"rules": [{"mood": "hot", "enter": {"cpu_temp": "> 80"}}]}, METRICS,
+                       sounds={"hot", "happy"})
+    assert "has no" not in capsys.readouterr().out
+
+
+def test_table_settings_are_read():
+    table = compiled([], default="calm", min_dwell_seconds=3)
+    assert table.default == "calm"
+    assert table.min_dwell == 3
+    assert compiled([]).min_dwell is None
+
+
+def test_default_table_compiles_and_drives_the_machine():
+    table = compile_mood_table(DEFAULT_MOOD_TABLE, METRICS)
+    assert len(table.rules) == len(DEFAULT_MOOD_TABLE["rules"])
+    machine = MoodMachine(table.rules, default=table.default, min_dwell=0)
+    assert machine.update({"cpu_temp": 90, "cpu_usage": 50}, now=0) == "overheated"
+    assert machine.update({"cpu_temp": 75, "cpu_usage": 50}, now=1) == "warm"
+    assert machine.update({"cpu_temp": 40, "cpu_usage": 50}, now=2) == "happy"
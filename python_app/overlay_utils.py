@@ -1,11 +1,19 @@
-import win32gui
-import win32con
-import win32api
 import pygame
 
+try:
+    import win32gui
+    import win32con
+    import win32api
+except ImportError:
+    # not on Windows, the window just stays a normal one
+    win32gui = None
+
 
 def make_window_overlay(window_caption: str):
     """"Makes the pygame window transparrent frameless and always on the top"""
+    if win32gui is None:
+        print("⚠️ No pywin32 here, skipping the overlay setup")
+        return
     hwnd = win32gui.FindWindow(None, window_caption)
     if not hwnd:
         print("⚠️ Could not find the window overlay setup")
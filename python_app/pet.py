@@ -2,9 +2,24 @@ import pygame
 import random
 import os
 import time
-from PIL import Image
+from collections import OrderedDict
 import pygame.mixer
 from Clippy_Personality import Personality
+from sprite_cache import SpriteFrames
+
+PET_SIZE = (200, 200)
+# Movement speeds in pixels per second (the old 3/2 px per frame at 30 FPS)
+SPEED_X = 90
+SPEED_Y = 60
+# GIFs asking for less than this get it bumped, like browsers do
+MIN_FRAME_MS = 20
+# Average idle chatter attempts per second once the cooldown is over
+IDLE_CHATTER_RATE = 0.3
+# Tinted frames kept around, keyed by (frame index, colour). 200x200 RGBA is
+# ~160 KB each, so this caps the cache at ~20 MB
+TINT_CACHE_LIMIT = 128
+# Alpha of the mood tint that gets multiplied into every frame
+TINT_ALPHA = 60
 
 
 class Pet(pygame.sprite.Sprite):
@@ -19,23 +34,31 @@ class Pet(pygame.sprite.Sprite):
         config_path = os.path.join(base_dir, "config.json")
         
         self.personality = Personality(self.personality_path, config_path=config_path)
+        self.personality.controls.update(music_on=self.play_music, music_off=self.stop_music)
         # === Animation frames ===
-        self.frames = self.load_gif_frames(image_path)
+        self.tint_cache = OrderedDict()
+        # first frame is ready right away, the rest stream in from update()
+        self.sprites = SpriteFrames(image_path, PET_SIZE)
+        self.frames = self.sprites.frames
         self.current_frame = 0
         self.image = self.frames[self.current_frame]
         self.rect = self.image.get_rect()
         self.screen_w, self.screen_h = screen_size
-        self.vx = random.choice([-3, 3])
-        self.vy = random.choice([-2, 2])
+        self.vx = random.choice([-SPEED_X, SPEED_X])
+        self.vy = random.choice([-SPEED_Y, SPEED_Y])
+        # sub-pixel position, rect is rounded from it
+        self.pos_x, self.pos_y = float(self.rect.x), float(self.rect.y)
         self.color = (255, 255, 255)
         self.mood = "idle"
         self.last_mood = None
-        self.frame_timer = 0
+        self.frame_elapsed = 0.0
 
         # === Music & sounds ===
         self.music_path = self.find_music()
         self.play_music()
         self.sounds = self.load_sounds()
+        # channel the last mood sound went to, speech has its own reserved one
+        self.mood_channel = None
 
         # === Idle speech timing ===
         self.last_speech_time = 0
@@ -46,19 +69,8 @@ class Pet(pygame.sprite.Sprite):
     # 🧩 ASSET LOADERS
     # ===============================
     def load_gif_frames(self, path):
-        """Load all frames from an animated GIF."""
-        pil_img = Image.open(path)
-        frames = []
-        for frame in range(pil_img.n_frames):
-            pil_img.seek(frame)
-            frame_surface = pygame.image.fromstring(
-                pil_img.convert("RGBA").tobytes(),
-                pil_img.size,
-                "RGBA"
-            )
-            frame_surface = pygame.transform.scale(frame_surface, (200, 200))
-            frames.append(frame_surface)
-        return frames
+        """Load all frames from an animated GIF (through the on-disk sprite cache)."""
+        return SpriteFrames(path, PET_SIZE).load_all()
 
     def find_music(self):
         """Find a background music file inside the pet folder."""
@@ -77,13 +89,16 @@ class Pet(pygame.sprite.Sprite):
             pygame.mixer.music.set_volume(0.5)
             pygame.mixer.music.play(-1)
 
+    def stop_music(self):
+        pygame.mixer.music.stop()
+
     def load_sounds(self):
         """Load mood-specific sound effects."""
         sound_dir = os.path.join(self.pet_folder, "sounds")
         sounds = {}
         if not os.path.exists(sound_dir):
             return sounds
-        for mood in ["overheated", "warm", "low-battery", "cooling", "happy", "idle"]:
+        for mood in self.personality.mood_table.moods:
             file_path = os.path.join(sound_dir, f"{mood}.mp3")
             if os.path.exists(file_path):
                 sounds[mood] = pygame.mixer.Sound(file_path)
@@ -92,8 +107,10 @@ class Pet(pygame.sprite.Sprite):
     def play_mood_sound(self, mood):
         """Play a sound associated with a mood."""
         if mood in self.sounds:
-            pygame.mixer.stop()
-            self.sounds[mood].play()
+            # cut off the previous mood sound only, a stopped mixer would cut off speech too
+            if self.mood_channel:
+                self.mood_channel.stop()
+            self.mood_channel = self.sounds[mood].play()
 
 
     # ===============================
@@ -104,12 +121,12 @@ class Pet(pygame.sprite.Sprite):
         self.mood = mood
         
         mood_colors = {
-            "MELTING": (255, 50, 50),
-            "GAMING_HARD": (200, 0, 255),
-            "PANICKED": (255, 140, 0),
-            "STUFFED": (100, 255, 100),
-            "BORED": (150, 150, 255),
-            "CHILLING": (255, 255, 255),
+            "overheated": (255, 50, 50),
+            "warm": (255, 140, 0),
+            "low-battery": (100, 255, 100),
+            "cooling": (120, 200, 255),
+            "idle": (150, 150, 255),
+            "happy": (255, 255, 255),
         }
         
         self.color = mood_colors.get(self.mood, (255, 255, 255))
@@ -120,11 +137,13 @@ class Pet(pygame.sprite.Sprite):
                 self.play_mood_sound(self.mood)
             self.last_mood = self.mood
 
-    def update(self):
-        """Handles movement and animation frames."""
+    def update(self, dt=1 / 30):
+        """Handles movement and animation frames. dt is the frame time in seconds."""
         # --- Movement ---
-        self.rect.x += self.vx
-        self.rect.y += self.vy
+        self.pos_x += self.vx * dt
+        self.pos_y += self.vy * dt
+        self.rect.x = round(self.pos_x)
+        self.rect.y = round(self.pos_y)
 
         if self.rect.left < 0 or self.rect.right > self.screen_w:
             self.vx *= -1
@@ -132,15 +151,21 @@ class Pet(pygame.sprite.Sprite):
             self.vy *= -1
 
         # --- Frame Animation ---
-        self.frame_timer += 1
-        if self.frame_timer % 2 == 0:
+        if not self.sprites.complete:
+            self.sprites.step()
+        # follow the GIF's own per-frame durations
+        self.frame_elapsed += dt * 1000
+        duration = max(self.sprites.durations[self.current_frame], MIN_FRAME_MS)
+        while self.frame_elapsed >= duration:
+            self.frame_elapsed -= duration
             self.current_frame = (self.current_frame + 1) % len(self.frames)
-            self.image = self.frames[self.current_frame]
+            duration = max(self.sprites.durations[self.current_frame], MIN_FRAME_MS)
+        self.image = self.frames[self.current_frame]
 
         # --- Occasional idle chatter ---
         current_time = time.time()
         if current_time - self.last_speech_time > self.speech_cooldown:
-            if random.randint(0, 100) == 1:
+            if random.random() < IDLE_CHATTER_RATE * dt:
                 self.personality.say_random_idle()
                 self.last_speech_time = current_time
 
@@ -148,9 +173,23 @@ class Pet(pygame.sprite.Sprite):
     # ===============================
     # 🧩 DRAW
     # ===============================
-    def draw(self, screen):
-        tinted = self.image.copy()
+    def tinted_frame(self, index, color):
+        """The frame multiplied by the mood colour, built once and then cached."""
+        key = (index, color)
+        tinted = self.tint_cache.get(key)
+        if tinted is not None:
+            self.tint_cache.move_to_end(key)
+            return tinted
+        
+        tinted = self.frames[index].copy()
         tint_surface = pygame.Surface(tinted.get_size(), pygame.SRCALPHA)
-        tint_surface.fill((*self.color, 60))
+        tint_surface.fill((*color, TINT_ALPHA))
         tinted.blit(tint_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-        screen.blit(tinted, self.rect)
+        
+        self.tint_cache[key] = tinted
+        if len(self.tint_cache) > TINT_CACHE_LIMIT:
+            self.tint_cache.popitem(last=False)
+        return tinted
+
+    def draw(self, screen):
+        screen.blit(self.tinted_frame(self.current_frame, self.color), self.rect)
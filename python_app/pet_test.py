@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+import pygame
+
+import pet
+from pet import Pet
+
+
+def bare_pet(frames):
+    """A Pet with just its frames, skipping the personality and the GIF"""
+    sprite = Pet.__new__(Pet)
+    sprite.frames = frames
+    sprite.tint_cache = OrderedDict()
+    return sprite
+
+
+def white_frames(count=3):
+    frames = []
+    for _ in range(count):
+        frame = pygame.Surface((4, 4), pygame.SRCALPHA)
+        frame.fill((255, 255, 255, 255))
+        frames.append(frame)
+    return frames
+
+
+def test_tint_multiplies_the_mood_colour():
+    sprite = bare_pet(white_frames())
+    tinted = sprite.tinted_frame(0, (255, 0, 128))
+    r, g, b, a = tinted.get_at((0, 0))
+    assert (r, g) == (255, 0)
+    assert 120 <= b <= 130
+    assert a == pet.TINT_ALPHA
+    # the frame itself stays untouched
+    assert sprite.frames[0].get_at((0, 0)) == (255, 255, 255, 255)
+
+
+def test_tint_is_built_once_per_frame_and_colour():
+    sprite = bare_pet(white_frames())
+    first = sprite.tinted_frame(1, (255, 0, 0))
+    assert sprite.tinted_frame(1, (255, 0, 0)) is first
+    assert sprite.tinted_frame(1, (0, 255, 0)) is not first
+    assert sprite.tinted_frame(2, (255, 0, 0)) is not first
+
+
+def test_tint_cache_drops_the_least_recently_used(monkeypatch):
+    monkeypatch.setattr(pet, "TINT_CACHE_LIMIT", 2)
+    sprite = bare_pet(white_frames())
+    red = sprite.tinted_frame(0, (255, 0, 0))
+    sprite.tinted_frame(1, (255, 0, 0))
+    # touching frame 0 again makes frame 1 the oldest
+    sprite.tinted_frame(0, (255, 0, 0))
+    sprite.tinted_frame(2, (255, 0, 0))
+    assert list(sprite.tint_cache) == [(0, (255, 0, 0)), (2, (255, 0, 0))]
+    assert sprite.tinted_frame(0, (255, 0, 0)) is red
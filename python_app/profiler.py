@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import pygame
+
+
+class _NullSpan:
+    """What span() hands out while profiling is off: entering and leaving it does nothing"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start", "cpu")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.cpu = time.thread_time_ns()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.profiler._record(self.name, self.start, end - self.start, time.thread_time_ns() - self.cpu)
+        return False
+
+
+class Profiler:
+    """Spans, latencies and gauges for finding out where a frame went.
+
+    span(name) times a block (wall clock plus this thread's CPU time, the
+    difference is time spent waiting, e.g. for the GIL), observe(name, ms)
+    records a latency measured elsewhere (TTS first audio, LLM replies) and
+    gauge(name, value) a level (threads, queued speech). The last `history`
+    values of each feed the HUD, and the last `trace_events` everything go
+    into dump_trace() as a Chrome/Perfetto trace.
+
+    Off by default; then span() returns a shared no-op and observe()/gauge()
+    return right away, so leaving the calls in the hot path costs ~nothing."""
+
+    def __init__(self, history=120, trace_events=50000):
+        self.enabled = False
+        self.history = history
+        # name -> deque of recent (wall ms, cpu ms) or values, one writer per name
+        self.spans = {}
+        self.values = {}
+        self.trace = deque(maxlen=trace_events)
+        self._origin = time.perf_counter_ns()
+        self._thread_names = {}
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name, ms):
+        if not self.enabled:
+            return
+        self._value(name, ms)
+
+    def gauge(self, name, value):
+        if not self.enabled:
+            return
+        self._value(name, value)
+
+    def reset(self):
+        self.spans.clear()
+        self.values.clear()
+        self.trace.clear()
+
+    def summary(self):
+        """{name: (avg, max)} over the recent history, spans in wall ms (plus
+        the CPU ms avg as a third item), latencies and gauges as recorded"""
+        out = {}
+        for name, recent in list(self.spans.items()):
+            samples = list(recent)
+            if samples:
+                walls = [wall for wall, _ in samples]
+                cpu = sum(c for _, c in samples) / len(samples)
+                out[name] = (sum(walls) / len(walls), max(walls), cpu)
+        for name, recent in list(self.values.items()):
+            samples = list(recent)
+            if samples:
+                out[name] = (sum(samples) / len(samples), max(samples))
+        return out
+
+    def dump_trace(self, path):
+        """Writes the recorded spans and values in the Chrome trace event format
+        (open it in chrome://tracing or ui.perfetto.dev). Returns the path."""
+        pid = os.getpid()
+        events = [
+            {"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._thread_names.items())
+        ]
+        for kind, name, tid, ts, dur, extra in list(self.trace):
+            if kind == "X":
+                events.append({"ph": "X", "name": name, "pid": pid, "tid": tid, "ts": ts, "dur": dur,
+                               "args": {"cpu_us": extra}})
+            else:
+                events.append({"ph": "C", "name": name, "pid": pid, "tid": tid, "ts": ts,
+                               "args": {"value": extra}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+    def _thread(self):
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def _record(self, name, start_ns, wall_ns, cpu_ns):
+        recent = self.spans.get(name)
+        if recent is None:
+            recent = self.spans.setdefault(name, deque(maxlen=self.history))
+        recent.append((wall_ns / 1e6, cpu_ns / 1e6))
+        self.trace.append(("X", name, self._thread(), (start_ns - self._origin) / 1000,
+                           wall_ns / 1000, cpu_ns / 1000))
+
+    def _value(self, name, value):
+        recent = self.values.get(name)
+        if recent is None:
+            recent = self.values.setdefault(name, deque(maxlen=self.history))
+        recent.append(value)
+        self.trace.append(("C", name, self._thread(), (time.perf_counter_ns() - self._origin) / 1000,
+                           0, value))
+
+
+# the one every module reports to, main.py turns it on
+PROFILER = Profiler()
+
+
+class ProfilerHUD:
+    """The on-screen table of PROFILER.summary(), top left.
+    Re-rendered a few times a second, not every frame, so it barely shows up in itself."""
+
+    def __init__(self, profiler=PROFILER, pos=(10, 10), refresh=0.25, font_size=14):
+        self.profiler = profiler
+        self.pos = pos
+        self.refresh = refresh
+        self.font_size = font_size
+        self._font = None
+        self._surface = None
+        self._rendered_at = 0.0
+
+    @property
+    def font(self):
+        if self._font is None:
+            self._font = pygame.font.SysFont("Consolas", self.font_size)
+        return self._font
+
+    def draw(self, screen):
+        """Blits the HUD and returns its rect"""
+        now = time.perf_counter()
+        if self._surface is None or now - self._rendered_at >= self.refresh:
+            self._surface = self._render()
+            self._rendered_at = now
+        return screen.blit(self._surface, self.pos)
+
+    def _render(self):
+        lines = ["profiler (F3 hide, F4 dump trace)"]
+        for name, stats in sorted(self.profiler.summary().items()):
+            if len(stats) == 3:
+                avg, peak, cpu = stats
+                lines.append(f"{name:<22}{avg:7.2f} ms  max {peak:7.2f}  wait {max(0.0, avg - cpu):6.2f}")
+            else:
+                avg, peak = stats
+                lines.append(f"{name:<22}{avg:7.1f}     max {peak:7.1f}")
+
+        rendered = [self.font.render(line, True, (0, 255, 150)) for line in lines]
+        width = max(s.get_width() for s in rendered) + 16
+        height = sum(s.get_height() for s in rendered) + 12
+        surface = pygame.Surface((width, height))
+        surface.fill((20, 20, 28))
+        y = 6
+        for line in rendered:
+            surface.blit(line, (8, y))
+            y += line.get_height()
+        return surface
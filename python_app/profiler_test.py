@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+import time
+
+import pygame
+
+from profiler import NULL_SPAN, Profiler, ProfilerHUD
+
+
+def enabled(**options):
+    profiler = Profiler(**options)
+    profiler.enabled = True
+    return profiler
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    span = profiler.span("frame")
+    assert span is NULL_SPAN
+    with span:
+        pass
+    profiler.observe("tts_first_audio", 12.0)
+    profiler.gauge("threads", 3)
+    assert profiler.summary() == {}
+    assert not profiler.trace
+
+
+def test_span_records_wall_and_cpu_time():
+    profiler = enabled()
+    with profiler.span("sleepy"):
+        time.sleep(0.02)
+    avg, peak, cpu = profiler.summary()["sleepy"]
+    assert avg == peak >= 20
+    # sleeping isn't CPU time, that's what the HUD shows as wait
+    assert cpu < avg
+
+
+def test_summary_averages_the_recent_history():
+    profiler = enabled(history=3)
+    for value in (100, 1, 2, 3):
+        profiler.gauge("queued", value)
+    assert profiler.summary()["queued"] == (2, 3)
+
+
+def test_trace_is_bounded():
+    profiler = enabled(trace_events=5)
+    for i in range(10):
+        profiler.observe("llm", i)
+    assert len(profiler.trace) == 5
+
+
+def test_dump_trace_writes_chrome_trace_events(tmp_path):
+    profiler = enabled()
+    with profiler.span("frame"):
+        pass
+    profiler.observe("llm", 250.0)
+    worker = threading.Thread(target=lambda: profiler.gauge("pending", 2), name="speech-worker")
+    worker.start()
+    worker.join()
+
+    path = profiler.dump_trace(str(tmp_path / "trace.json"))
+    with open(path, encoding="utf-8") as f:
+        trace = json.load(f)
+    assert trace["displayTimeUnit"] == "ms"
+    events = trace["traceEvents"]
+    pid = os.getpid()
+    assert all(event["pid"] == pid for event in events)
+
+    names = {event["args"]["name"] for event in events if event["ph"] == "M"}
+    assert {"MainThread", "speech-worker"} <= names
+
+    (span,) = [event for event in events if event["ph"] == "X"]
+    assert span["name"] == "frame"
+    assert span["ts"] >= 0 and span["dur"] >= 0
+    assert "cpu_us" in span["args"]
+
+    counters = {event["name"]: event for event in events if event["ph"] == "C"}
+    assert counters["llm"]["args"] == {"value": 250.0}
+    assert counters["pending"]["args"] == {"value": 2}
+    assert counters["pending"]["tid"] != counters["llm"]["tid"]
+
+
+def test_reset_forgets_everything():
+    profiler = enabled()
+    with profiler.span("frame"):
+        pass
+    profiler.reset()
+    assert profiler.summary() == {}
+    assert not profiler.trace
+
+
+def test_hud_only_re_renders_after_the_refresh(monkeypatch):
+    pygame.font.init()
+    profiler = enabled()
+    profiler.gauge("threads", 4)
+    hud = ProfilerHUD(profiler, refresh=60)
+    renders = []
+    render = hud._render
+    monkeypatch.setattr(hud, "_render", lambda: renders.append(1) or render())
+    screen = pygame.Surface((400, 300))
+    rect = hud.draw(screen)
+    hud.draw(screen)
+    assert len(renders) == 1
+    assert rect.topleft == (10, 10)
@@ -0,0 +1,112 @@
+import pygame
+from collections import OrderedDict
+
+# background, border, text
+BUBBLE_THEMES = {
+    "light": ((255, 255, 220), (0, 0, 0), (0, 0, 0)),
+    "dark": ((40, 40, 50), (0, 255, 255), (255, 255, 255)),
+}
+PADDING = 10
+
+
+class SpeechBubble:
+    """Renders the pet's speech bubble once per text and reuses it.
+    Finished bubbles are memoized by (text, width, theme). When text only
+    grows (streamed AI answers) just the last line onwards is re-wrapped
+    and re-rendered, the lines above it are kept."""
+
+    def __init__(self, font_name="Arial", font_size=16, max_width=250, cache_size=8):
+        self.font_name = font_name
+        self.font_size = font_size
+        self.max_width = max_width
+        self.cache_size = cache_size
+        self._font = None
+        self._cache = OrderedDict()
+        # layout of the last text drawn, reused when the next text extends it
+        self._layout = None
+
+    @property
+    def font(self):
+        # SysFont enumerates the system fonts, so only ever do it once
+        if self._font is None:
+            self._font = pygame.font.SysFont(self.font_name, self.font_size)
+        return self._font
+
+    def draw(self, screen, text, pos, theme="light"):
+        """Blits the bubble centred above pos and returns its rect"""
+        surface = self.render(text, theme)
+        rect = surface.get_rect()
+        rect.midbottom = (pos[0], pos[1] - 20)
+        screen.blit(surface, rect)
+        return rect
+
+    def render(self, text, theme="light"):
+        key = (text, self.max_width, theme)
+        surface = self._cache.get(key)
+        if surface is not None:
+            self._cache.move_to_end(key)
+            return surface
+
+        surface = self._compose(self._lay_out(text, theme), theme)
+        self._cache[key] = surface
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return surface
+
+    def _lay_out(self, text, theme):
+        """Wraps and renders text, returns one surface per line"""
+        words = text.split(' ')
+
+        previous = self._layout
+        if (previous and previous["theme"] == theme and previous["width"] == self.max_width
+                and text.startswith(previous["text"])):
+            # everything before the last line is unchanged, start wrapping there
+            kept_starts = previous["starts"][:-1]
+            kept_surfaces = previous["surfaces"][:-1]
+            first_word = previous["starts"][-1]
+        else:
+            kept_starts, kept_surfaces, first_word = [], [], 0
+
+        new_starts = self._wrap(words, first_word)
+        _, _, text_color = BUBBLE_THEMES.get(theme, BUBBLE_THEMES["light"])
+        new_surfaces = []
+        for i, start in enumerate(new_starts):
+            end = new_starts[i + 1] if i + 1 < len(new_starts) else len(words)
+            line = " ".join(words[start:end])
+            new_surfaces.append(self.font.render(line, True, text_color))
+
+        self._layout = {
+            "text": text,
+            "theme": theme,
+            "width": self.max_width,
+            "starts": kept_starts + new_starts,
+            "surfaces": kept_surfaces + new_surfaces,
+        }
+        return self._layout["surfaces"]
+
+    def _wrap(self, words, first):
+        """Greedy word wrap from words[first:], returns the index each line starts at"""
+        starts = [first]
+        current_line = ""
+        for i in range(first, len(words)):
+            test_line = current_line + words[i] + " "
+            if current_line and self.font.size(test_line)[0] >= self.max_width:
+                starts.append(i)
+                current_line = words[i] + " "
+            else:
+                current_line = test_line
+        return starts
+
+    def _compose(self, lines, theme):
+        background, border, _ = BUBBLE_THEMES.get(theme, BUBBLE_THEMES["light"])
+        line_height = self.font.get_linesize()
+        width = max(line.get_width() for line in lines) + PADDING * 2
+        height = len(lines) * line_height + PADDING * 2
+
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        rect = surface.get_rect()
+        pygame.draw.rect(surface, background, rect, border_radius=10)
+        pygame.draw.rect(surface, border, rect, 2, border_radius=10)
+        for i, line in enumerate(lines):
+            surface.blit(line, (PADDING, PADDING + i * line_height))
+        return surface
@@ -0,0 +1,74 @@
+import pygame
+import pytest
+
+from speech_bubble import SpeechBubble
+
+STORY = ("Your processor has been working really hard today and honestly I think it deserves "
+         "a little break, maybe close a few of those browser tabs you never look at")
+
+
+@pytest.fixture(autouse=True, scope="module")
+def fonts():
+    pygame.font.init()
+
+
+def stream(bubble, text):
+    """Renders text word by word like a streamed answer, returns the last surface"""
+    words = text.split(" ")
+    for n in range(1, len(words) + 1):
+        surface = bubble.render(" ".join(words[:n]))
+    return surface
+
+
+def test_same_text_and_theme_is_reused():
+    bubble = SpeechBubble()
+    surface = bubble.render("hello")
+    assert bubble.render("hello") is surface
+    assert bubble.render("hello", "dark") is not surface
+
+
+def test_cache_drops_the_least_recently_used():
+    bubble = SpeechBubble(cache_size=2)
+    first = bubble.render("one")
+    bubble.render("two")
+    bubble.render("one")
+    bubble.render("three")
+    assert list(bubble._cache) == [("one", 250, "light"), ("three", 250, "light")]
+    assert bubble.render("one") is first
+
+
+def test_streamed_text_wraps_like_the_whole_text():
+    streamed = SpeechBubble()
+    surface = stream(streamed, STORY)
+    whole = SpeechBubble()
+    whole.render(STORY)
+    assert len(streamed._layout["starts"]) > 2
+    assert streamed._layout["starts"] == whole._layout["starts"]
+    assert surface.get_size() == whole.render(STORY).get_size()
+
+
+def test_growing_text_keeps_the_finished_lines():
+    bubble = SpeechBubble()
+    bubble.render(STORY)
+    before = list(bubble._layout["surfaces"])
+    bubble.render(STORY + " please")
+    after = bubble._layout["surfaces"]
+    # only the last line is rendered again
+    assert all(a is b for a, b in zip(after[:len(before) - 1], before))
+    assert after[len(before) - 1] is not before[-1]
+
+
+def test_unrelated_text_starts_over():
+    bubble = SpeechBubble()
+    bubble.render(STORY)
+    bubble.render("Something else entirely")
+    assert bubble._layout["starts"] == [0]
+    bubble.render(STORY, "dark")
+    assert bubble._layout["theme"] == "dark"
+    assert len(bubble._layout["starts"]) > 2
+
+
+def test_draw_centres_the_bubble_above_pos():
+    screen = pygame.Surface((400, 300))
+    rect = SpeechBubble().draw(screen, "hi", (200, 250))
+    assert rect.midbottom == (200, 230)
@@ -0,0 +1,155 @@
+import asyncio
+import heapq
+import itertools
+import threading
+
+from profiler import PROFILER
+
+# Lower runs first
+PRIORITY_PROMPT = 0
+PRIORITY_MOOD = 1
+PRIORITY_IDLE = 2
+# profiler span per job kind
+JOB_SPANS = {PRIORITY_PROMPT: "speech_job:prompt", PRIORITY_MOOD: "speech_job:mood", PRIORITY_IDLE: "speech_job:idle"}
+
+
+class SpeechJob:
+    """One AI + TTS request waiting for the worker"""
+
+    def __init__(self, priority, prompt, context, fallback_text, cache_key=None):
+        self.priority = priority
+        self.prompt = prompt
+        self.context = context
+        self.fallback_text = fallback_text
+        # set for lines whose answers may be reused (see ai_core.response_cache)
+        self.cache_key = cache_key
+        # set when a newer job made this one stale, the handler checks it between steps
+        self.cancelled = False
+
+
+class SpeechWorker:
+    """A single long-lived asyncio loop thread that runs AI and TTS jobs one
+    at a time, replacing a new thread per utterance.
+    Jobs wait in a bounded priority queue: user prompts before mood lines
+    before idle chatter. A new mood drops queued mood/idle lines and cancels
+    the one being spoken, a prompt drops idle lines and older prompts and
+    cancels whatever is running, and idle chatter is only queued when
+    nothing else is."""
+
+    def __init__(self, handler, max_pending=8):
+        # async def handler(job), run on the worker loop
+        self.handler = handler
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = []  # heap of (priority, seq, job)
+        self._seq = itertools.count()
+        self._current = None
+        self._current_task = None
+        self._closed = False
+
+        self._loop = asyncio.new_event_loop()
+        self._wake = asyncio.Event()
+        self._thread = threading.Thread(target=self._run, name="speech-worker", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, job):
+        """Queues a job, returns False when it was coalesced away"""
+        with self._lock:
+            if self._closed:
+                return False
+            if job.priority == PRIORITY_IDLE and (self._pending or self._current):
+                return False
+            if job.priority == PRIORITY_MOOD:
+                self._drop(lambda queued: queued.priority >= PRIORITY_MOOD)
+                self._cancel_current(lambda running: running.priority >= PRIORITY_MOOD)
+            elif job.priority == PRIORITY_PROMPT:
+                # a newer question supersedes the one still being answered
+                self._drop(lambda queued: queued.priority != PRIORITY_MOOD)
+                self._cancel_current(lambda running: True)
+
+            if len(self._pending) >= self.max_pending:
+                # evict the oldest of the least important jobs, unless the new one is worse
+                worst = max(self._pending, key=lambda entry: (entry[0], -entry[1]))
+                if job.priority > worst[0]:
+                    return False
+                self._pending.remove(worst)
+                heapq.heapify(self._pending)
+                worst[2].cancelled = True
+
+            heapq.heappush(self._pending, (job.priority, next(self._seq), job))
+        self._loop.call_soon_threadsafe(self._wake.set)
+        return True
+
+    def cancel(self, priority=None):
+        """Drops queued jobs and stops the running one, all of them or just one priority"""
+        def matches(job):
+            return priority is None or job.priority == priority
+        with self._lock:
+            self._drop(matches)
+            self._cancel_current(matches)
+
+    def close(self):
+        """Drops everything and stops the loop thread, safe to call twice"""
+        if self._closed:
+            return
+        self.cancel()
+        self._closed = True
+        self._loop.call_soon_threadsafe(self._wake.set)
+
+    # --- called with self._lock held ---
+    def _drop(self, stale):
+        kept = [entry for entry in self._pending if not stale(entry[2])]
+        for entry in self._pending:
+            if stale(entry[2]):
+                entry[2].cancelled = True
+        if len(kept) != len(self._pending):
+            heapq.heapify(kept)
+            self._pending = kept
+
+    def _cancel_current(self, stale):
+        if self._current and stale(self._current):
+            self._current.cancelled = True
+            if self._current_task:
+                self._loop.call_soon_threadsafe(self._current_task.cancel)
+
+    # --- worker thread ---
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._main())
+        self._loop.close()
+
+    def _next_job(self):
+        with self._lock:
+            while self._pending:
+                _, _, job = heapq.heappop(self._pending)
+                if not job.cancelled:
+                    self._current = job
+                    return job
+            return None
+
+    async def _main(self):
+        while not self._closed:
+            await self._wake.wait()
+            self._wake.clear()
+            while not self._closed and (job := self._next_job()) is not None:
+                task = asyncio.ensure_future(self.handler(job))
+                with self._lock:
+                    self._current_task = task
+                    if job.cancelled:
+                        task.cancel()
+                try:
+                    with PROFILER.span(JOB_SPANS.get(job.priority, "speech_job")):
+                        await task
+                except asyncio.CancelledError:
+                    pass
+                except Exception as e:
+                    print(f"Speech worker job failed: {e}")
+                finally:
+                    with self._lock:
+                        self._current = None
+                        self._current_task = None
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from speech_worker import PRIORITY_IDLE, PRIORITY_MOOD, PRIORITY_PROMPT, SpeechJob, SpeechWorker
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Recorder:
+    """Handler that notes which jobs started and finished. While the gate is
+    shut it keeps the running job busy and shrugs off cancellation, so the
+    queue behind it stays put until the test opens the gate."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = []
+        self.finished = []
+
+    async def __call__(self, job):
+        self.started.append(job.prompt)
+        while not self.gate.is_set():
+            try:
+                await asyncio.sleep(0.005)
+            except asyncio.CancelledError:
+                pass
+        self.finished.append(job.prompt)
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+@pytest.fixture
+def make_worker(recorder):
+    workers = []
+
+    def make(**options):
+        worker = SpeechWorker(recorder, **options)
+        workers.append(worker)
+        return worker
+
+    yield make
+    recorder.gate.set()
+    for worker in workers:
+        worker.close()
+
+
+def job(priority, name):
+    return SpeechJob(priority, name, {}, name)
+
+
+def busy(worker, recorder, name="p0"):
+    """Starts a prompt that holds the worker until the gate opens"""
+    running = job(PRIORITY_PROMPT, name)
+    assert worker.submit(running)
+    wait_for(lambda: recorder.started == [name])
+    return running
+
+
+def test_prompts_run_before_moods(make_worker, recorder):
+    worker = make_worker()
+    running = busy(worker, recorder)
+    assert worker.submit(job(PRIORITY_MOOD, "m1"))
+    assert worker.submit(job(PRIORITY_PROMPT, "p1"))
+    # the newer prompt supersedes the one being answered
+    assert running.cancelled
+    recorder.gate.set()
+    wait_for(lambda: len(recorder.finished) == 3)
+    assert recorder.started == ["p0", "p1", "m1"]
+
+
+def test_idle_lines_only_when_nothing_else_is_going_on(make_worker, recorder):
+    worker = make_worker()
+    busy(worker, recorder)
+    assert not worker.submit(job(PRIORITY_IDLE, "i1"))
+    recorder.gate.set()
+    wait_for(lambda: recorder.finished == ["p0"] and worker._current is None)
+    assert worker.submit(job(PRIORITY_IDLE, "i2"))
+    wait_for(lambda: recorder.finished == ["p0", "i2"])
+
+
+def test_new_mood_replaces_the_queued_one(make_worker, recorder):
+    worker = make_worker()
+    busy(worker, recorder)
+    first = job(PRIORITY_MOOD, "m1")
+    worker.submit(first)
+    worker.submit(job(PRIORITY_MOOD, "m2"))
+    assert first.cancelled
+    assert worker.pending == 1
+    recorder.gate.set()
+    wait_for(lambda: len(recorder.finished) == 2)
+    assert recorder.started == ["p0", "m2"]
+
+
+def test_new_prompt_drops_older_queued_prompts(make_worker, recorder):
+    worker = make_worker()
+    busy(worker, recorder)
+    older = job(PRIORITY_PROMPT, "p1")
+    worker.submit(older)
+    worker.submit(job(PRIORITY_MOOD, "m1"))
+    worker.submit(job(PRIORITY_PROMPT, "p2"))
+    assert older.cancelled
+    recorder.gate.set()
+    wait_for(lambda: len(recorder.finished) == 3)
+    assert recorder.started == ["p0", "p2", "m1"]
+
+
+def test_full_queue_evicts_less_important_jobs(make_worker, recorder):
+    worker = make_worker(max_pending=1)
+    busy(worker, recorder)
+    mood = job(PRIORITY_MOOD, "m1")
+    worker.submit(mood)
+    assert worker.submit(job(PRIORITY_PROMPT, "p1"))
+    assert mood.cancelled
+    # a mood line isn't worth more than the queued prompt
+    assert not worker.submit(job(PRIORITY_MOOD, "m2"))
+    assert worker.pending == 1
+    recorder.gate.set()
+    wait_for(lambda: len(recorder.finished) == 2)
+    assert recorder.started == ["p0", "p1"]
+
+
+def test_cancel_by_priority(make_worker, recorder):
+    worker = make_worker()
+    running = busy(worker, recorder)
+    mood = job(PRIORITY_MOOD, "m1")
+    worker.submit(mood)
+    worker.cancel(PRIORITY_MOOD)
+    assert mood.cancelled and not running.cancelled
+    assert worker.pending == 0
+
+
+def test_closed_worker_refuses_jobs(make_worker, recorder):
+    worker = make_worker()
+    worker.close()
+    assert not worker.submit(job(PRIORITY_PROMPT, "late"))
@@ -0,0 +1,137 @@
+import mmap
+import os
+import struct
+
+import pygame
+from PIL import Image
+
+# magic, source mtime (ns), source size, width, height, frame count
+HEADER = struct.Struct("<8sqqIII")
+MAGIC = b"SAMSPR1\0"
+DEFAULT_DURATION = 100  # ms, for GIFs that don't say
+
+
+def cache_path(gif_path, size):
+    """The compiled sprite file that sits next to the GIF"""
+    return f"{gif_path}.{size[0]}x{size[1]}.sprites"
+
+
+def _source_key(gif_path):
+    st = os.stat(gif_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_cached(gif_path, size):
+    """Memory-maps a compiled sprite file, returns (frames, durations) or None
+    when it is missing or was built from a different GIF/size.
+    Nothing is decoded, each frame is one copy straight out of the mapping.
+    The mapping is closed again before returning: the frames are ordinary
+    writable surfaces (a surface over a read-only mapping segfaults on the
+    first fill or blit) and nothing keeps the file mapped, which Windows
+    needs to os.replace() it when save_cache() rebuilds a stale cache."""
+    path = cache_path(gif_path, size)
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    with mm:
+        try:
+            magic, mtime_ns, src_size, width, height, count = HEADER.unpack_from(mm, 0)
+            frame_bytes = width * height * 4
+            durations_end = HEADER.size + count * 4
+            if (magic != MAGIC or (mtime_ns, src_size) != _source_key(gif_path)
+                    or (width, height) != tuple(size) or count == 0
+                    or len(mm) != durations_end + count * frame_bytes):
+                return None
+        except (OSError, struct.error):
+            return None
+
+        durations = list(struct.unpack_from(f"<{count}I", mm, HEADER.size))
+        frames = []
+        with memoryview(mm) as view:
+            for i in range(count):
+                start = durations_end + i * frame_bytes
+                mapped = pygame.image.frombuffer(view[start:start + frame_bytes], (width, height), "RGBA")
+                frames.append(mapped.copy())
+                # drop the surface's hold on the buffer so the mapping can close
+                del mapped
+    return frames, durations
+
+
+def save_cache(gif_path, size, frames, durations):
+    """Writes the scaled frames next to the GIF. Silently skips read-only folders."""
+    path = cache_path(gif_path, size)
+    tmp_path = path + ".tmp"
+    try:
+        mtime_ns, src_size = _source_key(gif_path)
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, mtime_ns, src_size, size[0], size[1], len(frames)))
+            f.write(struct.pack(f"<{len(durations)}I", *durations))
+            for frame in frames:
+                f.write(pygame.image.tobytes(frame, "RGBA"))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Could not write sprite cache {path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def decode_gif(gif_path, size):
+    """Yields (scaled frame, duration in ms) one GIF frame at a time"""
+    with Image.open(gif_path) as pil_img:
+        for index in range(getattr(pil_img, "n_frames", 1)):
+            pil_img.seek(index)
+            rgba = pil_img.convert("RGBA")
+            frame = pygame.image.frombytes(rgba.tobytes(), rgba.size, "RGBA")
+            duration = pil_img.info.get("duration") or DEFAULT_DURATION
+            yield pygame.transform.scale(frame, size), int(duration)
+
+
+class SpriteFrames:
+    """The pet's animation frames, loaded as cheaply as possible.
+    A valid compiled cache is memory-mapped and ready at once. Otherwise the
+    first frame is decoded right away and the rest trickle in through step()
+    (a frame or two per game tick), then the cache gets written for next time.
+    `frames` and `durations` are plain lists that grow while decoding."""
+
+    def __init__(self, gif_path, size=(200, 200)):
+        self.gif_path = gif_path
+        self.size = tuple(size)
+        self.frames = []
+        self.durations = []
+        self._decoder = None
+
+        cached = load_cached(gif_path, self.size)
+        if cached:
+            self.frames, self.durations = cached
+        else:
+            self._decoder = decode_gif(gif_path, self.size)
+            self.step()
+
+    @property
+    def complete(self):
+        return self._decoder is None
+
+    def step(self, budget=1):
+        """Decode up to budget more frames, returns True once all are loaded"""
+        if self._decoder is None:
+            return True
+        for _ in range(budget):
+            try:
+                frame, duration = next(self._decoder)
+            except StopIteration:
+                self._decoder = None
+                save_cache(self.gif_path, self.size, self.frames, self.durations)
+                return True
+            self.frames.append(frame)
+            self.durations.append(duration)
+        return False
+
+    def load_all(self):
+        while not self.step(budget=16):
+            pass
+        return self.frames
@@ -0,0 +1,99 @@
+import os
+
+import pygame
+import pytest
+from PIL import Image
+
+from sprite_cache import SpriteFrames, cache_path, load_cached
+
+SIZE = (8, 6)
+COLOURS = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+
+
+@pytest.fixture
+def gif(tmp_path):
+    path = str(tmp_path / "pet.gif")
+    frames = [Image.new("RGB", (4, 4), colour) for colour in COLOURS]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=[50, 80, 120], loop=0)
+    return path
+
+
+def compiled(gif_path):
+    sprites = SpriteFrames(gif_path, SIZE)
+    sprites.load_all()
+    assert os.path.exists(cache_path(gif_path, SIZE))
+    return sprites
+
+
+def test_round_trip(gif):
+    sprites = compiled(gif)
+    frames, durations = load_cached(gif, SIZE)
+    assert durations == sprites.durations == [50, 80, 120]
+    assert [frame.get_size() for frame in frames] == [SIZE] * 3
+    for frame, decoded in zip(frames, sprites.frames):
+        assert pygame.image.tobytes(frame, "RGBA") == pygame.image.tobytes(decoded, "RGBA")
+
+
+def test_cached_frames_are_writable(gif):
+    compiled(gif)
+    frames, _ = load_cached(gif, SIZE)
+    frames[0].fill((1, 2, 3))
+    frames[0].blit(frames[1], (0, 0), pygame.Rect(0, 0, 2, 2))
+    assert frames[0].get_at((0, 0))[:3] == (0, 255, 0)
+    assert frames[0].get_at((7, 5))[:3] == (1, 2, 3)
+    # the file itself is untouched
+    assert load_cached(gif, SIZE)[0][0].get_at((7, 5))[:3] == (255, 0, 0)
+
+
+def test_a_second_instance_loads_from_the_cache(gif):
+    compiled(gif)
+    sprites = SpriteFrames(gif, SIZE)
+    assert sprites.complete
+    assert len(sprites.frames) == 3
+
+
+def test_missing_cache_is_none(gif):
+    assert load_cached(gif, SIZE) is None
+
+
+def test_newer_gif_makes_it_stale(gif):
+    compiled(gif)
+    st = os.stat(gif)
+    os.utime(gif, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert load_cached(gif, SIZE) is None
+
+
+def test_different_gif_size_makes_it_stale(gif):
+    compiled(gif)
+    st = os.stat(gif)
+    with open(gif, "ab") as f:
+        f.write(b"\0")
+    # same mtime, only the size gives it away
+    os.utime(gif, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert load_cached(gif, SIZE) is None
+
+
+def test_other_dimensions_are_stale(gif):
+    compiled(gif)
+    other = (SIZE[1], SIZE[0])
+    os.replace(cache_path(gif, SIZE), cache_path(gif, other))
+    assert load_cached(gif, other) is None
+
+
+def test_truncated_cache_is_stale(gif):
+    compiled(gif)
+    path = cache_path(gif, SIZE)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 1)
+    assert load_cached(gif, SIZE) is None
+
+
+def test_stale_cache_gets_rebuilt(gif):
+    compiled(gif)
+    frames, _ = load_cached(gif, SIZE)
+    st = os.stat(gif)
+    os.utime(gif, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    # the frames from the old file are still around while it gets replaced
+    compiled(gif)
+    assert load_cached(gif, SIZE) is not None
+    assert frames[0].get_at((0, 0))[:3] == (255, 0, 0)
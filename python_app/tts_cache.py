@@ -0,0 +1,116 @@
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+
+class AudioCache:
+    """Content-addressed store for synthesized speech.
+    Every clip is saved as <sha256 of text+voice+rate+volume>.mp3, so the
+    same line in the same voice is only ever synthesized once. The folder
+    is kept under max_bytes by evicting the least recently played clips;
+    file mtimes carry the LRU order across restarts."""
+
+    def __init__(self, folder, max_bytes=50 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._total = 0
+        os.makedirs(folder, exist_ok=True)
+        self._scan()
+
+    @staticmethod
+    def key(text, voice, rate, volume):
+        raw = "\0".join((text, voice, rate, volume)).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.folder, f"{key}.mp3")
+
+    def get(self, key):
+        """Path of the cached clip, or None on a miss"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            # deleted behind our back
+            with self._lock:
+                self._forget(key)
+            return None
+        return path
+
+    def read(self, key):
+        """Bytes of the cached clip, or None on a miss"""
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, data):
+        """Stores a clip and returns its path"""
+        path = self.path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = len(data)
+            self._total += len(data)
+            self._evict(keep=key)
+        return path
+
+    def _scan(self):
+        clips = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if name.endswith(".tmp"):
+                # left over from a crash mid-write
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(".mp3"):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            clips.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(clips):
+            self._entries[key] = size
+            self._total += size
+        with self._lock:
+            self._evict()
+
+    def _forget(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total -= size
+
+    def _evict(self, keep=None):
+        for key in list(self._entries):
+            if self._total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # most likely the clip that is playing right now, try again later
+                continue
+            self._forget(key)
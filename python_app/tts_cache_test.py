@@ -0,0 +1,77 @@
+import os
+
+from tts_cache import AudioCache
+
+
+def age(cache, key, seconds):
+    """Backdates a clip's mtime, which is what carries LRU order across restarts"""
+    path = cache.path(key)
+    st = os.stat(path)
+    os.utime(path, (st.st_atime - seconds, st.st_mtime - seconds))
+
+
+def test_key_covers_text_and_every_voice_setting():
+    key = AudioCache.key("hi", "en-US-AnaNeural", "+0%", "+0%")
+    assert key == AudioCache.key("hi", "en-US-AnaNeural", "+0%", "+0%")
+    assert len(key) == 64
+    others = {
+        AudioCache.key("hi!", "en-US-AnaNeural", "+0%", "+0%"),
+        AudioCache.key("hi", "en-GB-RyanNeural", "+0%", "+0%"),
+        AudioCache.key("hi", "en-US-AnaNeural", "+10%", "+0%"),
+        AudioCache.key("hi", "en-US-AnaNeural", "+0%", "-10%"),
+    }
+    assert key not in others and len(others) == 4
+    # fields can't bleed into each other
+    assert AudioCache.key("a", "b c", "", "") != AudioCache.key("a b", "c", "", "")
+
+
+def test_put_then_get_and_read(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    path = cache.put("k", b"mp3 bytes")
+    assert cache.get("k") == path
+    assert cache.read("k") == b"mp3 bytes"
+    assert cache.get("missing") is None
+    assert cache.read("missing") is None
+
+
+def test_evicts_least_recently_used_over_the_limit(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=30)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 10)
+    cache.put("c", b"x" * 10)
+    # playing a makes b the oldest
+    cache.get("a")
+    cache.put("d", b"x" * 10)
+    assert cache.get("b") is None
+    assert not os.path.exists(cache.path("b"))
+    assert all(cache.get(key) for key in "acd")
+
+
+def test_new_clip_bigger_than_the_limit_is_kept(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=10)
+    cache.put("a", b"x" * 5)
+    cache.put("big", b"x" * 20)
+    assert cache.get("a") is None
+    assert cache.get("big")
+
+
+def test_restart_keeps_lru_order_from_mtimes(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=100)
+    for key, seconds in (("old", 30), ("mid", 20), ("new", 10)):
+        cache.put(key, b"x" * 10)
+        age(cache, key, seconds)
+    with open(os.path.join(str(tmp_path), "crashed.mp3.abc.tmp"), "wb") as f:
+        f.write(b"half")
+
+    reopened = AudioCache(str(tmp_path), max_bytes=25)
+    assert reopened.get("old") is None
+    assert reopened.get("mid") and reopened.get("new")
+    assert not any(name.endswith(".tmp") for name in os.listdir(str(tmp_path)))
+
+
+def test_clip_deleted_behind_its_back_is_a_miss(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    cache.put("k", b"data")
+    os.remove(cache.path("k"))
+    assert cache.get("k") is None
+    assert cache._total == 0
@@ -0,0 +1,184 @@
+import asyncio
+import io
+import math
+import re
+import struct
+import wave
+from collections import deque
+
+import edge_tts
+import pygame
+
+SPEECH_CHANNEL = 0  # reserved mixer channel, mood sounds never land on it
+# how often to check a channel that's playing something we have no end time for
+BUSY_POLL = 0.02
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text):
+    """Breaks a line into sentences so the first one can play while the rest synthesize"""
+    return [s for s in SENTENCE_END.split(text.strip()) if any(c.isalnum() for c in s)]
+
+
+def sentence_boundary(text, start=0):
+    """Index just past the last finished sentence in text[start:], or start if there is none yet"""
+    end = start
+    for match in SENTENCE_END.finditer(text, start):
+        end = match.end()
+    return end
+
+
+async def iterate(items):
+    """A plain list as an async iterator"""
+    for item in items:
+        yield item
+
+
+class EdgeTTSSource:
+    """edge-tts over the network, one mp3 per call"""
+    cacheable = True
+
+    def __init__(self, voice, rate="+0%", volume="+0%"):
+        self.voice = voice
+        self.rate = rate
+        self.volume = volume
+
+    async def synthesize(self, text):
+        communicator = edge_tts.Communicate(
+            text, voice=self.voice, rate=self.rate, volume=self.volume
+        )
+        chunks = []
+        async for chunk in communicator.stream():
+            if chunk["type"] == "audio":
+                chunks.append(chunk["data"])
+        return b"".join(chunks)
+
+
+class ToneSource:
+    """Offline stand-in for edge-tts: a short beep per word, as wav.
+    Good for testing the speech pipeline without a network (or ears)."""
+    cacheable = False
+
+    def __init__(self, sample_rate=22050, word_ms=90, gap_ms=40):
+        self.sample_rate = sample_rate
+        self.word_ms = word_ms
+        self.gap_ms = gap_ms
+
+    async def synthesize(self, text):
+        rate = self.sample_rate
+        word_samples = rate * self.word_ms // 1000
+        silence = b"\0\0" * (rate * self.gap_ms // 1000)
+        frames = []
+        for word in text.split():
+            # longer words beep lower, just so it sounds a bit like talking
+            pitch = 880 - min(len(word), 12) * 40
+            frames.append(b"".join(
+                struct.pack("<h", int(8000 * math.sin(2 * math.pi * pitch * i / rate)))
+                for i in range(word_samples)
+            ))
+            frames.append(silence)
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes(b"".join(frames))
+        return buffer.getvalue()
+
+
+class SilentSource:
+    """No sound at all, just a few ms of silence per sentence.
+    Used headless, where the mixer plays into the dummy driver."""
+    cacheable = False
+
+    def __init__(self, sample_rate=22050, ms=10):
+        self.sample_rate = sample_rate
+        self.ms = ms
+
+    async def synthesize(self, text):
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(b"\0\0" * (self.sample_rate * self.ms // 1000))
+        return buffer.getvalue()
+
+
+def get_tts_source(engine, voice, rate, volume):
+    if engine == "tone":
+        return ToneSource()
+    if engine == "silent":
+        return SilentSource()
+    return EdgeTTSSource(voice, rate, volume)
+
+
+class SpeechPlayer:
+    """Plays clips back to back from memory on the reserved speech channel.
+    Each clip is handed to the channel (play, then queue for the next one)
+    as soon as it arrives, so the first sentence is already audible while
+    the later ones are still being synthesized. Clip lengths are known up
+    front, so waiting for the end is a timer, not a get_busy() poll (except
+    when the channel is still busy with audio from before this line)."""
+
+    def __init__(self):
+        if pygame.mixer.get_num_channels() <= SPEECH_CHANNEL:
+            pygame.mixer.set_num_channels(SPEECH_CHANNEL + 1)
+        pygame.mixer.set_reserved(SPEECH_CHANNEL + 1)
+        self.channel = pygame.mixer.Channel(SPEECH_CHANNEL)
+
+    @property
+    def busy(self):
+        return self.channel.get_busy()
+
+    def stop(self):
+        self.channel.stop()
+
+    async def play(self, clips, on_done=None):
+        """Plays every clip from the async iterator `clips` (encoded audio bytes).
+        on_done(finished) is called once at the end, finished is False when
+        the line was cancelled or failed part way. Returns finished too."""
+        loop = asyncio.get_running_loop()
+        # when the playing clip and the queued one end, the channel holds at most these two
+        ends = deque()
+        finished = False
+        try:
+            async for data in clips:
+                sound = pygame.mixer.Sound(file=io.BytesIO(data))
+                now = loop.time()
+                while ends and ends[0] <= now:
+                    ends.popleft()
+                if len(ends) == 2:
+                    # queue slot is taken, sleep until the playing clip is done
+                    await asyncio.sleep(ends.popleft() - now)
+                    now = loop.time()
+
+                if not ends and self.channel.get_busy():
+                    # still playing something we didn't time (the tail of the last
+                    # line), its end is unknown so wait for it instead of guessing
+                    while self.channel.get_busy():
+                        await asyncio.sleep(BUSY_POLL)
+                    now = loop.time()
+
+                if ends:
+                    self.channel.queue(sound)
+                    ends.append(max(ends[-1], now) + sound.get_length())
+                else:
+                    self.channel.play(sound)
+                    ends.append(now + sound.get_length())
+
+            if ends:
+                await asyncio.sleep(max(ends[-1] - loop.time(), 0))
+            finished = True
+        except asyncio.CancelledError:
+            self.channel.stop()
+            raise
+        finally:
+            # stops whatever synthesis the source still had in flight
+            aclose = getattr(clips, "aclose", None)
+            if aclose:
+                await aclose()
+            if on_done:
+                on_done(finished)
+        return finished
@@ -0,0 +1,81 @@
+import asyncio
+import os
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from tts_stream import SpeechPlayer, ToneSource, iterate, sentence_boundary, split_sentences
+
+
+def test_split_sentences_on_end_punctuation():
+    assert split_sentences("Hi there! Your CPU is hot. Is it?  Yes") == [
+        "Hi there!", "Your CPU is hot.", "Is it?", "Yes"]
+
+
+def test_split_sentences_drops_punctuation_only_pieces():
+    assert split_sentences("  Done. ... !  ") == ["Done."]
+    assert split_sentences("") == []
+
+
+def test_split_sentences_keeps_decimals_together():
+    assert split_sentences("It is 3.5 GHz. Fast.") == ["It is 3.5 GHz.", "Fast."]
+
+
+def test_sentence_boundary():
+    text = "One. Two! Thr"
+    assert sentence_boundary(text) == len("One. Two! ")
+    assert sentence_boundary(text, len("One. Two! ")) == len("One. Two! ")
+    assert sentence_boundary("no end yet") == 0
+
+
+class FakeChannel:
+    """Records what the player does, busy for the first `busy_polls` checks"""
+
+    def __init__(self, busy_polls=0):
+        self.busy_polls = busy_polls
+        self.calls = []
+
+    def get_busy(self):
+        if self.busy_polls:
+            self.busy_polls -= 1
+            return True
+        return False
+
+    def play(self, sound):
+        self.calls.append("play")
+
+    def queue(self, sound):
+        self.calls.append("queue")
+
+    def stop(self):
+        self.calls.append("stop")
+
+
+@pytest.fixture
+def player():
+    pygame.mixer.init()
+    yield SpeechPlayer()
+    pygame.mixer.quit()
+
+
+def clips(*lines):
+    source = ToneSource(word_ms=10, gap_ms=5)
+    return iterate([asyncio.run(source.synthesize(line)) for line in lines])
+
+
+def test_player_plays_first_clip_and_queues_the_rest(player):
+    player.channel = FakeChannel()
+    done = []
+    assert asyncio.run(player.play(clips("one", "two"), done.append))
+    assert player.channel.calls == ["play", "queue"]
+    assert done == [True]
+
+
+def test_player_waits_out_untimed_audio_instead_of_queueing(player):
+    # the channel is still busy with something this line didn't start
+    player.channel = FakeChannel(busy_polls=3)
+    assert asyncio.run(player.play(clips("hello")))
+    assert player.channel.calls == ["play"]
+    assert player.channel.busy_polls == 0
@@ -0,0 +1,22 @@
+import re
+
+
+def wake_word_pattern(wake_word):
+    """Regex for a prompt that starts with the wake word as a whole word
+    (so "sam" doesn't wake on "sammy" or "samples"), plus the commas and
+    spaces after it. None when there's no wake word."""
+    words = wake_word.strip().lower().split()
+    if not words:
+        return None
+    return re.compile(r"\s+".join(re.escape(word) for word in words) + r"\b[\s,]*", re.IGNORECASE)
+
+
+def strip_wake_word(text, pattern):
+    """What was said after the wake word, or None if text doesn't start with it.
+    Without a pattern everything counts."""
+    if pattern is None:
+        return text
+    match = pattern.match(text.strip())
+    if not match:
+        return None
+    return text.strip()[match.end():]
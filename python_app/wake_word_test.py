@@ -0,0 +1,26 @@
+import pytest
+
+from wake_word import strip_wake_word, wake_word_pattern
+
+
+@pytest.mark.parametrize("heard, left", [
+    ("sam how hot is my cpu", "how hot is my cpu"),
+    ("Sam, stop the music", "stop the music"),
+    ("  sam  ", ""),
+    ("sammy how are you", None),
+    ("samples are ready", None),
+    ("hey sam what's up", None),
+])
+def test_wake_word_is_a_whole_word_at_the_start(heard, left):
+    assert strip_wake_word(heard, wake_word_pattern("sam")) == left
+
+
+def test_multi_word_wake_word():
+    pattern = wake_word_pattern(" Hey  Sam ")
+    assert strip_wake_word("hey sam mute", pattern) == "mute"
+    assert strip_wake_word("hey samantha", pattern) is None
+
+
+def test_no_wake_word_lets_everything_through():
+    assert wake_word_pattern("") is None
+    assert strip_wake_word("anything at all", None) == "anything at all"
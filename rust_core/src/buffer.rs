@@ -0,0 +1,58 @@
+use std::os::raw::{c_char, c_int, c_void};
+use std::ptr;
+
+use pyo3::exceptions::PyBufferError;
+use pyo3::ffi;
+use pyo3::prelude::*;
+
+static F32_FORMAT: &[u8] = b"f\0";
+
+/// Fills `view` with a read-only, one dimensional float32 view over `data`.
+///
+/// The view keeps `owner` alive, so `data`, `shape` and `strides` must be
+/// owned by it and never change while it exists.
+pub unsafe fn fill_f32_view(
+    view: *mut ffi::Py_buffer,
+    flags: c_int,
+    data: &[f32],
+    shape: *const ffi::Py_ssize_t,
+    strides: *const ffi::Py_ssize_t,
+    owner: Bound<'_, PyAny>,
+) -> PyResult<()> {
+    if view.is_null() {
+        return Err(PyBufferError::new_err("View is null"));
+    }
+    if (flags & ffi::PyBUF_WRITABLE) == ffi::PyBUF_WRITABLE {
+        return Err(PyBufferError::new_err("Object is not writable"));
+    }
+
+    let itemsize = std::mem::size_of::<f32>() as ffi::Py_ssize_t;
+
+    (*view).obj = owner.into_ptr();
+    (*view).buf = data.as_ptr() as *mut c_void;
+    (*view).len = data.len() as ffi::Py_ssize_t * itemsize;
+    (*view).readonly = 1;
+    (*view).itemsize = itemsize;
+
+    // CPython never writes through these pointers, so static/owned storage is fine
+    (*view).format = if (flags & ffi::PyBUF_FORMAT) == ffi::PyBUF_FORMAT {
+        F32_FORMAT.as_ptr() as *mut c_char
+    } else {
+        ptr::null_mut()
+    };
+    (*view).ndim = 1;
+    (*view).shape = if (flags & ffi::PyBUF_ND) == ffi::PyBUF_ND {
+        shape as *mut ffi::Py_ssize_t
+    } else {
+        ptr::null_mut()
+    };
+    (*view).strides = if (flags & ffi::PyBUF_STRIDES) == ffi::PyBUF_STRIDES {
+        strides as *mut ffi::Py_ssize_t
+    } else {
+        ptr::null_mut()
+    };
+    (*view).suboffsets = ptr::null_mut();
+    (*view).internal = ptr::null_mut();
+
+    Ok(())
+}
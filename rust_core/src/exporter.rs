@@ -0,0 +1,334 @@
+use std::fmt::Write as _;
+use std::io::{self, BufRead, BufReader, Write};
+use std::net::{IpAddr, Ipv4Addr, Ipv6Addr, SocketAddr, TcpListener, TcpStream};
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::Arc;
+use std::thread::{self, JoinHandle};
+use std::time::Duration;
+
+use crate::gpu::GPU_STRIDE;
+use crate::sampler::{Sample, Sampler, FIELD_COUNT};
+
+// A slow or silent client is dropped instead of holding up the next scrape
+const CLIENT_TIMEOUT: Duration = Duration::from_secs(2);
+
+const OPENMETRICS: &str = "application/openmetrics-text; version=1.0.0; charset=utf-8";
+const PROMETHEUS: &str = "text/plain; version=0.0.4; charset=utf-8";
+
+/// Metric name and help text for each of the `FIELDS`, in the same order.
+const FIELD_METRICS: [(&str, &str); FIELD_COUNT] = [
+    ("sam_cpu_usage_percent", "Total CPU usage."),
+    ("sam_memory_usage_percent", "Used share of physical memory."),
+    ("sam_cpu_temperature_celsius", "CPU package temperature."),
+    ("sam_disk_usage_percent", "Used share of the system disk."),
+    ("sam_gpu_usage_percent", "Usage of the busiest GPU."),
+    (
+        "sam_gpu_temperature_celsius",
+        "Temperature of the hottest GPU.",
+    ),
+    ("sam_gpu_power_watts", "Power draw of all GPUs together."),
+];
+
+/// Per-device metrics, one per slot of the `GPU_STRIDE` floats.
+const GPU_METRICS: [(&str, &str); GPU_STRIDE] = [
+    ("sam_gpu_device_usage_percent", "Usage of one GPU."),
+    (
+        "sam_gpu_device_temperature_celsius",
+        "Temperature of one GPU.",
+    ),
+    ("sam_gpu_device_power_watts", "Power draw of one GPU."),
+];
+
+/// Serves the sampler's latest sample as OpenMetrics text over HTTP.
+///
+/// One background thread accepts scrapes and answers them from the lock-free
+/// sample slot, so it never touches Python. The text is only rendered again
+/// once the sampler has published a new sample; in between, a scrape is a
+/// pointer compare and a socket write. Dropping the exporter stops the thread.
+pub struct Exporter {
+    addr: SocketAddr,
+    stop: Arc<AtomicBool>,
+    handle: Option<JoinHandle<()>>,
+}
+
+impl Exporter {
+    /// Binds `host:port` (port 0 picks a free one) and starts serving.
+    pub fn start(sampler: Arc<Sampler>, host: &str, port: u16) -> io::Result<Exporter> {
+        let listener = TcpListener::bind((host, port))?;
+        let addr = listener.local_addr()?;
+        let stop = Arc::new(AtomicBool::new(false));
+        let handle = {
+            let stop = Arc::clone(&stop);
+            thread::Builder::new()
+                .name("metrics-exporter".into())
+                .spawn(move || serve(listener, sampler, stop))?
+        };
+        Ok(Exporter {
+            addr,
+            stop,
+            handle: Some(handle),
+        })
+    }
+
+    pub fn addr(&self) -> SocketAddr {
+        self.addr
+    }
+}
+
+impl Drop for Exporter {
+    fn drop(&mut self) {
+        self.stop.store(true, Ordering::Relaxed);
+        // accept() only returns for a connection, so make one
+        let mut wake = self.addr;
+        if wake.ip().is_unspecified() {
+            wake.set_ip(match wake.ip() {
+                IpAddr::V4(_) => IpAddr::V4(Ipv4Addr::LOCALHOST),
+                IpAddr::V6(_) => IpAddr::V6(Ipv6Addr::LOCALHOST),
+            });
+        }
+        let _ = TcpStream::connect_timeout(&wake, CLIENT_TIMEOUT);
+        if let Some(handle) = self.handle.take() {
+            let _ = handle.join();
+        }
+    }
+}
+
+fn serve(listener: TcpListener, sampler: Arc<Sampler>, stop: Arc<AtomicBool>) {
+    // The sample the cached text was rendered from, and that text
+    let mut rendered: Option<(Arc<Sample>, Vec<u8>)> = None;
+    for stream in listener.incoming() {
+        if stop.load(Ordering::Relaxed) {
+            break;
+        }
+        if let Ok(stream) = stream {
+            let _ = respond(stream, &sampler, &mut rendered);
+        }
+    }
+}
+
+fn respond(
+    stream: TcpStream,
+    sampler: &Sampler,
+    rendered: &mut Option<(Arc<Sample>, Vec<u8>)>,
+) -> io::Result<()> {
+    stream.set_read_timeout(Some(CLIENT_TIMEOUT))?;
+    stream.set_write_timeout(Some(CLIENT_TIMEOUT))?;
+    let mut reader = BufReader::new(stream.try_clone()?);
+
+    let mut request_line = String::new();
+    reader.read_line(&mut request_line)?;
+    let mut openmetrics = false;
+    let mut line = String::new();
+    loop {
+        line.clear();
+        if reader.read_line(&mut line)? == 0 || line.trim_end().is_empty() {
+            break;
+        }
+        if let Some((name, value)) = line.split_once(':') {
+            if name.trim().eq_ignore_ascii_case("accept")
+                && value.contains("application/openmetrics-text")
+            {
+                openmetrics = true;
+            }
+        }
+    }
+
+    let mut parts = request_line.split_whitespace();
+    let method = parts.next().unwrap_or("");
+    let path = parts.next().unwrap_or("").split('?').next().unwrap_or("");
+    let mut stream = stream;
+    if method != "GET" && method != "HEAD" {
+        return write_response(&mut stream, "405 Method Not Allowed", PROMETHEUS, b"", true);
+    }
+    if path != "/metrics" && path != "/" {
+        return write_response(&mut stream, "404 Not Found", PROMETHEUS, b"", true);
+    }
+
+    let latest = sampler.latest();
+    let fresh = matches!(rendered, Some((sample, _)) if Arc::ptr_eq(sample, &latest));
+    if !fresh {
+        let text = render(&latest, sampler.gpu_names());
+        *rendered = Some((latest, text.into_bytes()));
+    }
+    let body = rendered
+        .as_ref()
+        .map_or(&[][..], |(_, body)| body.as_slice());
+    // Prometheus asks for OpenMetrics in Accept; the text is valid for both
+    let content_type = if openmetrics { OPENMETRICS } else { PROMETHEUS };
+    write_response(&mut stream, "200 OK", content_type, body, method == "GET")
+}
+
+fn write_response(
+    stream: &mut TcpStream,
+    status: &str,
+    content_type: &str,
+    body: &[u8],
+    with_body: bool,
+) -> io::Result<()> {
+    let head = format!(
+        "HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {}\r\nConnection: close\r\n\r\n",
+        body.len()
+    );
+    stream.write_all(head.as_bytes())?;
+    if with_body {
+        stream.write_all(body)?;
+    }
+    stream.flush()
+}
+
+/// The OpenMetrics exposition of one sample.
+pub fn render(sample: &Sample, gpu_names: &[String]) -> String {
+    let mut out = String::with_capacity(2048);
+    for (index, (name, help)) in FIELD_METRICS.iter().enumerate() {
+        family(&mut out, name, help);
+        let _ = writeln!(out, "{name} {}", sample.field(index));
+    }
+
+    let cores = sample.cores();
+    if !cores.is_empty() {
+        family(
+            &mut out,
+            "sam_cpu_core_usage_percent",
+            "Usage of one logical core.",
+        );
+        for (core, usage) in cores.iter().enumerate() {
+            let _ = writeln!(out, "sam_cpu_core_usage_percent{{core=\"{core}\"}} {usage}");
+        }
+    }
+
+    let gpus = sample.gpus();
+    if !gpus.is_empty() {
+        for (slot, (name, help)) in GPU_METRICS.iter().enumerate() {
+            family(&mut out, name, help);
+            for (index, values) in gpus.chunks_exact(GPU_STRIDE).enumerate() {
+                let model = gpu_names.get(index).map_or("", String::as_str);
+                let _ = writeln!(
+                    out,
+                    "{name}{{gpu=\"{index}\",model=\"{}\"}} {}",
+                    escape(model),
+                    values[slot]
+                );
+            }
+        }
+    }
+    out.push_str("# EOF\n");
+    out
+}
+
+fn family(out: &mut String, name: &str, help: &str) {
+    let _ = writeln!(out, "# TYPE {name} gauge");
+    let _ = writeln!(out, "# HELP {name} {help}");
+}
+
+/// Label values may not contain raw backslashes, quotes or newlines.
+fn escape(value: &str) -> String {
+    value
+        .replace('\\', "\\\\")
+        .replace('"', "\\\"")
+        .replace('\n', "\\n")
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::sampler::Intervals;
+    use std::io::Read;
+
+    const FIELDS: [f32; FIELD_COUNT] = [12.5, 40.0, 61.0, 50.0, 5.0, 45.0, 30.0];
+
+    fn lines(text: &str) -> Vec<&str> {
+        text.lines().collect()
+    }
+
+    #[test]
+    fn escape_label_values() {
+        assert_eq!(escape("RTX 3070"), "RTX 3070");
+        assert_eq!(escape(r#"a "b" c\d"#), r#"a \"b\" c\\d"#);
+        assert_eq!(escape("two\nlines"), "two\\nlines");
+    }
+
+    #[test]
+    fn render_fields_only() {
+        let text = render(&Sample::new(0.0, &FIELDS, &[], &[]), &[]);
+        let lines = lines(&text);
+        // TYPE, HELP and the value for every field, then # EOF
+        assert_eq!(lines.len(), FIELD_COUNT * 3 + 1);
+        assert_eq!(lines[0], "# TYPE sam_cpu_usage_percent gauge");
+        assert_eq!(lines[1], "# HELP sam_cpu_usage_percent Total CPU usage.");
+        assert_eq!(lines[2], "sam_cpu_usage_percent 12.5");
+        assert!(lines.contains(&"sam_gpu_power_watts 30"));
+        assert_eq!(lines.last(), Some(&"# EOF"));
+        assert!(!text.contains("core="));
+        assert!(!text.contains("gpu=\""));
+    }
+
+    #[test]
+    fn render_cores_and_gpus_with_labels() {
+        let gpus = [5.0, 45.0, 30.0, 80.0, 70.0, 200.0];
+        let names = ["RTX \"3070\"".to_string()];
+        let text = render(&Sample::new(0.0, &FIELDS, &[10.0, 20.0], &gpus), &names);
+        let lines = lines(&text);
+        assert!(lines.contains(&"sam_cpu_core_usage_percent{core=\"0\"} 10"));
+        assert!(lines.contains(&"sam_cpu_core_usage_percent{core=\"1\"} 20"));
+        assert!(
+            lines.contains(&"sam_gpu_device_usage_percent{gpu=\"0\",model=\"RTX \\\"3070\\\"\"} 5")
+        );
+        // a device without a name still gets a (blank) model label
+        assert!(lines.contains(&"sam_gpu_device_power_watts{gpu=\"1\",model=\"\"} 200"));
+        // one TYPE line per family, never repeated
+        let families = lines
+            .iter()
+            .filter(|line| line.starts_with("# TYPE"))
+            .count();
+        assert_eq!(families, FIELD_COUNT + 1 + GPU_STRIDE);
+        assert_eq!(lines.last(), Some(&"# EOF"));
+    }
+
+    fn get(addr: SocketAddr, request: &str) -> String {
+        let mut stream = TcpStream::connect(addr).unwrap();
+        stream.write_all(request.as_bytes()).unwrap();
+        let mut response = String::new();
+        stream.read_to_string(&mut response).unwrap();
+        response
+    }
+
+    #[test]
+    fn serves_metrics_over_http() {
+        // nothing enabled, so no sampling at all: every value stays 0
+        let idle = Intervals {
+            cpu: Duration::ZERO,
+            memory: Duration::ZERO,
+            temperature: Duration::ZERO,
+            disk: Duration::ZERO,
+            gpu: Duration::ZERO,
+            processes: Duration::ZERO,
+        };
+        let sampler = Arc::new(Sampler::start(idle, Duration::from_secs(1), Duration::ZERO));
+        let exporter = Exporter::start(sampler, "127.0.0.1", 0).unwrap();
+        let addr = exporter.addr();
+
+        let plain = get(addr, "GET /metrics HTTP/1.1\r\n\r\n");
+        assert!(plain.starts_with("HTTP/1.1 200 OK\r\n"));
+        assert!(plain.contains(&format!("Content-Type: {PROMETHEUS}\r\n")));
+        assert!(plain.ends_with("# EOF\n"));
+
+        let open = get(
+            addr,
+            "GET /metrics?x=1 HTTP/1.1\r\nAccept: application/openmetrics-text; version=1.0.0\r\n\r\n",
+        );
+        assert!(open.contains(&format!("Content-Type: {OPENMETRICS}\r\n")));
+        assert_eq!(
+            open.split("\r\n\r\n").nth(1),
+            plain.split("\r\n\r\n").nth(1)
+        );
+
+        let head = get(addr, "HEAD /metrics HTTP/1.1\r\n\r\n");
+        assert!(head.starts_with("HTTP/1.1 200 OK\r\n"));
+        assert!(head.ends_with("\r\n\r\n"));
+
+        assert!(get(addr, "GET /nope HTTP/1.1\r\n\r\n").starts_with("HTTP/1.1 404"));
+        assert!(get(addr, "POST /metrics HTTP/1.1\r\n\r\n").starts_with("HTTP/1.1 405"));
+        drop(exporter);
+        assert!(TcpStream::connect(addr).is_err());
+    }
+}
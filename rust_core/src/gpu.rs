@@ -0,0 +1,70 @@
+use nvml_wrapper::enum_wrappers::device::TemperatureSensor;
+use nvml_wrapper::{Device, Nvml};
+
+/// Floats stored per device: usage %, temperature °C, power W.
+pub const GPU_STRIDE: usize = 3;
+
+/// NVML device handles, resolved once when the sampler starts.
+pub struct Gpus<'nvml> {
+    devices: Vec<Device<'nvml>>,
+    names: Vec<String>,
+}
+
+impl<'nvml> Gpus<'nvml> {
+    /// Opens every device NVML reports. Without NVML this is empty and
+    /// sampling it costs nothing.
+    pub fn open(nvml: Option<&'nvml Nvml>) -> Self {
+        let Some(nvml) = nvml else {
+            return Gpus {
+                devices: Vec::new(),
+                names: Vec::new(),
+            };
+        };
+        let count = nvml.device_count().unwrap_or(0);
+        let devices: Vec<Device<'nvml>> = (0..count)
+            .filter_map(|index| nvml.device_by_index(index).ok())
+            .collect();
+        let names = devices
+            .iter()
+            .enumerate()
+            .map(|(index, device)| device.name().unwrap_or_else(|_| format!("GPU {index}")))
+            .collect();
+        Gpus { devices, names }
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.devices.is_empty()
+    }
+
+    pub fn names(&self) -> &[String] {
+        &self.names
+    }
+
+    /// Reads every device in one pass into `values` (`GPU_STRIDE` floats per
+    /// device). A reading that fails keeps that device's previous value.
+    pub fn sample(&self, values: &mut Vec<f32>) {
+        values.resize(self.devices.len() * GPU_STRIDE, 0.0);
+        for (device, slot) in self.devices.iter().zip(values.chunks_exact_mut(GPU_STRIDE)) {
+            if let Ok(utilization) = device.utilization_rates() {
+                slot[0] = utilization.gpu as f32;
+            }
+            if let Ok(temp) = device.temperature(TemperatureSensor::Gpu) {
+                slot[1] = temp as f32;
+            }
+            // Returns milliwatts, so we divide by 1000.0 for Watts
+            if let Ok(power) = device.power_usage() {
+                slot[2] = (power as f32) / 1000.0;
+            }
+        }
+    }
+}
+
+/// Machine-wide GPU figures: the busiest device's usage, the hottest
+/// device's temperature and the total power draw.
+pub fn aggregate(values: &[f32]) -> (f32, f32, f32) {
+    values
+        .chunks_exact(GPU_STRIDE)
+        .fold((0.0f32, 0.0f32, 0.0f32), |(usage, temp, power), slot| {
+            (usage.max(slot[0]), temp.max(slot[1]), power + slot[2])
+        })
+}
@@ -0,0 +1,278 @@
+use std::os::raw::c_int;
+use std::sync::Mutex;
+use std::time::Duration;
+
+use pyo3::ffi;
+use pyo3::prelude::*;
+
+use crate::buffer::fill_f32_view;
+use crate::sampler::FIELD_COUNT;
+
+// Upper bound per metric so a tiny interval can't allocate unbounded memory
+const MAX_CAPACITY: usize = 1 << 20;
+
+/// Fixed-capacity ring of the most recent values of one metric.
+struct Ring {
+    values: Vec<f32>,
+    head: usize,
+    len: usize,
+}
+
+impl Ring {
+    fn new(capacity: usize) -> Self {
+        Ring {
+            values: vec![0.0; capacity],
+            head: 0,
+            len: 0,
+        }
+    }
+
+    fn push(&mut self, value: f32) {
+        let capacity = self.values.len();
+        if capacity == 0 {
+            return;
+        }
+        self.values[self.head] = value;
+        self.head = (self.head + 1) % capacity;
+        self.len = (self.len + 1).min(capacity);
+    }
+
+    /// Copies the newest `count` values into `out`, oldest first.
+    fn copy_latest(&self, count: usize, out: &mut Vec<f32>) {
+        out.clear();
+        let count = count.min(self.len);
+        if count == 0 {
+            return;
+        }
+        let capacity = self.values.len();
+        let start = (self.head + capacity - count) % capacity;
+        let first = (capacity - start).min(count);
+        out.reserve(count);
+        out.extend_from_slice(&self.values[start..start + first]);
+        out.extend_from_slice(&self.values[..count - first]);
+    }
+}
+
+/// Per-metric history written by the sampler thread and read from Python.
+pub struct History {
+    rings: Vec<Mutex<Ring>>,
+    periods: [Duration; FIELD_COUNT],
+}
+
+impl History {
+    /// Keeps `span` worth of samples for each metric at its own sampling period.
+    pub fn new(span: Duration, periods: [Duration; FIELD_COUNT]) -> Self {
+        let rings = periods
+            .iter()
+            .map(|period| Mutex::new(Ring::new(samples_in(span, *period))))
+            .collect();
+        History { rings, periods }
+    }
+
+    pub fn push(&self, field: usize, value: f32) {
+        self.ring(field).push(value);
+    }
+
+    pub fn period(&self, field: usize) -> Duration {
+        self.periods[field]
+    }
+
+    /// The newest values covering `span` (everything when `None`), oldest first.
+    pub fn window(&self, field: usize, span: Option<Duration>) -> Vec<f32> {
+        let count = match span {
+            Some(span) => samples_in(span, self.periods[field]),
+            None => usize::MAX,
+        };
+        let mut out = Vec::new();
+        self.ring(field).copy_latest(count, &mut out);
+        out
+    }
+
+    fn ring(&self, field: usize) -> std::sync::MutexGuard<'_, Ring> {
+        self.rings[field]
+            .lock()
+            .unwrap_or_else(|poisoned| poisoned.into_inner())
+    }
+}
+
+fn samples_in(span: Duration, period: Duration) -> usize {
+    if period.is_zero() {
+        return 0;
+    }
+    let count = (span.as_secs_f64() / period.as_secs_f64()).ceil();
+    (count as usize).clamp(1, MAX_CAPACITY)
+}
+
+/// Min, max, mean and 95th percentile (nearest rank) of `values`.
+/// Reorders `values` in place.
+pub fn window_stats(values: &mut [f32]) -> Option<(f32, f32, f32, f32)> {
+    if values.is_empty() {
+        return None;
+    }
+    let mut min = f32::INFINITY;
+    let mut max = f32::NEG_INFINITY;
+    let mut sum = 0.0f64;
+    for value in values.iter() {
+        min = min.min(*value);
+        max = max.max(*value);
+        sum += *value as f64;
+    }
+    let avg = (sum / values.len() as f64) as f32;
+
+    let rank = ((values.len() as f64 * 0.95).ceil() as usize).max(1) - 1;
+    let (_, p95, _) = values.select_nth_unstable_by(rank, |a, b| a.total_cmp(b));
+    Some((min, max, avg, *p95))
+}
+
+/// A read-only float32 window of one metric's history, oldest value first.
+///
+/// Supports the buffer protocol, so `memoryview(series)` or
+/// `numpy.frombuffer(series, numpy.float32)` read it without another copy.
+#[pyclass(module = "rust_core")]
+pub struct Series {
+    values: Vec<f32>,
+    interval: f64,
+    shape: [ffi::Py_ssize_t; 1],
+    strides: [ffi::Py_ssize_t; 1],
+}
+
+impl Series {
+    pub fn new(values: Vec<f32>, interval: Duration) -> Self {
+        let len = values.len() as ffi::Py_ssize_t;
+        Series {
+            values,
+            interval: interval.as_secs_f64(),
+            shape: [len],
+            strides: [std::mem::size_of::<f32>() as ffi::Py_ssize_t],
+        }
+    }
+}
+
+#[pymethods]
+impl Series {
+    /// Seconds between two consecutive values.
+    #[getter]
+    fn interval(&self) -> f64 {
+        self.interval
+    }
+
+    fn __len__(&self) -> usize {
+        self.values.len()
+    }
+
+    fn tolist(&self) -> Vec<f32> {
+        self.values.clone()
+    }
+
+    unsafe fn __getbuffer__(
+        slf: Bound<'_, Self>,
+        view: *mut ffi::Py_buffer,
+        flags: c_int,
+    ) -> PyResult<()> {
+        let owner = slf.clone().into_any();
+        let this = slf.borrow();
+        fill_f32_view(
+            view,
+            flags,
+            &this.values,
+            this.shape.as_ptr(),
+            this.strides.as_ptr(),
+            owner,
+        )
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn periods(period: Duration) -> [Duration; FIELD_COUNT] {
+        [period; FIELD_COUNT]
+    }
+
+    #[test]
+    fn ring_keeps_the_newest_values_oldest_first() {
+        let mut ring = Ring::new(4);
+        let mut out = Vec::new();
+        ring.copy_latest(10, &mut out);
+        assert!(out.is_empty());
+
+        for value in 1..=6 {
+            ring.push(value as f32);
+        }
+        ring.copy_latest(10, &mut out);
+        assert_eq!(out, [3.0, 4.0, 5.0, 6.0]);
+        ring.copy_latest(2, &mut out);
+        assert_eq!(out, [5.0, 6.0]);
+    }
+
+    #[test]
+    fn zero_capacity_ring_ignores_pushes() {
+        let mut ring = Ring::new(0);
+        ring.push(1.0);
+        let mut out = vec![9.0];
+        ring.copy_latest(5, &mut out);
+        assert!(out.is_empty());
+    }
+
+    #[test]
+    fn window_covers_the_span_at_the_field_period() {
+        let history = History::new(Duration::from_secs(10), periods(Duration::from_secs(1)));
+        for value in 0..25 {
+            history.push(0, value as f32);
+        }
+        // 10 s at 1 s a sample keeps 10, a 3 s window is the newest 3
+        assert_eq!(history.window(0, None).len(), 10);
+        assert_eq!(
+            history.window(0, Some(Duration::from_secs(3))),
+            [22.0, 23.0, 24.0]
+        );
+        // partial periods round up
+        assert_eq!(
+            history.window(0, Some(Duration::from_millis(1500))).len(),
+            2
+        );
+        assert!(history.window(1, None).is_empty());
+    }
+
+    #[test]
+    fn disabled_metric_keeps_nothing() {
+        let history = History::new(Duration::from_secs(10), periods(Duration::ZERO));
+        history.push(0, 1.0);
+        assert!(history.window(0, None).is_empty());
+        assert_eq!(samples_in(Duration::from_secs(10), Duration::ZERO), 0);
+    }
+
+    #[test]
+    fn capacity_is_bounded() {
+        assert_eq!(
+            samples_in(Duration::from_secs(1_000_000), Duration::from_micros(1)),
+            MAX_CAPACITY
+        );
+        assert_eq!(samples_in(Duration::ZERO, Duration::from_secs(1)), 1);
+    }
+
+    #[test]
+    fn stats_of_an_empty_window() {
+        assert_eq!(window_stats(&mut []), None);
+    }
+
+    #[test]
+    fn stats_min_max_avg_p95() {
+        // 1..=100 shuffled: p95 by nearest rank is the 95th value
+        let mut values: Vec<f32> = (1..=100).map(|v| ((v * 37) % 100 + 1) as f32).collect();
+        let (min, max, avg, p95) = window_stats(&mut values).unwrap();
+        assert_eq!((min, max, p95), (1.0, 100.0, 95.0));
+        assert!((avg - 50.5).abs() < 1e-4);
+    }
+
+    #[test]
+    fn p95_of_small_windows() {
+        assert_eq!(window_stats(&mut [7.0]).unwrap(), (7.0, 7.0, 7.0, 7.0));
+        // ceil(0.95 * 3) = 3rd value
+        assert_eq!(window_stats(&mut [3.0, 1.0, 2.0]).unwrap().3, 3.0);
+        // ceil(0.95 * 20) = 19th value
+        let mut values: Vec<f32> = (1..=20).rev().map(|v| v as f32).collect();
+        assert_eq!(window_stats(&mut values).unwrap().3, 19.0);
+    }
+}
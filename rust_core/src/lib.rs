@@ -1,120 +1,321 @@
+use std::sync::{Arc, Mutex, Weak};
+use std::time::Duration;
+
+use once_cell::sync::Lazy;
+use pyo3::exceptions::{PyKeyError, PyOSError, PyValueError};
 use pyo3::prelude::*;
-use sysinfo::{System, Components, Disks};
-use nvml_wrapper::Nvml;
-use nvml_wrapper::enum_wrappers::device::TemperatureSensor;
 
+mod buffer;
+mod exporter;
+mod gpu;
+mod history;
+mod processes;
+mod sampler;
+mod smoothing;
+mod snapshot;
+mod voice;
+
+use exporter::Exporter;
+use history::{window_stats, Series};
+use processes::TOP_CAPACITY;
+use sampler::{
+    Intervals, Sampler, CPU_TEMP, CPU_USAGE, DISK_USAGE, FIELDS, GPU_POWER, GPU_TEMP, GPU_USAGE,
+    MEM_USAGE,
+};
+use snapshot::Snapshot;
+use voice::VoiceInput;
+
+// The process-wide sampler handed out by `shared()`. Only a weak reference is
+// kept here so the thread stops once the last CPU handle is gone.
+static SHARED: Lazy<Mutex<Weak<Sampler>>> = Lazy::new(|| Mutex::new(Weak::new()));
+
+fn interval(name: &str, seconds: f64) -> PyResult<Duration> {
+    if !seconds.is_finite() || seconds < 0.0 {
+        return Err(PyValueError::new_err(format!(
+            "{name} must be a non-negative number of seconds, got {seconds}"
+        )));
+    }
+    Ok(Duration::from_secs_f64(seconds))
+}
+
+fn field_index(metric: &str) -> PyResult<usize> {
+    FIELDS
+        .iter()
+        .position(|field| *field == metric)
+        .ok_or_else(|| PyKeyError::new_err(format!("unknown metric {metric:?}")))
+}
+
+fn intervals(
+    cpu_interval: f64,
+    memory_interval: f64,
+    temperature_interval: f64,
+    disk_interval: f64,
+    gpu_interval: f64,
+    process_interval: f64,
+) -> PyResult<Intervals> {
+    Ok(Intervals {
+        cpu: interval("cpu_interval", cpu_interval)?,
+        memory: interval("memory_interval", memory_interval)?,
+        temperature: interval("temperature_interval", temperature_interval)?,
+        disk: interval("disk_interval", disk_interval)?,
+        gpu: interval("gpu_interval", gpu_interval)?,
+        processes: interval("process_interval", process_interval)?,
+    })
+}
+
+/// Hardware telemetry backed by a background sampler thread.
+///
+/// Each subsystem is refreshed on its own interval (in seconds, 0 disables it)
+/// and the getters only read the latest published sample. `smoothing_seconds`
+/// is the time constant of the smoothed snapshot (0 leaves it raw). `CPU()` starts a
+/// private sampler; `shared()` returns a handle to the process-wide one.
 #[pyclass]
 pub struct CPU {
-    system: System,
-    components: Components,
-    disks: Disks, 
-    nvml: Option<Nvml>,
+    sampler: Arc<Sampler>,
 }
 
 #[pymethods]
 impl CPU {
     #[new]
-    fn new() -> Self {
-        let mut sys = System::new_all();
-        sys.refresh_all();
-        
-        let components = Components::new_with_refreshed_list();
-        let disks = Disks::new_with_refreshed_list();
-
-        let nvml = Nvml::init().ok();
-        
-        CPU { 
-            system: sys,
-            components,
-            disks,
-            nvml,
-        }
+    #[pyo3(signature = (cpu_interval=0.5, memory_interval=1.0, temperature_interval=2.0, disk_interval=30.0, gpu_interval=1.0, process_interval=5.0, history_seconds=600.0, smoothing_seconds=3.0))]
+    fn new(
+        py: Python<'_>,
+        cpu_interval: f64,
+        memory_interval: f64,
+        temperature_interval: f64,
+        disk_interval: f64,
+        gpu_interval: f64,
+        process_interval: f64,
+        history_seconds: f64,
+        smoothing_seconds: f64,
+    ) -> PyResult<Self> {
+        let intervals = intervals(
+            cpu_interval,
+            memory_interval,
+            temperature_interval,
+            disk_interval,
+            gpu_interval,
+            process_interval,
+        )?;
+        let span = interval("history_seconds", history_seconds)?;
+        let tau = interval("smoothing_seconds", smoothing_seconds)?;
+        let sampler = py.allow_threads(|| Sampler::start(intervals, span, tau));
+        Ok(CPU {
+            sampler: Arc::new(sampler),
+        })
     }
 
-    fn refresh(&mut self) {
-        self.system.refresh_all();
-        self.components.refresh();
-        self.disks.refresh(); 
+    /// Kept for older callers; the sampler thread refreshes on its own.
+    fn refresh(&self) {}
+
+    /// Every metric from the latest sample in a single call. With
+    /// `smoothed=True` the scalar metrics are spike-filtered and averaged over
+    /// about `smoothing_seconds`, which is what thresholds should look at.
+    #[pyo3(signature = (smoothed=false))]
+    fn snapshot(&self, smoothed: bool) -> Snapshot {
+        if smoothed {
+            Snapshot::new(self.sampler.smoothed())
+        } else {
+            Snapshot::new(self.sampler.latest())
+        }
     }
 
     // --- GPU Methods ---
     pub fn get_gpu_usage(&self) -> f32 {
-        if let Some(nvml) = &self.nvml {
-            if let Ok(device) = nvml.device_by_index(0) {
-                if let Ok(utilization) = device.utilization_rates() {
-                    return utilization.gpu as f32;
-                }
-            }
-        }
-        0.0
+        self.sampler.latest().field(GPU_USAGE)
     }
 
     pub fn get_gpu_temp(&self) -> f32 {
-        if let Some(nvml) = &self.nvml {
-            if let Ok(device) = nvml.device_by_index(0) {
-                if let Ok(temp) = device.temperature(TemperatureSensor::Gpu) {
-                    return temp as f32;
-                }
-            }
-        }
-        0.0
+        self.sampler.latest().field(GPU_TEMP)
     }
 
     pub fn get_gpu_power(&self) -> f32 {
-        if let Some(nvml) = &self.nvml {
-            if let Ok(device) = nvml.device_by_index(0) {
-                // Returns milliwatts, so we divide by 1000.0 for Watts
-                if let Ok(power) = device.power_usage() {
-                    return (power as f32) / 1000.0;
-                }
-            }
-        }
-        0.0
+        self.sampler.latest().field(GPU_POWER)
     }
 
     // --- CPU & System Methods ---
-    fn get_cpu_usage(&mut self) -> f32 {
-        self.system.refresh_cpu_usage(); 
-        let cpus = self.system.cpus();
-        if cpus.is_empty() { return 0.0; }
-        cpus.iter().map(|cpu| cpu.cpu_usage()).sum::<f32>() / cpus.len() as f32
+    fn get_cpu_usage(&self) -> f32 {
+        self.sampler.latest().field(CPU_USAGE)
+    }
+
+    fn get_memory_usage(&self) -> f32 {
+        self.sampler.latest().field(MEM_USAGE)
+    }
+
+    fn get_temperature(&self) -> f32 {
+        self.sampler.latest().field(CPU_TEMP)
+    }
+
+    fn get_disk_usage(&self) -> f32 {
+        self.sampler.latest().field(DISK_USAGE)
+    }
+
+    /// The last `seconds` of one metric (all kept history when omitted).
+    #[pyo3(signature = (metric, seconds=None))]
+    fn history(&self, metric: &str, seconds: Option<f64>) -> PyResult<Series> {
+        let field = field_index(metric)?;
+        let span = seconds.map(|s| interval("seconds", s)).transpose()?;
+        let history = self.sampler.history();
+        Ok(Series::new(
+            history.window(field, span),
+            history.period(field),
+        ))
     }
 
-    fn get_memory_usage(&mut self) -> f32 {
-        self.system.refresh_memory();
-        let total = self.system.total_memory() as f32;
-        let used = self.system.used_memory() as f32;
-        if total == 0.0 { return 0.0; }
-        (used / total) * 100.0
+    /// `(min, max, avg, p95)` of one metric over the last `seconds`, or None
+    /// when nothing has been recorded yet.
+    #[pyo3(signature = (metric, seconds=None))]
+    fn history_stats(
+        &self,
+        metric: &str,
+        seconds: Option<f64>,
+    ) -> PyResult<Option<(f32, f32, f32, f32)>> {
+        let field = field_index(metric)?;
+        let span = seconds.map(|s| interval("seconds", s)).transpose()?;
+        let mut values = self.sampler.history().window(field, span);
+        Ok(window_stats(&mut values))
     }
 
-    fn get_temperature(&mut self) -> f32 {
-        self.components.refresh();
-        self.components
+    /// The `n` busiest processes as `(name, pid, cpu_percent, mem_percent)`,
+    /// ranked `by` "cpu" or "mem". Percentages are of the whole machine.
+    ///
+    /// Process scanning (every `process_interval` seconds) only starts with
+    /// the first call, which returns an empty list until that scan is done.
+    #[pyo3(signature = (n=5, by="cpu"))]
+    fn top_processes(&self, n: usize, by: &str) -> PyResult<Vec<(String, u32, f32, f32)>> {
+        let top = self.sampler.top_processes();
+        let ranking = match by {
+            "cpu" => &top.by_cpu,
+            "mem" => &top.by_mem,
+            _ => {
+                return Err(PyValueError::new_err(format!(
+                    "by must be \"cpu\" or \"mem\", got {by:?}"
+                )))
+            }
+        };
+        Ok(ranking
             .iter()
-            .find(|c| {
-                let label = c.label().to_uppercase();
-                label.contains("CPU") || label.contains("PACKAGE")
-            })
-            .map(|c| c.temperature()) 
-            .unwrap_or(45.0) 
-    }
-
-    fn get_disk_usage(&mut self) -> f32 {
-        self.disks.refresh(); 
-        let disk = self.disks.iter().next(); 
-        if let Some(d) = disk {
-            let total = d.total_space() as f32;
-            let available = d.available_space() as f32;
-            if total == 0.0 { return 0.0; }
-            return ((total - available) / total) * 100.0;
-        }
-        0.0
+            .take(n.min(TOP_CAPACITY))
+            .map(|p| (p.name.clone(), p.pid, p.cpu, p.mem))
+            .collect())
+    }
+
+    /// Names of the GPUs NVML found when the sampler started, in index order.
+    fn gpu_names(&self) -> Vec<String> {
+        self.sampler.gpu_names().to_vec()
+    }
+
+    /// Serves the latest sample as OpenMetrics (Prometheus) text at
+    /// `http://host:port/metrics` until the returned server is closed.
+    ///
+    /// Scrapes are answered on a Rust thread straight from the sampler's
+    /// latest sample, never taking the GIL, and the text is only rendered
+    /// again after a new sample. `port=0` picks a free port. Raises OSError
+    /// when the address can't be bound.
+    #[pyo3(signature = (port=9464, host="127.0.0.1"))]
+    fn serve_metrics(&self, py: Python<'_>, port: u16, host: &str) -> PyResult<MetricsServer> {
+        let sampler = Arc::clone(&self.sampler);
+        let exporter = py
+            .allow_threads(|| Exporter::start(sampler, host, port))
+            .map_err(|e| {
+                PyOSError::new_err(format!("could not serve metrics on {host}:{port}: {e}"))
+            })?;
+        Ok(MetricsServer {
+            addr: exporter.addr().to_string(),
+            exporter: Some(exporter),
+        })
+    }
+
+    /// True when both handles read from the same sampler thread.
+    fn same_sampler(&self, other: PyRef<'_, CPU>) -> bool {
+        Arc::ptr_eq(&self.sampler, &other.sampler)
     }
 }
 
+/// A running metrics endpoint from `CPU.serve_metrics`. Stops on `close()`
+/// or when garbage collected.
+#[pyclass]
+pub struct MetricsServer {
+    addr: String,
+    exporter: Option<Exporter>,
+}
+
+#[pymethods]
+impl MetricsServer {
+    /// The port actually bound (useful with `port=0`).
+    #[getter]
+    fn port(&self) -> u16 {
+        self.exporter.as_ref().map_or(0, |e| e.addr().port())
+    }
+
+    #[getter]
+    fn url(&self) -> String {
+        format!("http://{}/metrics", self.addr)
+    }
+
+    #[getter]
+    fn running(&self) -> bool {
+        self.exporter.is_some()
+    }
+
+    fn close(&mut self, py: Python<'_>) {
+        let exporter = self.exporter.take();
+        py.allow_threads(move || drop(exporter));
+    }
+}
+
+/// Returns a handle to the process-wide sampler, starting it on first use.
+///
+/// Every handle reads the same samples, and attaching to a running sampler
+/// costs nothing. The intervals and history length only apply when this call
+/// starts the thread.
+#[pyfunction]
+#[pyo3(signature = (cpu_interval=0.5, memory_interval=1.0, temperature_interval=2.0, disk_interval=30.0, gpu_interval=1.0, process_interval=5.0, history_seconds=600.0, smoothing_seconds=3.0))]
+fn shared(
+    py: Python<'_>,
+    cpu_interval: f64,
+    memory_interval: f64,
+    temperature_interval: f64,
+    disk_interval: f64,
+    gpu_interval: f64,
+    process_interval: f64,
+    history_seconds: f64,
+    smoothing_seconds: f64,
+) -> PyResult<CPU> {
+    let intervals = intervals(
+        cpu_interval,
+        memory_interval,
+        temperature_interval,
+        disk_interval,
+        gpu_interval,
+        process_interval,
+    )?;
+    let span = interval("history_seconds", history_seconds)?;
+    let tau = interval("smoothing_seconds", smoothing_seconds)?;
+    // Release the GIL: starting the sampler waits for its first sample
+    let sampler = py.allow_threads(|| {
+        let mut slot = SHARED
+            .lock()
+            .unwrap_or_else(|poisoned| poisoned.into_inner());
+        match slot.upgrade() {
+            Some(sampler) => sampler,
+            None => {
+                let sampler = Arc::new(Sampler::start(intervals, span, tau));
+                *slot = Arc::downgrade(&sampler);
+                sampler
+            }
+        }
+    });
+    Ok(CPU { sampler })
+}
+
 #[pymodule]
 fn rust_core(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<CPU>()?;
+    m.add_class::<Snapshot>()?;
+    m.add_class::<Series>()?;
+    m.add_class::<MetricsServer>()?;
+    m.add_class::<VoiceInput>()?;
+    m.add_function(wrap_pyfunction!(shared, m)?)?;
     Ok(())
-}
\ No newline at end of file
+}
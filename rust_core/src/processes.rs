@@ -0,0 +1,156 @@
+use sysinfo::{Pid, Process, ProcessRefreshKind, System};
+
+/// How many processes are kept per ranking; `top_processes(n)` is capped at this.
+pub const TOP_CAPACITY: usize = 32;
+
+#[derive(Clone)]
+pub struct ProcessInfo {
+    pub name: String,
+    pub pid: u32,
+    /// Share of the whole machine, so 100% means every core is busy.
+    pub cpu: f32,
+    /// Share of total physical memory.
+    pub mem: f32,
+}
+
+/// The busiest processes from the latest process scan, highest first.
+#[derive(Default)]
+pub struct TopProcesses {
+    pub by_cpu: Vec<ProcessInfo>,
+    pub by_mem: Vec<ProcessInfo>,
+}
+
+/// Ranks processes without sorting the whole table.
+///
+/// sysinfo keeps every process between refreshes and derives CPU usage from
+/// per-PID time deltas, so a refresh only updates what changed. Ranking then
+/// selects the top entries in linear time from a reused scratch buffer and
+/// only allocates names for the processes that are published.
+pub struct ProcessTracker {
+    scratch: Vec<(f32, Pid)>,
+}
+
+impl ProcessTracker {
+    pub fn new() -> Self {
+        ProcessTracker {
+            scratch: Vec::new(),
+        }
+    }
+
+    pub fn sample(&mut self, system: &mut System) -> TopProcesses {
+        system.refresh_processes_specifics(ProcessRefreshKind::new().with_cpu().with_memory());
+        if system.total_memory() == 0 {
+            system.refresh_memory();
+        }
+
+        let cores = system.cpus().len().max(1) as f32;
+        let total_memory = system.total_memory() as f32;
+        let info = |process: &Process| ProcessInfo {
+            name: process.name().to_string(),
+            pid: process.pid().as_u32(),
+            cpu: process.cpu_usage() / cores,
+            mem: if total_memory > 0.0 {
+                process.memory() as f32 / total_memory * 100.0
+            } else {
+                0.0
+            },
+        };
+
+        let by_cpu = self.rank(system, |process| process.cpu_usage());
+        let by_mem = self.rank(system, |process| process.memory() as f32);
+        TopProcesses {
+            by_cpu: by_cpu.into_iter().map(info).collect(),
+            by_mem: by_mem.into_iter().map(info).collect(),
+        }
+    }
+
+    fn rank<'s>(
+        &mut self,
+        system: &'s System,
+        score: impl Fn(&Process) -> f32,
+    ) -> Vec<&'s Process> {
+        self.scratch.clear();
+        self.scratch.extend(
+            system
+                .processes()
+                .iter()
+                .map(|(pid, process)| (score(process), *pid)),
+        );
+
+        top_n(&mut self.scratch, TOP_CAPACITY)
+            .iter()
+            .filter_map(|(_, pid)| system.process(*pid))
+            .collect()
+    }
+}
+
+/// The `keep` highest scored entries, highest first. Selects them in linear
+/// time and only sorts those, the rest of `scored` is left in any order.
+fn top_n<K>(scored: &mut [(f32, K)], keep: usize) -> &[(f32, K)] {
+    let keep = keep.min(scored.len());
+    if keep == 0 {
+        return &[];
+    }
+    let highest_first = |a: &(f32, K), b: &(f32, K)| b.0.total_cmp(&a.0);
+    if scored.len() > keep {
+        scored.select_nth_unstable_by(keep - 1, highest_first);
+    }
+    let top = &mut scored[..keep];
+    top.sort_unstable_by(highest_first);
+    top
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn keys(top: &[(f32, u32)]) -> Vec<u32> {
+        top.iter().map(|(_, key)| *key).collect()
+    }
+
+    #[test]
+    fn top_n_picks_the_highest_scores_in_order() {
+        let mut scored: Vec<(f32, u32)> = (0..100).map(|i| (((i * 61) % 100) as f32, i)).collect();
+        let top = top_n(&mut scored, 3);
+        let scores: Vec<f32> = top.iter().map(|(score, _)| *score).collect();
+        assert_eq!(scores, [99.0, 98.0, 97.0]);
+        for (score, key) in top {
+            assert_eq!(((key * 61) % 100) as f32, *score);
+        }
+    }
+
+    #[test]
+    fn top_n_with_fewer_entries_than_asked() {
+        let mut scored = vec![(1.0, 1), (3.0, 3), (2.0, 2)];
+        assert_eq!(keys(top_n(&mut scored, TOP_CAPACITY)), [3, 2, 1]);
+    }
+
+    #[test]
+    fn top_n_of_nothing() {
+        let mut scored: Vec<(f32, u32)> = Vec::new();
+        assert!(top_n(&mut scored, 5).is_empty());
+        let mut scored = vec![(1.0, 1)];
+        assert!(top_n(&mut scored, 0).is_empty());
+    }
+
+    #[test]
+    fn top_n_keeps_ties_and_ranks_nan_first() {
+        // total_cmp puts NaN above every number, it must not break the selection
+        let mut scored = vec![(5.0, 1), (f32::NAN, 2), (5.0, 3), (0.0, 4), (7.0, 5)];
+        let top = keys(top_n(&mut scored, 4));
+        assert_eq!(top[..2], [2, 5]);
+        let mut tied = top[2..].to_vec();
+        tied.sort();
+        assert_eq!(tied, [1, 3]);
+    }
+
+    #[test]
+    fn sample_ranks_real_processes() {
+        let mut system = System::new();
+        let top = ProcessTracker::new().sample(&mut system);
+        assert!(!top.by_mem.is_empty());
+        assert!(top.by_mem.len() <= TOP_CAPACITY);
+        assert!(top.by_mem.windows(2).all(|pair| pair[0].mem >= pair[1].mem));
+        assert!(top.by_cpu.windows(2).all(|pair| pair[0].cpu >= pair[1].cpu));
+    }
+}
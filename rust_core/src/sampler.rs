@@ -0,0 +1,531 @@
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::mpsc::{self, Receiver, RecvTimeoutError, Sender};
+use std::sync::Arc;
+use std::thread::{self, JoinHandle};
+use std::time::{Duration, Instant};
+
+use arc_swap::ArcSwap;
+use nvml_wrapper::Nvml;
+use once_cell::sync::Lazy;
+use sysinfo::{Components, Disks, System};
+
+use crate::gpu::{self, Gpus, GPU_STRIDE};
+use crate::history::History;
+use crate::processes::{ProcessTracker, TopProcesses};
+use crate::smoothing::Smoother;
+
+// sysinfo needs this much time between two CPU refreshes to compute a usage value
+const MIN_CPU_INTERVAL: Duration = Duration::from_millis(200);
+
+// Reported when no CPU/package sensor is exposed by the OS
+const FALLBACK_CPU_TEMP: f32 = 45.0;
+
+/// How often each subsystem gets refreshed. A zero interval disables it.
+#[derive(Clone, Copy)]
+pub struct Intervals {
+    pub cpu: Duration,
+    pub memory: Duration,
+    pub temperature: Duration,
+    pub disk: Duration,
+    pub gpu: Duration,
+    /// Process scans only start once someone asks for the top processes.
+    pub processes: Duration,
+}
+
+impl Intervals {
+    fn cpu_period(&self) -> Duration {
+        if self.cpu.is_zero() {
+            self.cpu
+        } else {
+            self.cpu.max(MIN_CPU_INTERVAL)
+        }
+    }
+
+    /// The sampling period behind each of the `FIELDS`.
+    fn field_periods(&self) -> [Duration; FIELD_COUNT] {
+        let mut periods = [Duration::ZERO; FIELD_COUNT];
+        periods[CPU_USAGE] = self.cpu_period();
+        periods[MEM_USAGE] = self.memory;
+        periods[CPU_TEMP] = self.temperature;
+        periods[DISK_USAGE] = self.disk;
+        periods[GPU_USAGE] = self.gpu;
+        periods[GPU_TEMP] = self.gpu;
+        periods[GPU_POWER] = self.gpu;
+        periods
+    }
+}
+
+/// Names of the scalar metrics, in the order they are laid out in a sample.
+pub const FIELDS: [&str; 7] = [
+    "cpu_usage",
+    "mem_usage",
+    "cpu_temp",
+    "disk_usage",
+    "gpu_usage",
+    "gpu_temp",
+    "gpu_power",
+];
+pub const FIELD_COUNT: usize = FIELDS.len();
+
+pub const CPU_USAGE: usize = 0;
+pub const MEM_USAGE: usize = 1;
+pub const CPU_TEMP: usize = 2;
+pub const DISK_USAGE: usize = 3;
+pub const GPU_USAGE: usize = 4;
+pub const GPU_TEMP: usize = 5;
+pub const GPU_POWER: usize = 6;
+
+static EPOCH: Lazy<Instant> = Lazy::new(Instant::now);
+
+/// Seconds on a monotonic clock shared by every sampler in the process.
+pub fn monotonic() -> f64 {
+    EPOCH.elapsed().as_secs_f64()
+}
+
+/// One immutable set of readings published by the sampler thread.
+///
+/// `values` is a flat float32 array: the `FIELDS` first, then one usage
+/// value per CPU core, then usage/temp/power for each GPU, so it can be
+/// handed to Python without copying. The GPU fields hold the aggregate
+/// (busiest, hottest, total power) across all devices.
+pub struct Sample {
+    pub timestamp: f64,
+    pub values: Vec<f32>,
+    pub core_count: usize,
+    pub gpu_count: usize,
+}
+
+impl Sample {
+    pub(crate) fn new(
+        timestamp: f64,
+        fields: &[f32; FIELD_COUNT],
+        cores: &[f32],
+        gpus: &[f32],
+    ) -> Self {
+        let mut values = Vec::with_capacity(FIELD_COUNT + cores.len() + gpus.len());
+        values.extend_from_slice(fields);
+        values.extend_from_slice(cores);
+        values.extend_from_slice(gpus);
+        Sample {
+            timestamp,
+            values,
+            core_count: cores.len(),
+            gpu_count: gpus.len() / GPU_STRIDE,
+        }
+    }
+
+    pub fn field(&self, index: usize) -> f32 {
+        self.values[index]
+    }
+
+    pub fn lookup(&self, name: &str) -> Option<f32> {
+        FIELDS
+            .iter()
+            .position(|field| *field == name)
+            .map(|index| self.values[index])
+    }
+
+    pub fn cores(&self) -> &[f32] {
+        &self.values[FIELD_COUNT..FIELD_COUNT + self.core_count]
+    }
+
+    /// `GPU_STRIDE` floats (usage, temp, power) per device.
+    pub fn gpus(&self) -> &[f32] {
+        &self.values[FIELD_COUNT + self.core_count..]
+    }
+}
+
+/// Owns the background thread and the lock-free slots it publishes into.
+/// Dropping the sampler stops and joins the thread.
+pub struct Sampler {
+    latest: Arc<ArcSwap<Sample>>,
+    smoothed: Arc<ArcSwap<Sample>>,
+    history: Arc<History>,
+    top: Arc<ArcSwap<TopProcesses>>,
+    wants_processes: Arc<AtomicBool>,
+    gpu_names: Vec<String>,
+    // Sending wakes the thread up early, dropping it stops the thread
+    wake: Option<Sender<()>>,
+    handle: Option<JoinHandle<()>>,
+}
+
+impl Sampler {
+    /// Starts sampling and keeps `history_span` worth of values per metric.
+    /// Alongside the raw sample it publishes one whose `FIELDS` are smoothed
+    /// with time constant `smoothing` (see `Smoother`).
+    pub fn start(intervals: Intervals, history_span: Duration, smoothing: Duration) -> Sampler {
+        let empty = || {
+            Arc::new(ArcSwap::from_pointee(Sample::new(
+                monotonic(),
+                &[0.0; FIELD_COUNT],
+                &[],
+                &[],
+            )))
+        };
+        let latest = empty();
+        let smoothed = empty();
+        let (wake_tx, wake_rx) = mpsc::channel();
+        let (ready_tx, ready_rx) = mpsc::channel();
+        let history = Arc::new(History::new(history_span, intervals.field_periods()));
+        let top = Arc::new(ArcSwap::from_pointee(TopProcesses::default()));
+        let wants_processes = Arc::new(AtomicBool::new(false));
+
+        let slots = Slots {
+            latest: Arc::clone(&latest),
+            smoothed: Arc::clone(&smoothed),
+            history: Arc::clone(&history),
+            top: Arc::clone(&top),
+            wants_processes: Arc::clone(&wants_processes),
+        };
+        let handle = thread::Builder::new()
+            .name("rust_core-sampler".into())
+            .spawn(move || {
+                // NVML lives on this thread's stack so the device handles can borrow it
+                let nvml = if intervals.gpu.is_zero() {
+                    None
+                } else {
+                    Nvml::init().ok()
+                };
+                let mut worker = Worker::new(intervals, smoothing, nvml.as_ref(), slots);
+                worker.sample_all();
+                let _ = ready_tx.send(worker.gpus.names().to_vec());
+                worker.run(wake_rx);
+            })
+            .expect("failed to spawn the telemetry sampler thread");
+
+        // Block until the first full sample exists so getters never see zeros
+        // (takes MIN_CPU_INTERVAL, the CPU needs two refreshes for a usage value)
+        let gpu_names = ready_rx.recv().unwrap_or_default();
+
+        Sampler {
+            latest,
+            smoothed,
+            history,
+            top,
+            wants_processes,
+            gpu_names,
+            wake: Some(wake_tx),
+            handle: Some(handle),
+        }
+    }
+
+    pub fn latest(&self) -> Arc<Sample> {
+        self.latest.load_full()
+    }
+
+    /// The latest sample with smoothed `FIELDS`; cores and GPUs stay raw.
+    pub fn smoothed(&self) -> Arc<Sample> {
+        self.smoothed.load_full()
+    }
+
+    pub fn history(&self) -> &History {
+        &self.history
+    }
+
+    pub fn gpu_names(&self) -> &[String] {
+        &self.gpu_names
+    }
+
+    /// The latest process ranking. The first call turns process scanning on,
+    /// so it returns an empty ranking until that first scan has finished.
+    pub fn top_processes(&self) -> Arc<TopProcesses> {
+        if !self.wants_processes.swap(true, Ordering::Relaxed) {
+            if let Some(wake) = &self.wake {
+                let _ = wake.send(());
+            }
+        }
+        self.top.load_full()
+    }
+}
+
+impl Drop for Sampler {
+    fn drop(&mut self) {
+        // Dropping the sender wakes the thread out of recv_timeout
+        self.wake.take();
+        if let Some(handle) = self.handle.take() {
+            let _ = handle.join();
+        }
+    }
+}
+
+/// A fixed-period timer. A zero period never fires.
+struct Every {
+    period: Duration,
+    due: Instant,
+}
+
+impl Every {
+    fn new(period: Duration, now: Instant) -> Self {
+        Every {
+            period,
+            due: now + period,
+        }
+    }
+
+    /// A timer whose first tick is due immediately.
+    fn starting(period: Duration, now: Instant) -> Self {
+        Every { period, due: now }
+    }
+
+    fn enabled(&self) -> bool {
+        !self.period.is_zero()
+    }
+
+    fn poll(&mut self, now: Instant) -> bool {
+        if !self.enabled() || now < self.due {
+            return false;
+        }
+        self.due = now + self.period;
+        true
+    }
+}
+
+/// What the worker shares with the `Sampler` handle.
+struct Slots {
+    latest: Arc<ArcSwap<Sample>>,
+    smoothed: Arc<ArcSwap<Sample>>,
+    history: Arc<History>,
+    top: Arc<ArcSwap<TopProcesses>>,
+    wants_processes: Arc<AtomicBool>,
+}
+
+struct Worker<'nvml> {
+    system: System,
+    components: Components,
+    disks: Disks,
+    gpus: Gpus<'nvml>,
+    cpu: Every,
+    memory: Every,
+    temperature: Every,
+    disk: Every,
+    gpu: Every,
+    processes: Every,
+    process_period: Duration,
+    tracker: ProcessTracker,
+    fields: [f32; FIELD_COUNT],
+    smoothers: [Smoother; FIELD_COUNT],
+    smoothed: [f32; FIELD_COUNT],
+    cores: Vec<f32>,
+    gpu_values: Vec<f32>,
+    slots: Slots,
+}
+
+impl<'nvml> Worker<'nvml> {
+    fn new(
+        intervals: Intervals,
+        smoothing: Duration,
+        nvml: Option<&'nvml Nvml>,
+        slots: Slots,
+    ) -> Self {
+        let now = Instant::now();
+
+        // Only list what we will actually refresh; no process table scan
+        let components = if intervals.temperature.is_zero() {
+            Components::new()
+        } else {
+            Components::new_with_refreshed_list()
+        };
+        let disks = if intervals.disk.is_zero() {
+            Disks::new()
+        } else {
+            Disks::new_with_refreshed_list()
+        };
+        let gpus = Gpus::open(nvml);
+        // No devices means the GPU path is never scheduled at all
+        let gpu_period = if gpus.is_empty() {
+            Duration::ZERO
+        } else {
+            intervals.gpu
+        };
+
+        Worker {
+            system: System::new(),
+            components,
+            disks,
+            gpus,
+            cpu: Every::new(intervals.cpu_period(), now),
+            memory: Every::new(intervals.memory, now),
+            temperature: Every::new(intervals.temperature, now),
+            disk: Every::new(intervals.disk, now),
+            gpu: Every::new(gpu_period, now),
+            processes: Every::new(Duration::ZERO, now),
+            process_period: intervals.processes,
+            tracker: ProcessTracker::new(),
+            fields: [0.0; FIELD_COUNT],
+            smoothers: [Smoother::new(smoothing); FIELD_COUNT],
+            smoothed: [0.0; FIELD_COUNT],
+            cores: Vec::new(),
+            gpu_values: Vec::new(),
+            slots,
+        }
+    }
+
+    fn run(&mut self, wake: Receiver<()>) {
+        loop {
+            let now = Instant::now();
+            let mut changed = false;
+
+            if !self.processes.enabled() && self.slots.wants_processes.load(Ordering::Relaxed) {
+                self.processes = Every::starting(self.process_period, now);
+            }
+
+            if self.cpu.poll(now) {
+                self.sample_cpu();
+                changed = true;
+            }
+            if self.memory.poll(now) {
+                self.sample_memory();
+                changed = true;
+            }
+            if self.temperature.poll(now) {
+                self.sample_temperature();
+                changed = true;
+            }
+            if self.disk.poll(now) {
+                self.sample_disk();
+                changed = true;
+            }
+            if self.gpu.poll(now) {
+                self.sample_gpu();
+                changed = true;
+            }
+            if changed {
+                self.publish();
+            }
+            // Slower cadence and its own slot, so it never delays the metrics above
+            if self.processes.poll(now) {
+                let top = self.tracker.sample(&mut self.system);
+                self.slots.top.store(Arc::new(top));
+            }
+
+            match wake.recv_timeout(self.next_wakeup()) {
+                Ok(()) | Err(RecvTimeoutError::Timeout) => continue,
+                Err(RecvTimeoutError::Disconnected) => break,
+            }
+        }
+    }
+
+    fn next_wakeup(&self) -> Duration {
+        let now = Instant::now();
+        [
+            &self.cpu,
+            &self.memory,
+            &self.temperature,
+            &self.disk,
+            &self.gpu,
+            &self.processes,
+        ]
+        .iter()
+        .filter(|every| every.enabled())
+        .map(|every| every.due.saturating_duration_since(now))
+        .min()
+        .unwrap_or(Duration::from_secs(3600))
+    }
+
+    fn sample_all(&mut self) {
+        if self.cpu.enabled() {
+            self.prime_cpu();
+            self.sample_cpu();
+        }
+        if self.memory.enabled() {
+            self.sample_memory();
+        }
+        if self.temperature.enabled() {
+            self.sample_temperature();
+        }
+        if self.disk.enabled() {
+            self.sample_disk();
+        }
+        if self.gpu.enabled() {
+            self.sample_gpu();
+        }
+        self.publish();
+    }
+
+    fn record(&mut self, field: usize, value: f32) {
+        self.fields[field] = value;
+        self.smoothed[field] = self.smoothers[field].push(value, Instant::now());
+        self.slots.history.push(field, value);
+    }
+
+    fn publish(&self) {
+        let timestamp = monotonic();
+        let sample = Sample::new(timestamp, &self.fields, &self.cores, &self.gpu_values);
+        self.slots.latest.store(Arc::new(sample));
+        let smoothed = Sample::new(timestamp, &self.smoothed, &self.cores, &self.gpu_values);
+        self.slots.smoothed.store(Arc::new(smoothed));
+    }
+
+    /// sysinfo computes usage from the difference between two refreshes, so a
+    /// fresh `System` reads 0% on every core. Take the first reading now and
+    /// wait out the minimum interval, so the first published sample (and the
+    /// history and smoother it seeds) holds a real value.
+    fn prime_cpu(&mut self) {
+        self.system.refresh_cpu_usage();
+        thread::sleep(MIN_CPU_INTERVAL);
+    }
+
+    fn sample_cpu(&mut self) {
+        self.system.refresh_cpu_usage();
+        self.cores.clear();
+        self.cores
+            .extend(self.system.cpus().iter().map(|cpu| cpu.cpu_usage()));
+        let usage = if self.cores.is_empty() {
+            0.0
+        } else {
+            self.cores.iter().sum::<f32>() / self.cores.len() as f32
+        };
+        self.record(CPU_USAGE, usage);
+    }
+
+    fn sample_memory(&mut self) {
+        self.system.refresh_memory();
+        let total = self.system.total_memory() as f32;
+        let used = self.system.used_memory() as f32;
+        let usage = if total == 0.0 {
+            0.0
+        } else {
+            (used / total) * 100.0
+        };
+        self.record(MEM_USAGE, usage);
+    }
+
+    fn sample_temperature(&mut self) {
+        self.components.refresh();
+        let temp = self
+            .components
+            .iter()
+            .find(|c| {
+                let label = c.label().to_uppercase();
+                label.contains("CPU") || label.contains("PACKAGE")
+            })
+            .map(|c| c.temperature())
+            .unwrap_or(FALLBACK_CPU_TEMP);
+        self.record(CPU_TEMP, temp);
+    }
+
+    fn sample_disk(&mut self) {
+        self.disks.refresh();
+        let usage = match self.disks.iter().next() {
+            Some(d) => {
+                let total = d.total_space() as f32;
+                let available = d.available_space() as f32;
+                if total == 0.0 {
+                    0.0
+                } else {
+                    ((total - available) / total) * 100.0
+                }
+            }
+            None => 0.0,
+        };
+        self.record(DISK_USAGE, usage);
+    }
+
+    fn sample_gpu(&mut self) {
+        self.gpus.sample(&mut self.gpu_values);
+        let (usage, temp, power) = gpu::aggregate(&self.gpu_values);
+        self.record(GPU_USAGE, usage);
+        self.record(GPU_TEMP, temp);
+        self.record(GPU_POWER, power);
+    }
+}
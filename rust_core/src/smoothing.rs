@@ -0,0 +1,182 @@
+use std::time::{Duration, Instant};
+
+/// Noise filter for one metric: a median-of-three spike filter followed by
+/// an exponentially weighted moving average with time constant `tau`.
+///
+/// The median drops one-off spikes (a single 100% CPU reading), the EWMA then
+/// follows sustained changes with roughly `tau` of lag. Readings may arrive at
+/// any interval; each one is weighted by `1 - exp(-dt / tau)`. A zero `tau`
+/// disables both and passes raw values through.
+#[derive(Clone, Copy)]
+pub struct Smoother {
+    tau: f64,
+    recent: [f32; 3],
+    next: usize,
+    filled: usize,
+    value: f32,
+    last: Option<Instant>,
+}
+
+impl Smoother {
+    pub fn new(tau: Duration) -> Self {
+        Smoother {
+            tau: tau.as_secs_f64(),
+            recent: [0.0; 3],
+            next: 0,
+            filled: 0,
+            value: 0.0,
+            last: None,
+        }
+    }
+
+    /// Feeds one raw reading and returns the smoothed value.
+    pub fn push(&mut self, raw: f32, now: Instant) -> f32 {
+        if self.tau <= 0.0 {
+            self.value = raw;
+            return raw;
+        }
+
+        self.recent[self.next] = raw;
+        self.next = (self.next + 1) % self.recent.len();
+        self.filled = (self.filled + 1).min(self.recent.len());
+        let filtered = if self.filled == self.recent.len() {
+            median3(self.recent)
+        } else {
+            raw
+        };
+
+        self.value = match self.last {
+            None => filtered,
+            Some(last) => {
+                let dt = now.saturating_duration_since(last).as_secs_f64();
+                let alpha = 1.0 - (-dt / self.tau).exp();
+                self.value + (filtered - self.value) * alpha as f32
+            }
+        };
+        self.last = Some(now);
+        self.value
+    }
+}
+
+fn median3([a, b, c]: [f32; 3]) -> f32 {
+    a.max(b).min(a.min(b).max(c))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn feed(smoother: &mut Smoother, start: Instant, readings: &[(f64, f32)]) -> Vec<f32> {
+        readings
+            .iter()
+            .map(|(at, raw)| smoother.push(*raw, start + Duration::from_secs_f64(*at)))
+            .collect()
+    }
+
+    fn close(a: f32, b: f32) -> bool {
+        (a - b).abs() < 1e-3
+    }
+
+    #[test]
+    fn median3_is_the_middle_value() {
+        for (values, middle) in [
+            ([1.0, 2.0, 3.0], 2.0),
+            ([3.0, 1.0, 2.0], 2.0),
+            ([2.0, 3.0, 1.0], 2.0),
+            ([5.0, 5.0, 1.0], 5.0),
+            ([0.0, 100.0, 0.0], 0.0),
+        ] {
+            assert_eq!(median3(values), middle);
+        }
+    }
+
+    #[test]
+    fn zero_tau_passes_raw_values_through() {
+        let mut smoother = Smoother::new(Duration::ZERO);
+        let out = feed(
+            &mut smoother,
+            Instant::now(),
+            &[(0.0, 10.0), (1.0, 90.0), (2.0, 0.0)],
+        );
+        assert_eq!(out, [10.0, 90.0, 0.0]);
+    }
+
+    #[test]
+    fn first_reading_seeds_the_average() {
+        let mut smoother = Smoother::new(Duration::from_secs(3));
+        assert_eq!(smoother.push(42.0, Instant::now()), 42.0);
+    }
+
+    #[test]
+    fn a_single_spike_is_filtered_out() {
+        let mut smoother = Smoother::new(Duration::from_secs(1));
+        let out = feed(
+            &mut smoother,
+            Instant::now(),
+            &[
+                (0.0, 10.0),
+                (0.5, 10.0),
+                (1.0, 10.0),
+                (1.5, 100.0),
+                (2.0, 10.0),
+            ],
+        );
+        assert!(out.iter().all(|value| close(*value, 10.0)), "{out:?}");
+    }
+
+    #[test]
+    fn a_sustained_step_is_followed_with_tau_lag() {
+        let tau = 2.0;
+        let mut smoother = Smoother::new(Duration::from_secs_f64(tau));
+        let start = Instant::now();
+        feed(&mut smoother, start, &[(0.0, 0.0), (1.0, 0.0), (2.0, 0.0)]);
+        // two readings at 100 are needed before the median lets the step through
+        let out = feed(&mut smoother, start, &[(3.0, 100.0), (4.0, 100.0)]);
+        assert!(close(out[0], 0.0));
+        let alpha = 1.0 - (-1.0f64 / tau).exp();
+        assert!(close(out[1], (100.0 * alpha) as f32), "{out:?}");
+        // one tau after that it's covered another 1 - 1/e of the distance
+        let after = feed(&mut smoother, start, &[(4.0 + tau, 100.0)])[0];
+        let expected = out[1] + (100.0 - out[1]) * (1.0 - (-1.0f64).exp()) as f32;
+        assert!(close(after, expected), "{after} vs {expected}");
+    }
+
+    #[test]
+    fn weight_depends_on_elapsed_time_not_reading_count() {
+        let start = Instant::now();
+        let seed = [(0.0, 0.0), (0.1, 0.0), (0.2, 0.0), (0.3, 50.0)];
+
+        // the same 2 s of a steady 50, once in 4 readings and once in 20
+        let mut sparse = Smoother::new(Duration::from_secs(1));
+        feed(&mut sparse, start, &seed);
+        let sparse_out = feed(
+            &mut sparse,
+            start,
+            &(1..=4)
+                .map(|i| (0.3 + i as f64 * 0.5, 50.0))
+                .collect::<Vec<_>>(),
+        );
+        let mut dense = Smoother::new(Duration::from_secs(1));
+        feed(&mut dense, start, &seed);
+        let dense_out = feed(
+            &mut dense,
+            start,
+            &(1..=20)
+                .map(|i| (0.3 + i as f64 * 0.1, 50.0))
+                .collect::<Vec<_>>(),
+        );
+        assert!(close(
+            *sparse_out.last().unwrap(),
+            *dense_out.last().unwrap()
+        ));
+    }
+
+    #[test]
+    fn readings_out_of_order_do_not_move_backwards_in_time() {
+        let mut smoother = Smoother::new(Duration::from_secs(1));
+        let start = Instant::now() + Duration::from_secs(10);
+        smoother.push(10.0, start);
+        // an earlier timestamp counts as no time passed
+        assert_eq!(smoother.push(90.0, start - Duration::from_secs(5)), 10.0);
+    }
+}
@@ -0,0 +1,165 @@
+use std::os::raw::c_int;
+use std::sync::Arc;
+
+use pyo3::exceptions::PyKeyError;
+use pyo3::ffi;
+use pyo3::prelude::*;
+use pyo3::types::PyDict;
+
+use crate::buffer::fill_f32_view;
+use crate::gpu::GPU_STRIDE;
+use crate::sampler::{
+    Sample, CPU_TEMP, CPU_USAGE, DISK_USAGE, FIELDS, GPU_POWER, GPU_TEMP, GPU_USAGE, MEM_USAGE,
+};
+
+/// An immutable view of one sampler reading.
+///
+/// Supports the buffer protocol: `numpy.frombuffer(snap, numpy.float32)` or
+/// `memoryview(snap)` expose `Snapshot.FIELDS`, then one usage value per core,
+/// then usage/temp/power for each GPU, without copying. The gpu_* fields are
+/// the aggregate over all GPUs (busiest, hottest, total power). `snap.get("cpu_usage", 0)` and `snap["cpu_usage"]`
+/// also work, so a snapshot can stand in for the old stats dict.
+#[pyclass(module = "rust_core")]
+pub struct Snapshot {
+    sample: Arc<Sample>,
+    shape: [ffi::Py_ssize_t; 1],
+    strides: [ffi::Py_ssize_t; 1],
+}
+
+impl Snapshot {
+    pub fn new(sample: Arc<Sample>) -> Self {
+        let len = sample.values.len() as ffi::Py_ssize_t;
+        Snapshot {
+            sample,
+            shape: [len],
+            strides: [std::mem::size_of::<f32>() as ffi::Py_ssize_t],
+        }
+    }
+}
+
+#[pymethods]
+impl Snapshot {
+    #[classattr]
+    #[allow(non_snake_case)]
+    fn FIELDS() -> Vec<&'static str> {
+        FIELDS.to_vec()
+    }
+
+    /// Monotonic time of the reading, in seconds.
+    #[getter]
+    fn timestamp(&self) -> f64 {
+        self.sample.timestamp
+    }
+
+    #[getter]
+    fn cpu_usage(&self) -> f32 {
+        self.sample.field(CPU_USAGE)
+    }
+
+    #[getter]
+    fn mem_usage(&self) -> f32 {
+        self.sample.field(MEM_USAGE)
+    }
+
+    #[getter]
+    fn cpu_temp(&self) -> f32 {
+        self.sample.field(CPU_TEMP)
+    }
+
+    #[getter]
+    fn disk_usage(&self) -> f32 {
+        self.sample.field(DISK_USAGE)
+    }
+
+    #[getter]
+    fn gpu_usage(&self) -> f32 {
+        self.sample.field(GPU_USAGE)
+    }
+
+    #[getter]
+    fn gpu_temp(&self) -> f32 {
+        self.sample.field(GPU_TEMP)
+    }
+
+    #[getter]
+    fn gpu_power(&self) -> f32 {
+        self.sample.field(GPU_POWER)
+    }
+
+    /// Usage of every logical core, in percent.
+    #[getter]
+    fn cores(&self) -> Vec<f32> {
+        self.sample.cores().to_vec()
+    }
+
+    /// `(usage, temp, power)` for every GPU, in NVML index order.
+    #[getter]
+    fn gpus(&self) -> Vec<(f32, f32, f32)> {
+        self.sample
+            .gpus()
+            .chunks_exact(GPU_STRIDE)
+            .map(|slot| (slot[0], slot[1], slot[2]))
+            .collect()
+    }
+
+    #[pyo3(signature = (key, default=None))]
+    fn get(&self, py: Python<'_>, key: &str, default: Option<PyObject>) -> PyObject {
+        match self.sample.lookup(key) {
+            Some(value) => value.into_py(py),
+            None => default.unwrap_or_else(|| py.None()),
+        }
+    }
+
+    fn __getitem__(&self, key: &str) -> PyResult<f32> {
+        self.sample
+            .lookup(key)
+            .ok_or_else(|| PyKeyError::new_err(key.to_string()))
+    }
+
+    fn __contains__(&self, key: &str) -> bool {
+        self.sample.lookup(key).is_some()
+    }
+
+    fn to_dict<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let dict = PyDict::new_bound(py);
+        for (name, value) in FIELDS.iter().zip(&self.sample.values) {
+            dict.set_item(*name, *value)?;
+        }
+        dict.set_item("cores", self.cores())?;
+        dict.set_item("gpus", self.gpus())?;
+        dict.set_item("timestamp", self.sample.timestamp)?;
+        Ok(dict)
+    }
+
+    fn __repr__(&self) -> String {
+        let fields: Vec<String> = FIELDS
+            .iter()
+            .zip(&self.sample.values)
+            .map(|(name, value)| format!("{name}={value:.1}"))
+            .collect();
+        format!(
+            "Snapshot(t={:.3}, {}, cores={}, gpus={})",
+            self.sample.timestamp,
+            fields.join(", "),
+            self.sample.core_count,
+            self.sample.gpu_count
+        )
+    }
+
+    unsafe fn __getbuffer__(
+        slf: Bound<'_, Self>,
+        view: *mut ffi::Py_buffer,
+        flags: c_int,
+    ) -> PyResult<()> {
+        let owner = slf.clone().into_any();
+        let this = slf.borrow();
+        fill_f32_view(
+            view,
+            flags,
+            &this.sample.values,
+            this.shape.as_ptr(),
+            this.strides.as_ptr(),
+            owner,
+        )
+    }
+}
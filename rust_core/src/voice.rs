@@ -0,0 +1,467 @@
+use std::fs;
+use std::sync::atomic::{AtomicBool, AtomicU64, Ordering};
+use std::sync::mpsc::{self, Receiver, Sender, SyncSender, TryRecvError, TrySendError};
+use std::sync::{Arc, Mutex};
+use std::thread::{self, JoinHandle};
+
+use cpal::traits::{DeviceTrait, HostTrait, StreamTrait};
+use cpal::{Sample, SampleFormat};
+use pyo3::exceptions::{PyOSError, PyValueError};
+use pyo3::prelude::*;
+use vosk::{CompleteResult, DecodingState, Model, Recognizer};
+
+// Audio chunks waiting for the decoder. At the ~10 chunks a second cpal and
+// feed_wav deliver this is several seconds of slack before the mic drops audio.
+const AUDIO_QUEUE: usize = 64;
+// Transcripts waiting for Python. The decoder never waits for room, so when
+// nobody polls the newest ones are dropped instead of stalling it.
+const TRANSCRIPT_QUEUE: usize = 64;
+// feed_wav cuts files into 100 ms chunks, like a microphone would
+const FEED_CHUNKS_PER_SECOND: u32 = 10;
+
+enum Audio {
+    Chunk { rate: u32, samples: Vec<i16> },
+    // End of an utterance source (mic stopped, file done): flush the final result
+    End,
+}
+
+enum Transcript {
+    Partial(String),
+    Final(String),
+}
+
+impl Transcript {
+    fn into_tuple(self) -> (&'static str, String) {
+        match self {
+            Transcript::Partial(text) => ("partial", text),
+            Transcript::Final(text) => ("final", text),
+        }
+    }
+}
+
+/// Offline speech recognition on background threads.
+///
+/// A capture thread reads the microphone through cpal (or `feed_wav` reads a
+/// file) and hands mono 16-bit chunks to a decode thread running Vosk. Neither
+/// thread touches Python, so decoding never holds the GIL. Transcripts queue up
+/// until `poll()` collects them, which never blocks.
+#[pyclass]
+pub struct VoiceInput {
+    audio: Option<SyncSender<Audio>>,
+    transcripts: Mutex<Receiver<Transcript>>,
+    capture: Option<Capture>,
+    decoder: Option<JoinHandle<()>>,
+    closing: Arc<AtomicBool>,
+    dropped: Arc<AtomicU64>,
+}
+
+struct Capture {
+    // Dropping it tells the capture thread to stop
+    stop: Sender<()>,
+    handle: JoinHandle<()>,
+}
+
+#[pymethods]
+impl VoiceInput {
+    /// Loads the Vosk model at `model_path` (a folder such as
+    /// vosk-model-small-en-us-0.15) and starts the decode thread.
+    #[new]
+    fn new(py: Python<'_>, model_path: String) -> PyResult<Self> {
+        // Loading a model reads hundreds of MB, don't hold the GIL for it
+        let model = py
+            .allow_threads(|| Model::new(model_path.as_str()))
+            .ok_or_else(|| {
+                PyOSError::new_err(format!("could not load the Vosk model at {model_path:?}"))
+            })?;
+
+        let (audio_tx, audio_rx) = mpsc::sync_channel(AUDIO_QUEUE);
+        let (transcript_tx, transcript_rx) = mpsc::sync_channel(TRANSCRIPT_QUEUE);
+        let closing = Arc::new(AtomicBool::new(false));
+        let decoder = {
+            let closing = Arc::clone(&closing);
+            thread::Builder::new()
+                .name("voice-decoder".into())
+                .spawn(move || decode(model, audio_rx, transcript_tx, closing))
+                .map_err(|e| PyOSError::new_err(format!("could not start the decoder: {e}")))?
+        };
+
+        Ok(VoiceInput {
+            audio: Some(audio_tx),
+            transcripts: Mutex::new(transcript_rx),
+            capture: None,
+            decoder: Some(decoder),
+            closing,
+            dropped: Arc::new(AtomicU64::new(0)),
+        })
+    }
+
+    /// Starts listening on the default input device, or the first one whose
+    /// name contains `device`. Raises OSError when there is no usable mic.
+    #[pyo3(signature = (device=None))]
+    fn start(&mut self, py: Python<'_>, device: Option<String>) -> PyResult<()> {
+        if self.capture.is_some() {
+            return Ok(());
+        }
+        let audio = self.sender()?;
+        let dropped = Arc::clone(&self.dropped);
+        let (stop_tx, stop_rx) = mpsc::channel();
+        let (ready_tx, ready_rx) = mpsc::channel();
+
+        // cpal streams can't move between threads, so the capture thread
+        // opens the device itself and reports back whether that worked
+        let handle = thread::Builder::new()
+            .name("voice-capture".into())
+            .spawn(move || capture(device, audio, dropped, stop_rx, ready_tx))
+            .map_err(|e| PyOSError::new_err(format!("could not start the capture: {e}")))?;
+        let ready = py.allow_threads(|| ready_rx.recv());
+        match ready {
+            Ok(Ok(())) => {
+                self.capture = Some(Capture {
+                    stop: stop_tx,
+                    handle,
+                });
+                Ok(())
+            }
+            Ok(Err(message)) => {
+                let _ = handle.join();
+                Err(PyOSError::new_err(message))
+            }
+            Err(_) => {
+                let _ = handle.join();
+                Err(PyOSError::new_err("the capture thread exited early"))
+            }
+        }
+    }
+
+    /// Stops listening; whatever was said so far comes out as a final transcript.
+    fn stop(&mut self, py: Python<'_>) {
+        if let Some(capture) = self.capture.take() {
+            drop(capture.stop);
+            py.allow_threads(|| {
+                let _ = capture.handle.join();
+            });
+        }
+    }
+
+    #[getter]
+    fn listening(&self) -> bool {
+        self.capture.is_some()
+    }
+
+    /// Microphone chunks thrown away because the decoder fell behind.
+    #[getter]
+    fn dropped(&self) -> u64 {
+        self.dropped.load(Ordering::Relaxed)
+    }
+
+    /// Decodes a 16-bit PCM WAV file as if it was spoken into the mic, for
+    /// testing without one. The file is read here, decoding happens on the
+    /// decode thread; its transcripts show up in `poll()`.
+    fn feed_wav(&self, py: Python<'_>, path: String) -> PyResult<()> {
+        let audio = self.sender()?;
+        let (rate, samples) = py.allow_threads(|| read_wav(&path)).map_err(|e| match e {
+            WavError::Io(e) => PyOSError::new_err(format!("{path}: {e}")),
+            WavError::Format(message) => PyValueError::new_err(format!("{path}: {message}")),
+        })?;
+        let closing = Arc::clone(&self.closing);
+        thread::Builder::new()
+            .name("voice-feed".into())
+            .spawn(move || {
+                let chunk = (rate / FEED_CHUNKS_PER_SECOND).max(1) as usize;
+                for piece in samples.chunks(chunk) {
+                    if closing.load(Ordering::Relaxed) {
+                        return;
+                    }
+                    let chunk = Audio::Chunk {
+                        rate,
+                        samples: piece.to_vec(),
+                    };
+                    if audio.send(chunk).is_err() {
+                        return;
+                    }
+                }
+                let _ = audio.send(Audio::End);
+            })
+            .map_err(|e| PyOSError::new_err(format!("could not start the feed: {e}")))?;
+        Ok(())
+    }
+
+    /// Every transcript since the last call as `(kind, text)` tuples, oldest
+    /// first. `kind` is "partial" for the words so far in an utterance (each
+    /// one replaces the previous) or "final" once the utterance is over.
+    /// Returns an empty list right away when there is nothing new.
+    fn poll(&self) -> Vec<(&'static str, String)> {
+        let transcripts = self
+            .transcripts
+            .lock()
+            .unwrap_or_else(|poisoned| poisoned.into_inner());
+        let mut out = Vec::new();
+        loop {
+            match transcripts.try_recv() {
+                Ok(transcript) => out.push(transcript.into_tuple()),
+                Err(TryRecvError::Empty) | Err(TryRecvError::Disconnected) => break,
+            }
+        }
+        out
+    }
+
+    /// Stops listening and the decoder. Also happens when the object is dropped.
+    fn close(&mut self, py: Python<'_>) {
+        py.allow_threads(|| self.shutdown());
+    }
+}
+
+impl VoiceInput {
+    fn sender(&self) -> PyResult<SyncSender<Audio>> {
+        self.audio
+            .clone()
+            .ok_or_else(|| PyValueError::new_err("voice input is closed"))
+    }
+
+    fn shutdown(&mut self) {
+        self.closing.store(true, Ordering::Relaxed);
+        if let Some(capture) = self.capture.take() {
+            drop(capture.stop);
+            let _ = capture.handle.join();
+        }
+        // The decoder ends once every sender (ours, capture, feeds) is gone
+        self.audio = None;
+        if let Some(handle) = self.decoder.take() {
+            let _ = handle.join();
+        }
+    }
+}
+
+impl Drop for VoiceInput {
+    fn drop(&mut self) {
+        self.shutdown();
+    }
+}
+
+fn decode(
+    model: Model,
+    audio: Receiver<Audio>,
+    transcripts: SyncSender<Transcript>,
+    closing: Arc<AtomicBool>,
+) {
+    // One recognizer per input sample rate, remade when the source changes
+    let mut recognizer: Option<(u32, Recognizer)> = None;
+    let mut partial = String::new();
+
+    for message in audio {
+        if closing.load(Ordering::Relaxed) {
+            break;
+        }
+        match message {
+            Audio::Chunk { rate, samples } => {
+                if recognizer.as_ref().map(|(r, _)| *r) != Some(rate) {
+                    if let Some((_, old)) = recognizer.as_mut() {
+                        send_final(&transcripts, old.final_result(), &mut partial);
+                    }
+                    recognizer = Recognizer::new(&model, rate as f32).map(|r| (rate, r));
+                }
+                let Some((_, rec)) = recognizer.as_mut() else {
+                    continue;
+                };
+                match rec.accept_waveform(&samples) {
+                    Ok(DecodingState::Finalized) => {
+                        send_final(&transcripts, rec.result(), &mut partial)
+                    }
+                    Ok(DecodingState::Running) => {
+                        let text = rec.partial_result().partial.trim();
+                        if !text.is_empty() && text != partial {
+                            partial = text.to_string();
+                            let _ = transcripts.try_send(Transcript::Partial(partial.clone()));
+                        }
+                    }
+                    Ok(DecodingState::Failed) | Err(_) => {}
+                }
+            }
+            Audio::End => {
+                if let Some((_, rec)) = recognizer.as_mut() {
+                    send_final(&transcripts, rec.final_result(), &mut partial);
+                }
+            }
+        }
+    }
+}
+
+fn send_final(
+    transcripts: &SyncSender<Transcript>,
+    result: CompleteResult<'_>,
+    partial: &mut String,
+) {
+    partial.clear();
+    if let Some(result) = result.single() {
+        let text = result.text.trim();
+        if !text.is_empty() {
+            let _ = transcripts.try_send(Transcript::Final(text.to_string()));
+        }
+    }
+}
+
+fn capture(
+    device_name: Option<String>,
+    audio: SyncSender<Audio>,
+    dropped: Arc<AtomicU64>,
+    stop: Receiver<()>,
+    ready: Sender<Result<(), String>>,
+) {
+    let stream = match open_stream(device_name, audio.clone(), dropped) {
+        Ok(stream) => stream,
+        Err(message) => {
+            let _ = ready.send(Err(message));
+            return;
+        }
+    };
+    let _ = ready.send(Ok(()));
+    // Blocks until stop() drops the sender
+    let _ = stop.recv();
+    drop(stream);
+    let _ = audio.send(Audio::End);
+}
+
+fn open_stream(
+    device_name: Option<String>,
+    audio: SyncSender<Audio>,
+    dropped: Arc<AtomicU64>,
+) -> Result<cpal::Stream, String> {
+    let host = cpal::default_host();
+    let device = match &device_name {
+        None => host.default_input_device(),
+        Some(wanted) => host
+            .input_devices()
+            .map_err(|e| format!("could not list input devices: {e}"))?
+            .find(|device| {
+                device
+                    .name()
+                    .map_or(false, |name| name.contains(wanted.as_str()))
+            }),
+    }
+    .ok_or_else(|| match &device_name {
+        None => "no default input device".to_string(),
+        Some(wanted) => format!("no input device matching {wanted:?}"),
+    })?;
+
+    let supported = device
+        .default_input_config()
+        .map_err(|e| format!("could not read the input config: {e}"))?;
+    let config = supported.config();
+    let rate = config.sample_rate.0;
+    let channels = config.channels as usize;
+    let on_error = |e: cpal::StreamError| eprintln!("voice input stream error: {e}");
+
+    let stream = match supported.sample_format() {
+        SampleFormat::F32 => device.build_input_stream(
+            &config,
+            move |data: &[f32], _: &cpal::InputCallbackInfo| {
+                deliver(data, channels, rate, &audio, &dropped)
+            },
+            on_error,
+            None,
+        ),
+        SampleFormat::I16 => device.build_input_stream(
+            &config,
+            move |data: &[i16], _: &cpal::InputCallbackInfo| {
+                deliver(data, channels, rate, &audio, &dropped)
+            },
+            on_error,
+            None,
+        ),
+        SampleFormat::U16 => device.build_input_stream(
+            &config,
+            move |data: &[u16], _: &cpal::InputCallbackInfo| {
+                deliver(data, channels, rate, &audio, &dropped)
+            },
+            on_error,
+            None,
+        ),
+        other => return Err(format!("unsupported input sample format {other:?}")),
+    }
+    .map_err(|e| format!("could not open the input stream: {e}"))?;
+    stream
+        .play()
+        .map_err(|e| format!("could not start the input stream: {e}"))?;
+    Ok(stream)
+}
+
+/// Runs on the audio callback: downmix to mono 16-bit and hand it over
+/// without ever blocking. A full queue drops the chunk and counts it.
+fn deliver<T>(
+    data: &[T],
+    channels: usize,
+    rate: u32,
+    audio: &SyncSender<Audio>,
+    dropped: &AtomicU64,
+) where
+    T: Sample,
+    i16: cpal::FromSample<T>,
+{
+    let channels = channels.max(1);
+    let samples = data
+        .chunks(channels)
+        .map(|frame| {
+            let sum: i32 = frame.iter().map(|s| i16::from_sample(*s) as i32).sum();
+            (sum / frame.len() as i32) as i16
+        })
+        .collect();
+    if let Err(TrySendError::Full(_)) = audio.try_send(Audio::Chunk { rate, samples }) {
+        dropped.fetch_add(1, Ordering::Relaxed);
+    }
+}
+
+enum WavError {
+    Io(std::io::Error),
+    Format(String),
+}
+
+/// Reads a 16-bit PCM WAV file as (sample rate, mono samples).
+fn read_wav(path: &str) -> Result<(u32, Vec<i16>), WavError> {
+    let bytes = fs::read(path).map_err(WavError::Io)?;
+    let bad = |message: &str| WavError::Format(message.to_string());
+    if bytes.len() < 12 || &bytes[0..4] != b"RIFF" || &bytes[8..12] != b"WAVE" {
+        return Err(bad("not a WAV file"));
+    }
+    let u16_at = |at: usize| u16::from_le_bytes([bytes[at], bytes[at + 1]]);
+    let u32_at =
+        |at: usize| u32::from_le_bytes([bytes[at], bytes[at + 1], bytes[at + 2], bytes[at + 3]]);
+
+    let mut format = None;
+    let mut at = 12;
+    while at + 8 <= bytes.len() {
+        let id = &bytes[at..at + 4];
+        let size = u32_at(at + 4) as usize;
+        let body = at + 8;
+        let end = body.saturating_add(size).min(bytes.len());
+        if id == b"fmt " {
+            if end - body < 16 {
+                return Err(bad("truncated fmt chunk"));
+            }
+            // 1 is plain PCM, 0xFFFE the extensible header PCM files often use
+            let tag = u16_at(body);
+            let channels = u16_at(body + 2) as usize;
+            let rate = u32_at(body + 4);
+            let bits = u16_at(body + 14);
+            if !(tag == 1 || tag == 0xFFFE) || bits != 16 || channels == 0 {
+                return Err(bad("only 16-bit PCM WAV files are supported"));
+            }
+            format = Some((channels, rate));
+        } else if id == b"data" {
+            let (channels, rate) = format.ok_or_else(|| bad("data chunk before fmt chunk"))?;
+            let samples = bytes[body..end]
+                .chunks_exact(2 * channels)
+                .map(|frame| {
+                    let sum: i32 = frame
+                        .chunks_exact(2)
+                        .map(|s| i16::from_le_bytes([s[0], s[1]]) as i32)
+                        .sum();
+                    (sum / channels as i32) as i16
+                })
+                .collect();
+            return Ok((rate, samples));
+        }
+        // Chunks are padded to an even length
+        at = body.saturating_add(size + (size & 1));
+    }
+    Err(bad("no data chunk"))
+}